@@ -0,0 +1,82 @@
+"""
+Benchmark dos integradores de nbody.py: deriva de energia contra custo.
+
+Para cada integrador e cada passo dt, integra a nave em LEO (7000 km) por um
+tempo fixo e mede a variação relativa da energia específica da nave em
+relação à Terra (máximo ao longo da integração) e o tempo de relógio. A massa da Lua é zerada para que essa
+energia seja uma constante do movimento exata (problema de dois corpos). No fim,
+mostra o maior dt de cada esquema que mantém a deriva abaixo da tolerância.
+
+Uso: python bench_integrators.py [--days 5] [--tol 1e-6]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from nbody import G, EARTH, MOON, SHIP, INTEGRATORS, initial_state, advance
+
+STEPS_DT = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0)
+SAMPLES = 200   # medições de energia por execução
+
+
+def ship_energy(pos, vel, masses):
+    r = pos[SHIP] - pos[EARTH]
+    v = vel[SHIP] - vel[EARTH]
+    return 0.5 * v @ v - G * masses[EARTH] / np.sqrt(r @ r)
+
+
+def two_body_state():
+    pos, vel, masses = initial_state()
+    masses[MOON] = 0.0
+    return pos, vel, masses
+
+
+def run(integrator, dt, duration):
+    pos, vel, masses = two_body_state()
+    e0 = ship_energy(pos, vel, masses)
+    advance(pos, vel, masses, dt, 1, 1, integrator=integrator)   # aquece (compilação do Numba)
+    pos, vel, masses = two_body_state()
+    n_steps = int(round(duration / dt))
+    chunk = max(1, n_steps // SAMPLES)
+    drift = 0.0
+    elapsed = 0.0
+    done = 0
+    while done < n_steps:
+        n = min(chunk, n_steps - done)
+        start = time.perf_counter()
+        advance(pos, vel, masses, dt, n, 1, integrator=integrator)
+        elapsed += time.perf_counter() - start
+        done += n
+        drift = max(drift, abs(ship_energy(pos, vel, masses) / e0 - 1))
+    return drift, elapsed, n_steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=float, default=5.0, help="tempo simulado (dias)")
+    parser.add_argument("--tol", type=float, default=1e-6, help="deriva relativa de energia aceitável")
+    args = parser.parse_args()
+    duration = args.days * 86400
+
+    print(f"{'integrador':<10} {'dt (s)':>7} {'deriva':>10} {'tempo (s)':>10} {'passos/s':>12}")
+    best = {}
+    for integrator, name in INTEGRATORS.items():
+        for dt in STEPS_DT:
+            drift, elapsed, n_steps = run(integrator, dt, duration)
+            print(f"{name:<10} {dt:7.0f} {drift:10.2e} {elapsed:10.3f} {n_steps / elapsed:12.0f}")
+            if drift < args.tol:
+                best[integrator] = (dt, elapsed)
+        print()
+
+    print(f"Maior dt com deriva < {args.tol:g} em {args.days:g} dias:")
+    for integrator, name in INTEGRATORS.items():
+        if integrator in best:
+            dt, elapsed = best[integrator]
+            print(f"  {name:<10} dt = {dt:5.0f} s  ({elapsed:.3f} s de relógio)")
+        else:
+            print(f"  {name:<10} nenhum dos dt testados")
+
+
+if __name__ == "__main__":
+    main()
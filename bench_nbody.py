@@ -0,0 +1,88 @@
+"""
+Benchmark do núcleo de acelerações: subpassos/segundo do código antigo
+(acelerações escritas à mão para Terra, Lua e Nave) contra o kernel
+vetorizado de nbody.py, e verificação de que os dois dão o mesmo resultado.
+
+Uso: python bench_nbody.py [--substeps 20000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from nbody import G, mEarth, mMoon, mShip, EARTH, MOON, SHIP, initial_state, step
+
+
+def legacy_step(r_earth, v_earth, r_moon, v_moon, r_ship, v_ship, dt_sub):
+    # Subpasso como era escrito no laço de trab_fis_comp.py
+    r_earth_to_ship = r_earth - r_ship
+    r_moon_to_ship  = r_moon - r_ship
+    a_ship = (G * mEarth * r_earth_to_ship / np.linalg.norm(r_earth_to_ship)**3 +
+              G * mMoon  * r_moon_to_ship  / np.linalg.norm(r_moon_to_ship)**3)
+    r_ship_to_earth = r_ship - r_earth
+    r_moon_to_earth = r_moon - r_earth
+    a_earth = (G * mShip * r_ship_to_earth / np.linalg.norm(r_ship_to_earth)**3 +
+               G * mMoon * r_moon_to_earth / np.linalg.norm(r_moon_to_earth)**3)
+    r_ship_to_moon = r_ship - r_moon
+    r_earth_to_moon = r_earth - r_moon
+    a_moon = (G * mShip * r_ship_to_moon / np.linalg.norm(r_ship_to_moon)**3 +
+              G * mEarth * r_earth_to_moon / np.linalg.norm(r_earth_to_moon)**3)
+
+    v_ship += a_ship * dt_sub
+    v_earth += a_earth * dt_sub
+    v_moon  += a_moon * dt_sub
+
+    r_ship += v_ship * dt_sub
+    r_earth += v_earth * dt_sub
+    r_moon  += v_moon * dt_sub
+
+
+def run_legacy(n_substeps, dt_sub):
+    pos, vel, _ = initial_state()
+    r_earth, r_moon, r_ship = pos[EARTH].copy(), pos[MOON].copy(), pos[SHIP].copy()
+    v_earth, v_moon, v_ship = vel[EARTH].copy(), vel[MOON].copy(), vel[SHIP].copy()
+    start = time.perf_counter()
+    for _ in range(n_substeps):
+        legacy_step(r_earth, v_earth, r_moon, v_moon, r_ship, v_ship, dt_sub)
+    elapsed = time.perf_counter() - start
+    return np.array([r_earth, r_moon, r_ship]), elapsed
+
+
+def run_vectorized(n_substeps, dt_sub, n_extra=0):
+    pos, vel, masses = initial_state()
+    if n_extra:
+        # Corpos extras leves espalhados entre a Terra e a Lua
+        rng = np.random.default_rng(0)
+        radius = rng.uniform(1e7, 3e8, n_extra)
+        angle = rng.uniform(0, 2*np.pi, n_extra)
+        speed = np.sqrt(G * mEarth / radius)
+        pos = np.vstack([pos, np.column_stack([radius*np.cos(angle), radius*np.sin(angle)])])
+        vel = np.vstack([vel, np.column_stack([-speed*np.sin(angle), speed*np.cos(angle)])])
+        masses = np.concatenate([masses, np.full(n_extra, mShip)])
+    start = time.perf_counter()
+    step(pos, vel, masses, dt_sub * n_substeps, n_substeps)
+    elapsed = time.perf_counter() - start
+    return pos, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--substeps", type=int, default=20000)
+    parser.add_argument("--dt", type=float, default=10.0, help="subpasso (s)")
+    args = parser.parse_args()
+
+    pos_old, t_old = run_legacy(args.substeps, args.dt)
+    pos_new, t_new = run_vectorized(args.substeps, args.dt)
+    err = np.max(np.abs(pos_new - pos_old) / np.maximum(np.abs(pos_old), 1.0))
+
+    print(f"Antigo (3 corpos, à mão):  {args.substeps / t_old:12.0f} subpassos/s")
+    print(f"Vetorizado (3 corpos):     {args.substeps / t_new:12.0f} subpassos/s "
+          f"({t_old / t_new:.1f}x)")
+    print(f"Maior diferença relativa nas posições: {err:.2e}")
+    for n_extra in (7, 47, 197):
+        _, t = run_vectorized(args.substeps // 10, args.dt, n_extra)
+        print(f"Vetorizado ({3 + n_extra:3d} corpos):     {args.substeps // 10 / t:12.0f} subpassos/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark do lado direito das EDOs do modelo 3D (rhs3d.py): chamadas/segundo
+do f(t, r) original de projeto-backup.py contra cada backend de ThreeBodyRHS,
+e tempo de uma projeção com solve_ivp (RK45, e Radau/LSODA com o jacobiano
+analítico).
+
+Uso: python bench_rhs.py [--calls 200000]
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from rhs3d import G, BACKENDS, ThreeBodyRHS, njit
+
+mTerra = 5.9723e24
+mLua   = 7.349e22
+mNave  = 8000
+THRUST = 1e-3
+
+
+def legacy_f(t, r):
+    # f(t, r) como era escrito em projeto-backup.py (thrust positivo ligado)
+    r_nave, r_terra, r_lua = r[0:3], r[3:6], r[6:9]
+    v_nave, v_terra, v_lua = r[9:12], r[12:15], r[15:18]
+    d_terra_nave = np.linalg.norm(r_nave - r_terra)
+    d_lua_nave   = np.linalg.norm(r_nave - r_lua)
+    d_terra_lua  = np.linalg.norm(r_terra - r_lua)
+    acel_nave = G * ((mTerra * (r_terra - r_nave) / d_terra_nave**3) +
+                     (mLua   * (r_lua   - r_nave) / d_lua_nave**3))
+    acel_terra = G * ((mNave  * (r_nave  - r_terra) / d_terra_nave**3) +
+                      (mLua   * (r_lua   - r_terra) / d_terra_lua**3))
+    acel_lua = G * ((mNave  * (r_nave  - r_lua)   / d_lua_nave**3) +
+                    (mTerra * (r_terra - r_lua)   / d_terra_lua**3))
+    norm_v_nave = np.linalg.norm(v_nave)
+    if norm_v_nave > 1e-10:
+        acel_nave += THRUST * v_nave / norm_v_nave
+    return np.concatenate([v_nave, v_terra, v_lua, acel_nave, acel_terra, acel_lua])
+
+
+def initial_state():
+    # Condições iniciais de projeto-backup.py
+    rTerraLua, vLua, rOrbit = 3.850e8, 1022.0, 4.1e8
+    vOrbit = np.sqrt(G * mLua / (rOrbit - rTerraLua)) + vLua
+    return np.array([rOrbit, 0, 0, 0, 0, 0, rTerraLua, 0, 0,
+                     0, vOrbit, 0, 0, 0, 0, 0, vLua, 0], dtype=float)
+
+
+def calls_per_second(fun, r, n_calls):
+    fun(0.0, r)   # aquece (compilação do Numba)
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        fun(0.0, r)
+    return n_calls / (time.perf_counter() - start)
+
+
+def time_solve(fun, r0, horizon, method, **kwargs):
+    solve_ivp(fun, [0, 1000.0], r0, method=method, rtol=1e-9, atol=1e-12, **kwargs)
+    start = time.perf_counter()
+    sol = solve_ivp(fun, [0, horizon], r0, method=method, rtol=1e-9, atol=1e-12, **kwargs)
+    return time.perf_counter() - start, sol
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--horizon", type=float, default=50 * 1000.0, help="projeção (s)")
+    args = parser.parse_args()
+
+    r0 = initial_state()
+    backends = [b for b in BACKENDS if b != "numba" or njit is not None]
+    rhs = {b: ThreeBodyRHS(mNave, mTerra, mLua, THRUST, backend=b) for b in backends}
+
+    ref = legacy_f(0.0, r0)
+    print(f"{'lado direito':<22} {'chamadas/s':>12} {'sem alocação':>14} {'dif. relativa':>14}")
+    base = calls_per_second(legacy_f, r0, args.calls)
+    print(f"{'original':<22} {base:12.0f}")
+    out = np.empty(18)
+    for name, fun in rhs.items():
+        rate = calls_per_second(fun, r0, args.calls)
+        rate_into = calls_per_second(lambda t, r: fun.into(r, out), r0, args.calls)
+        err = np.max(np.abs(fun(0.0, r0) - ref) / np.maximum(np.abs(ref), 1e-30))
+        print(f"{name:<22} {rate:12.0f} {rate_into:14.0f} {err:14.2e}   ({rate_into / base:.1f}x)")
+
+    print()
+    print(f"solve_ivp em [0, {args.horizon:g}] s (rtol=1e-9):")
+    t_ref, sol_ref = time_solve(legacy_f, r0, args.horizon, "RK45")
+    print(f"  {'RK45, original':<26} {t_ref * 1e3:8.1f} ms  ({sol_ref.nfev} avaliações)")
+    fun = rhs[backends[0]]
+    for method, kwargs in (("RK45", {}), ("Radau", {"jac": fun.jac}), ("LSODA", {"jac": fun.jac})):
+        elapsed, sol = time_solve(fun, r0, args.horizon, method, **kwargs)
+        err = np.max(np.abs(sol.y[:3, -1] - sol_ref.y[:3, -1]))
+        print(f"  {method + ', ' + fun.backend:<26} {elapsed * 1e3:8.1f} ms  ({sol.nfev} avaliações, "
+              f"{sol.njev} jacobianos, Δposição da nave {err:.1e} m)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+Suíte de desempenho e precisão dos três simuladores, sem janela.
+
+Mede, com o mesmo código numérico dos programas interativos:
+  - trab_fis_comp.py (nbody.py): passos/s de cada integrador, segundos
+    simulados por segundo de relógio em cada fator de tempo do laço ao vivo
+    (subpassos automáticos), latência da trajetória futura (fria e
+    incremental) e da prévia longa por cônicas ligadas (numa transferência
+    que entra na esfera de influência da Lua);
+  - tli.py (kepler.py): latência da prévia da transferência;
+  - projeto-backup.py (rhs3d.py): chamadas/s do lado direito das EDOs e
+    tempo de uma projeção com solve_ivp;
+e a precisão: deriva relativa da energia e do momento angular e erro de
+posição contra uma referência de alta precisão, na órbita LEO, na
+transferência de Hohmann e numa órbita excêntrica com o passo de cada fator
+de tempo de WARP_FACTORS e o integrador do laço ao vivo (referência: solução
+kepleriana exata, com a massa da Lua zerada) e na órbita de projeto-backup.py
+(referência: DOP853 com rtol=1e-13).
+
+Os resultados vão para um JSON (métrica -> valor, unidade e sentido melhor).
+Com --baseline, cada métrica é comparada com o arquivo de referência: uma
+métrica de velocidade regride se cair mais que --speed-tol, uma de erro se
+passar de --error-factor vezes a referência (mais uma folga absoluta). O
+código de saída é 1 se houver regressão.
+
+Uso:
+    python bench_suite.py --output bench_results.json --baseline bench_baseline.json
+    python bench_suite.py --save-baseline bench_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+import nbody
+from nbody import G, EARTH, MOON, SHIP, INTEGRATORS, initial_state, advance
+from kepler import propagate, time_to_apoapsis
+from prediction import FutureTrajectoryCache
+from patched_conic import predict
+from rhs3d import BACKENDS, ThreeBodyRHS
+from bench_integrators import ship_energy, two_body_state
+from bench_rhs import mTerra, mLua, mNave, initial_state as initial_state_3d
+
+DT = 10.0                     # passo base do laço ao vivo (s)
+LIVE_INTEGRATOR = "verlet"    # integrador padrão de trab_fis_comp.py
+TIME_FACTORS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)   # os de trab_fis_comp.py
+WARP_FACTORS = (10, 100, 1000)   # fatores de tempo da medida de precisão com subpassos automáticos
+FRAME_BUDGET = 0.3            # segundos de relógio por fator de tempo
+PROJETO_DT = 1000.0           # passo de projeto-backup.py (s)
+MIN_TIME = 0.2                # tempo mínimo de relógio de cada medida repetida (s)
+
+# Folga absoluta das métricas de erro, por unidade (evita falsos alarmes perto de zero)
+ERROR_FLOORS = {"rel": 1e-14, "m": 1e-3}
+
+
+def _best_time(fun, repeat):
+    """
+    Menor tempo de relógio de fun() (após uma execução de aquecimento), em
+    ao menos `repeat` execuções e até somar MIN_TIME, para as medidas curtas.
+    """
+    fun()
+    best, total, count = np.inf, 0.0, 0
+    while count < repeat or total < MIN_TIME:
+        start = time.perf_counter()
+        fun()
+        elapsed = time.perf_counter() - start
+        best, total, count = min(best, elapsed), total + elapsed, count + 1
+    return best
+
+
+def translunar_state():
+    """
+    initial_state() com a nave em LEO já na transferência de Hohmann até a
+    distância da Lua, na fase em que o apogeu encontra a Lua (~4 dias depois).
+    """
+    pos, vel, masses = initial_state()
+    r1, r2 = np.linalg.norm(pos[SHIP] - pos[EARTH]), np.linalg.norm(pos[MOON] - pos[EARTH])
+    mu = G * masses[EARTH]
+    t_transfer = np.pi * np.sqrt(((r1 + r2) / 2)**3 / mu)
+    theta = np.sqrt(G * (masses[EARTH] + masses[MOON]) / r2**3) * t_transfer - np.pi
+    u = np.array([np.cos(theta), np.sin(theta)])
+    pos[SHIP] = pos[EARTH] + r1 * u
+    vel[SHIP] = vel[EARTH] + np.sqrt(mu / r1 * 2 * r2 / (r1 + r2)) * np.array([-u[1], u[0]])
+    return pos, vel, masses
+
+
+def _rel_drift(values):
+    values = np.asarray(values)
+    return float(np.max(np.abs(values / values[0] - 1)))
+
+
+# ----------------------------------------------------------------------------
+# Velocidade
+# ----------------------------------------------------------------------------
+def bench_steps(repeat, n_steps):
+    """Passos/s de advance() em LEO, um subpasso por passo de DT."""
+    out = {}
+    for integrator in INTEGRATORS:
+        pos, vel, masses = initial_state()
+        elapsed = _best_time(lambda: advance(pos, vel, masses, DT, n_steps, 1, integrator=integrator), repeat)
+        out[f"nbody.steps_per_s.{integrator}"] = (n_steps / elapsed, "passos/s", "higher")
+    return out
+
+
+def bench_time_warp():
+    """Segundos simulados por segundo de relógio com o passo do laço ao vivo (DT · fator, subpassos automáticos)."""
+    out = {}
+    for factor in TIME_FACTORS:
+        pos, vel, masses = initial_state()
+        advance(pos.copy(), vel.copy(), masses, DT * factor, 1, None, integrator=LIVE_INTEGRATOR)
+        frames, start = 0, time.perf_counter()
+        while time.perf_counter() - start < FRAME_BUDGET:
+            advance(pos, vel, masses, DT * factor, 1, None, integrator=LIVE_INTEGRATOR)
+            frames += 1
+        elapsed = time.perf_counter() - start
+        out[f"nbody.sim_rate.x{factor}"] = (frames * DT * factor / elapsed, "s simulados/s", "higher")
+    return out
+
+
+def bench_prediction(repeat):
+    """Latência da trajetória futura de 500 passos (arco novo e incremental) e da prévia por cônicas ligadas."""
+    pos, vel, masses = initial_state()
+    cache = FutureTrajectoryCache(steps=500)
+
+    def cold():
+        cache.invalidate()
+        cache.update(pos, vel, masses, DT, None, 1, LIVE_INTEGRATOR)
+
+    cold_time = _best_time(cold, repeat)
+    # Incremental: o estado atual avança um passo, como no laço ao vivo
+    cold()
+    warm_times = []
+    for _ in range(200):
+        advance(pos, vel, masses, DT, 1, None, integrator=LIVE_INTEGRATOR)
+        start = time.perf_counter()
+        cache.update(pos, vel, masses, DT, None, 1, LIVE_INTEGRATOR)
+        warm_times.append(time.perf_counter() - start)
+
+    pos, vel, masses = translunar_state()
+    conic_time = _best_time(lambda: predict(pos, vel, masses, 10 * 86400), repeat)
+    return {
+        "prediction.latency_ms.cold": (cold_time * 1e3, "ms", "lower"),
+        "prediction.latency_ms.incremental": (float(np.median(warm_times)) * 1e3, "ms", "lower"),
+        "patched_conic.latency_ms": (conic_time * 1e3, "ms", "lower"),
+    }
+
+
+def bench_tli_preview(repeat):
+    """Latência da prévia da transferência de tli.py (2000 pontos keplerianos e apogeu previsto)."""
+    pos, vel, masses = two_body_state()
+    mu = G * masses[EARTH]
+    r, v = pos[SHIP] - pos[EARTH], vel[SHIP] - vel[EARTH]
+    r2 = 384400e3
+    v_burn = v * np.sqrt(2 * r2 / (np.linalg.norm(r) + r2))
+    times = np.linspace(0, np.pi * np.sqrt(((np.linalg.norm(r) + r2) / 2)**3 / mu), 2000)
+
+    def preview():
+        propagate(r, v_burn, times, mu)
+        propagate(r, v_burn, time_to_apoapsis(r, v_burn, mu), mu)
+
+    return {"tli.preview_latency_ms": (_best_time(preview, repeat) * 1e3, "ms", "lower")}
+
+
+def bench_rhs(repeat, n_calls):
+    """Chamadas/s de ThreeBodyRHS.into() por backend e tempo da projeção de projeto-backup.py com solve_ivp."""
+    r0 = initial_state_3d()
+    out_buf = np.empty(18)
+    out = {}
+    for backend in BACKENDS:
+        if backend == "numba" and nbody.njit is None:
+            continue
+        fun = ThreeBodyRHS(mNave, mTerra, mLua, backend=backend)
+        n = n_calls if backend == "numba" else n_calls // 10   # o caminho NumPy é ~30x mais lento
+
+        def calls():
+            for _ in range(n):
+                fun.into(r0, out_buf)
+
+        out[f"rhs3d.calls_per_s.{backend}"] = (n / _best_time(calls, repeat), "chamadas/s", "higher")
+    fun = ThreeBodyRHS(mNave, mTerra, mLua)
+    horizon = 60 * PROJETO_DT   # horizonte + extensão da projeção de projeto-backup.py
+    elapsed = _best_time(lambda: solve_ivp(fun, [0, horizon], r0, method="RK45", rtol=1e-9, atol=1e-12), repeat)
+    out["rhs3d.solve_ivp_ms"] = (elapsed * 1e3, "ms", "lower")
+    return out
+
+
+# ----------------------------------------------------------------------------
+# Precisão
+# ----------------------------------------------------------------------------
+def _two_body_errors(pos, vel, masses, duration, dt, substeps, integrator, samples=100):
+    """Derivas de energia e momento angular da nave em relação à Terra e erro de posição contra Kepler."""
+    mu = G * (masses[EARTH] + masses[SHIP])
+    r0, v0 = pos[SHIP] - pos[EARTH], vel[SHIP] - vel[EARTH]
+    n_steps = int(round(duration / dt))
+    chunk = max(1, n_steps // samples)
+    energy, angmom = [ship_energy(pos, vel, masses)], [r0[0] * v0[1] - r0[1] * v0[0]]
+    done = 0
+    while done < n_steps:
+        n = min(chunk, n_steps - done)
+        advance(pos, vel, masses, dt, n, substeps, integrator=integrator)
+        done += n
+        r, v = pos[SHIP] - pos[EARTH], vel[SHIP] - vel[EARTH]
+        energy.append(ship_energy(pos, vel, masses))
+        angmom.append(r[0] * v[1] - r[1] * v[0])
+    r_ref, _ = propagate(r0, v0, n_steps * dt, mu)
+    error = float(np.linalg.norm(pos[SHIP] - pos[EARTH] - r_ref))
+    return _rel_drift(energy), _rel_drift(angmom), error
+
+
+def accuracy_leo(days):
+    """Órbita LEO de initial_state() (Lua sem massa), passos fixos de DT com cada integrador."""
+    out = {}
+    for integrator in INTEGRATORS:
+        pos, vel, masses = two_body_state()
+        e, h, err = _two_body_errors(pos, vel, masses, days * 86400, DT, 1, integrator)
+        out[f"leo.{integrator}.energy_drift"] = (e, "rel", "lower")
+        out[f"leo.{integrator}.angmom_drift"] = (h, "rel", "lower")
+        out[f"leo.{integrator}.position_error_m"] = (err, "m", "lower")
+    return out
+
+
+def accuracy_hohmann():
+    """
+    Transferência de Hohmann de tli.py (LEO de 7000 km até 384400 km): queima
+    tangencial e costa até o apogeu, com o passo do laço ao vivo e subpassos
+    automáticos.
+    """
+    out = {}
+    for integrator in INTEGRATORS:
+        pos, vel, masses = two_body_state()
+        r1, r2 = np.linalg.norm(pos[SHIP]), 384400e3
+        vel[SHIP] *= np.sqrt(2 * r2 / (r1 + r2))
+        t_transfer = np.pi * np.sqrt(((r1 + r2) / 2)**3 / (G * masses[EARTH]))
+        e, h, err = _two_body_errors(pos, vel, masses, DT * round(t_transfer / DT), DT, None, integrator)
+        out[f"hohmann.{integrator}.energy_drift"] = (e, "rel", "lower")
+        out[f"hohmann.{integrator}.angmom_drift"] = (h, "rel", "lower")
+        out[f"hohmann.{integrator}.position_error_m"] = (err, "m", "lower")
+    return out
+
+
+def accuracy_warp(days):
+    """
+    Órbita excêntrica (LEO com 1,2 vez a velocidade circular, Lua sem massa)
+    com o passo de cada fator de WARP_FACTORS, subpassos automáticos e o
+    integrador do laço ao vivo.
+    """
+    out = {}
+    for factor in WARP_FACTORS:
+        pos, vel, masses = two_body_state()
+        vel[SHIP] *= 1.2
+        e, h, err = _two_body_errors(pos, vel, masses, days * 86400, DT * factor, None, LIVE_INTEGRATOR)
+        out[f"warp.x{factor}.energy_drift"] = (e, "rel", "lower")
+        out[f"warp.x{factor}.angmom_drift"] = (h, "rel", "lower")
+        out[f"warp.x{factor}.position_error_m"] = (err, "m", "lower")
+    return out
+
+
+def _energy_3d(y):
+    m = np.array([mNave, mTerra, mLua])
+    r, v = y[:9].reshape(3, 3, -1), y[9:].reshape(3, 3, -1)
+    kinetic = 0.5 * np.sum(m[:, None] * np.sum(v**2, axis=1), axis=0)
+    potential = 0.0
+    for i, j in ((0, 1), (0, 2), (1, 2)):
+        potential = potential - G * m[i] * m[j] / np.linalg.norm(r[i] - r[j], axis=0)
+    return kinetic + potential
+
+
+def accuracy_projeto(days):
+    """Órbita de projeto-backup.py sem thrust: RK45 (rtol=1e-9) contra DOP853 (rtol=1e-13)."""
+    fun = ThreeBodyRHS(mNave, mTerra, mLua)
+    r0 = initial_state_3d()
+    t_eval = np.linspace(0, days * 86400, 200)
+    sol = solve_ivp(fun, [0, t_eval[-1]], r0, method="RK45", rtol=1e-9, atol=1e-12, t_eval=t_eval)
+    ref = solve_ivp(fun, [0, t_eval[-1]], r0, method="DOP853", rtol=1e-13, atol=1e-9, t_eval=t_eval)
+    error = float(np.max(np.linalg.norm(sol.y[:3] - ref.y[:3], axis=0)))
+    return {
+        "projeto.rk45.energy_drift": (_rel_drift(_energy_3d(sol.y)), "rel", "lower"),
+        "projeto.rk45.position_error_m": (error, "m", "lower"),
+    }
+
+
+# ----------------------------------------------------------------------------
+# Resultados e comparação
+# ----------------------------------------------------------------------------
+def run_suite(quick=False, runs=1):
+    """
+    Roda tudo `runs` vezes, uma de cada vez e cada uma num processo novo (a
+    velocidade do código compilado varia de um processo para outro), e fica
+    com a mediana de cada métrica. Devolve {"meta": ..., "metrics": {nome:
+    {"value", "unit", "better"}}}.
+    """
+    repeat = 1 if quick else 3
+    if runs == 1:
+        parts = [_run_once(quick, repeat)]
+    else:
+        with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+            parts = list(pool.map(_run_once, [quick] * runs, [repeat] * runs))
+    metrics = {key: dict(m, value=float(np.median([p[key]["value"] for p in parts])))
+               for key, m in parts[0].items()}
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "numba": nbody.njit is not None,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "quick": quick,
+        "runs": runs,
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    return {"meta": meta, "metrics": metrics}
+
+
+def _run_once(quick, repeat):
+    print(f"Execução no processo {os.getpid()}", file=sys.stderr)
+    metrics = {}
+    for name, part in (
+        ("passos/s", lambda: bench_steps(repeat, 20000 if quick else 200000)),
+        ("fatores de tempo", bench_time_warp),
+        ("previsão", lambda: bench_prediction(repeat)),
+        ("prévia de tli.py", lambda: bench_tli_preview(repeat)),
+        ("lado direito 3D", lambda: bench_rhs(repeat, 20000 if quick else 200000)),
+        ("precisão LEO", lambda: accuracy_leo(1.0)),
+        ("precisão Hohmann", accuracy_hohmann),
+        ("precisão nos fatores de tempo", lambda: accuracy_warp(2.0)),
+        ("precisão projeto-backup", lambda: accuracy_projeto(2.0 if quick else 10.0)),
+    ):
+        start = time.perf_counter()
+        metrics.update({key: {"value": float(value), "unit": unit, "better": better}
+                        for key, (value, unit, better) in part().items()})
+        print(f"  {name:<24} {time.perf_counter() - start:6.1f} s", file=sys.stderr)
+    return metrics
+
+
+def compare(results, baseline, speed_tol=0.3, error_factor=2.0):
+    """
+    Compara com a referência. Devolve (linhas de texto, regressões). Métricas
+    "higher" regridem abaixo de (1 - speed_tol) · referência; "lower" em ms
+    acima de (1 + speed_tol) · referência e as de erro acima de
+    error_factor · referência + ERROR_FLOORS[unidade].
+    """
+    lines, regressions = [], []
+    for key, m in results["metrics"].items():
+        base = baseline["metrics"].get(key)
+        if base is None:
+            lines.append(f"{key:<40} {m['value']:12.4g}   (nova)")
+            continue
+        value, ref = m["value"], base["value"]
+        if m["better"] == "higher":
+            bad = value < (1 - speed_tol) * ref
+        elif m["unit"] in ERROR_FLOORS:
+            bad = value > error_factor * ref + ERROR_FLOORS[m["unit"]]
+        else:
+            bad = value > (1 + speed_tol) * ref
+        ratio = value / ref if ref else np.inf
+        lines.append(f"{key:<40} {value:12.4g} {ref:12.4g} {ratio:8.2f}x{'   REGRESSÃO' if bad else ''}")
+        if bad:
+            regressions.append(key)
+    for key in baseline["metrics"]:
+        if key not in results["metrics"]:
+            lines.append(f"{key:<40} {'':12} {baseline['metrics'][key]['value']:12.4g}   (ausente)")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default="bench_results.json", help="resultados em JSON")
+    parser.add_argument("--baseline", help="JSON de referência para comparar (regressão: código de saída 1)")
+    parser.add_argument("--save-baseline", metavar="ARQUIVO", help="grava os resultados também como referência")
+    parser.add_argument("--quick", action="store_true", help="menos repetições e integrações mais curtas")
+    parser.add_argument("--runs", type=int, default=3, help="execuções da suíte, em processos separados (fica a mediana de cada métrica)")
+    parser.add_argument("--speed-tol", type=float, default=0.3, help="queda de velocidade tolerada (fração)")
+    parser.add_argument("--error-factor", type=float, default=2.0, help="aumento de erro tolerado (fator)")
+    args = parser.parse_args()
+
+    results = run_suite(args.quick, args.runs)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, ensure_ascii=False, indent=1)
+
+    if not args.baseline:
+        for key, m in results["metrics"].items():
+            print(f"{key:<40} {m['value']:12.4g} {m['unit']}")
+        return
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    if baseline["meta"].get("platform") != results["meta"]["platform"]:
+        print("Aviso: referência gravada em outra máquina; compare as velocidades com cautela", file=sys.stderr)
+    if baseline["meta"].get("quick") != results["meta"]["quick"]:
+        print("Aviso: referência e resultados com --quick diferentes; as medidas não são comparáveis",
+              file=sys.stderr)
+    print(f"{'métrica':<40} {'atual':>12} {'referência':>12} {'razão':>9}")
+    lines, regressions = compare(results, baseline, args.speed_tol, args.error_factor)
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"{len(regressions)} regressões: {', '.join(regressions)}")
+        sys.exit(1)
+    print("Nenhuma regressão.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Otimizador automático de queimas por tiro (shooting).
+
+Procura uma sequência de queimas (início, duração e modo) que leve a nave do
+estado inicial a um alvo com o menor Δv: uma órbita circular de raio dado
+em torno da Terra (duas queimas) ou uma altitude de periapsis lunar (uma
+queima de injeção). Cada candidato é voado como roteiro de impulso com
+headless.run_headless, com o passo do laço ao vivo em 1x (os eventos dividem o
+passo no instante exato, como no laço). O custo é o Δv mais uma penalidade
+proporcional ao erro no alvo.
+A evolução diferencial do SciPy avalia cada geração em paralelo num pool de
+processos e o melhor candidato é refinado com Nelder-Mead.
+
+A costa antes da primeira queima é comum a todos os candidatos: é integrada
+uma vez e guardada em intervalos de CACHE_DT. Cada candidato parte do estado
+guardado mais próximo. Resultados já avaliados ficam em memória.
+
+O resultado é gravado como roteiro de impulso (formato de headless.py) e
+pode ser carregado no laço ao vivo: python trab_fis_comp.py plano.json
+
+Uso:
+    python burn_optimizer.py --target circular --radius 42164e3 --output plano.json
+    python burn_optimizer.py --target periapsis --altitude 100e3 --output plano.json
+"""
+import argparse
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import differential_evolution, minimize
+
+from nbody import G, EARTH, MOON, SHIP, R_EARTH, R_MOON, MOON_SOI, INTEGRATORS, initial_state, advance
+from kepler import apsides
+from headless import run_headless, load_state, save_schedule
+
+DT_STEP = 10.0       # passo (s): o dt do laço ao vivo em 1x, com subpassos automáticos
+CACHE_DT = 60.0      # espaçamento dos estados guardados da costa inicial (múltiplo de DT_STEP)
+SAMPLE_EVERY = 30    # passos entre amostras na busca da menor distância à Lua
+CHUNK = 3600.0       # trecho de costa integrado de cada vez nessa busca (s)
+MISS_WEIGHT = 1e-3   # penalidade do erro no alvo (m/s de custo por metro de erro)
+
+
+class ShootingProblem:
+    """
+    Função custo de um alvo: recebe o vetor de parâmetros x = [t1, d1,
+    espera2, d2, ...] (início da primeira queima, sua duração, costa até a
+    próxima queima, duração, ...; tudo em s) e devolve Δv + penalidade.
+    """
+
+    def __init__(self, pos, vel, masses, target, value, thrust_const=1.0, horizon=8 * 86400,
+                 t_first_max=None, integrator="verlet"):
+        self.pos, self.vel, self.masses = pos, vel, masses
+        self.target = target
+        self.value = value
+        self.thrust_const = thrust_const
+        self.horizon = horizon
+        self.integrator = integrator
+        r = pos[SHIP] - pos[EARTH]
+        mu = G * masses[EARTH]
+        r0 = math.hypot(*r)
+        period = 2 * math.pi * math.sqrt(r0**3 / mu)
+        self.t_first_max = period if t_first_max is None else t_first_max
+
+        if target == "circular":
+            # Limites a partir da transferência de Hohmann impulsiva
+            dv1 = abs(math.sqrt(mu / r0) * (math.sqrt(2 * value / (r0 + value)) - 1))
+            dv2 = abs(math.sqrt(mu / value) * (1 - math.sqrt(2 * r0 / (r0 + value))))
+            t_h = math.pi * math.sqrt(((r0 + value) / 2)**3 / mu)
+            mode = "Progressiva" if value > r0 else "Retrógrado"
+            self.modes = [mode, mode]
+            self.bounds = [(0, self.t_first_max), (0, 1.5 * dv1 / thrust_const),
+                           (0, 1.5 * t_h), (0, 1.5 * dv2 / thrust_const)]
+        elif target == "periapsis":
+            self.modes = ["Progressiva"]
+            self.bounds = [(0, self.t_first_max), (2800 / thrust_const, 4000 / thrust_const)]
+        else:
+            raise ValueError(f"alvo desconhecido: {target!r}")
+
+        # Costa inicial, comum a todos os candidatos
+        n_cache = int(self.t_first_max // CACHE_DT) + 1
+        self.coast_pos = np.empty((n_cache,) + pos.shape)
+        self.coast_vel = np.empty((n_cache,) + vel.shape)
+        p, v = pos.copy(), vel.copy()
+        for k in range(n_cache):
+            self.coast_pos[k], self.coast_vel[k] = p, v
+            advance(p, v, masses, DT_STEP, round(CACHE_DT / DT_STEP), None, integrator=integrator)
+        self._memo = {}
+
+    def burns(self, x):
+        """Lista de queimas (início, duração, modo) de um vetor de parâmetros."""
+        burns = []
+        t = 0.0
+        for k, mode in enumerate(self.modes):
+            wait, duration = x[2*k], x[2*k + 1]
+            start = wait if k == 0 else t + wait
+            burns.append((start, duration, mode))
+            t = start + duration
+        return burns
+
+    def schedule(self, x):
+        """Roteiro de impulso (t, modo, ligado), no formato de headless.load_schedule()."""
+        events = []
+        for start, duration, mode in self.burns(x):
+            if duration > 0:
+                events += [(float(start), mode, True), (float(start + duration), mode, False)]
+        return events
+
+    def _run(self, pos, vel, duration, events=(), sample_every=None):
+        # Voa `duration` segundos com o roteiro `events` (tempos relativos ao início)
+        n_steps = round(duration / DT_STEP)
+        return run_headless(pos, vel, self.masses, DT_STEP, n_steps * DT_STEP, events, None,
+                            sample_every or max(n_steps, 1), self.thrust_const, self.integrator)
+
+    def fly(self, x):
+        """Voa o candidato até o fim da última queima; devolve (Δv total em m/s, erro no alvo em m)."""
+        events = self.schedule(x)
+        burns = self.burns(x)
+        dv = self.thrust_const * sum(duration for _, duration, _ in burns)
+        k = min(int(burns[0][0] // CACHE_DT), len(self.coast_pos) - 1)
+        pos, vel = self.coast_pos[k], self.coast_vel[k]
+        if events:
+            # Parte da costa guardada e segue em passos alinhados com os do laço ao vivo
+            t0 = k * CACHE_DT
+            t_end = math.ceil(events[-1][0] / DT_STEP) * DT_STEP
+            samples = self._run(pos, vel, t_end - t0, [(t - t0, mode, on) for t, mode, on in events])
+            pos, vel = samples["pos"][-1], samples["vel"][-1]
+        return dv, self._miss(pos, vel)
+
+    def _miss(self, pos, vel):
+        if self.target == "circular":
+            rp, ra = apsides(pos[SHIP] - pos[EARTH], vel[SHIP] - vel[EARTH], G * self.masses[EARTH])
+            return abs(rp - self.value) + min(abs(ra - self.value), 10 * self.value)
+        # Periapsis lunar: menor distância à Lua ao longo da costa final, amostrada por trechos
+        closest = math.inf
+        h = SAMPLE_EVERY * DT_STEP
+        for _ in range(math.ceil(self.horizon / CHUNK)):
+            samples = self._run(pos, vel, CHUNK, sample_every=SAMPLE_EVERY)
+            p, v = samples["pos"][1:], samples["vel"][1:]
+            rel = p[:, SHIP] - p[:, MOON]
+            w = v[:, SHIP] - v[:, MOON]
+            # Mínimo entre amostras: movimento relativo retilíneo desde a amostra anterior
+            rw = np.einsum('ij,ij->i', rel, w)
+            s = np.clip(-rw / np.maximum(np.einsum('ij,ij->i', w, w), 1e-300), -h, 0.0)
+            d = np.hypot(rel[:, 0] + w[:, 0] * s, rel[:, 1] + w[:, 1] * s)
+            # Fora da SOI e se afastando da Lua, já caindo para a Terra ou além da
+            # órbita lunar: não volta mais a ela. Impactos também encerram (e evitam
+            # integrar a passagem pelo centro do corpo pontual).
+            r_e = p[:, SHIP] - p[:, EARTH]
+            v_e = v[:, SHIP] - v[:, EARTH]
+            r_m = p[:, MOON] - p[:, EARTH]
+            beyond = np.einsum('ij,ij->i', r_e, r_e) > (np.sqrt(np.einsum('ij,ij->i', r_m, r_m)) + MOON_SOI)**2
+            falling = np.einsum('ij,ij->i', r_e, v_e) < 0
+            impact = (d < R_MOON) | (np.einsum('ij,ij->i', r_e, r_e) < R_EARTH**2)
+            done = (falling | beyond) & (rw > 0) & (d > MOON_SOI) | impact
+            stop = np.argmax(done) if done.any() else len(d) - 1
+            closest = min(closest, d[:stop + 1].min())
+            if done.any():
+                break
+            pos, vel = p[-1], v[-1]
+        return abs(closest - (R_MOON + self.value))
+
+    def __call__(self, x):
+        key = tuple(np.round(x, 6))
+        if key not in self._memo:
+            x = np.clip(x, [lo for lo, _ in self.bounds], [hi for _, hi in self.bounds])
+            dv, miss = self.fly(x)
+            self._memo[key] = dv + MISS_WEIGHT * miss
+        return self._memo[key]
+
+
+# Problema instalado em cada processo do pool (a costa inicial é integrada uma vez por processo)
+_problem = None
+
+
+def _init_worker(args, kwargs):
+    global _problem
+    _problem = ShootingProblem(*args, **kwargs)
+
+
+def _evaluate(x):
+    return _problem(x)
+
+
+def optimize(pos, vel, masses, target, value, workers=None, seed=0, maxiter=30, popsize=10, **kwargs):
+    """Devolve (problema, melhor vetor de parâmetros) para o alvo pedido."""
+    problem = ShootingProblem(pos, vel, masses, target, value, **kwargs)
+    init = ((pos, vel, masses, target, value), kwargs)
+    if workers == 1:
+        _init_worker(*init)
+        result = differential_evolution(problem, problem.bounds, seed=seed, maxiter=maxiter,
+                                        popsize=popsize, polish=False, updating="deferred")
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init) as pool:
+            result = differential_evolution(problem, problem.bounds, seed=seed, maxiter=maxiter,
+                                            popsize=popsize, polish=False, updating="deferred",
+                                            workers=lambda func, xs: list(pool.map(_evaluate, xs)))
+    # Refinamento local do melhor candidato
+    local = minimize(problem, result.x, method="Nelder-Mead", bounds=problem.bounds,
+                     options={"xatol": 1e-2, "fatol": 1e-3, "maxiter": 400})
+    best = local.x if local.fun < result.fun else result.x
+    return problem, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=("circular", "periapsis"), default="circular")
+    parser.add_argument("--radius", type=float, default=42164e3, help="raio da órbita circular alvo (m)")
+    parser.add_argument("--altitude", type=float, default=100e3, help="altitude do periapsis lunar (m)")
+    parser.add_argument("--thrust", type=float, default=1.0, help="aceleração do impulso (m/s²)")
+    parser.add_argument("--integrator", choices=list(INTEGRATORS), default="verlet",
+                        help="o mesmo do laço ao vivo")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--maxiter", type=int, default=30, help="gerações da evolução diferencial")
+    parser.add_argument("--popsize", type=int, default=10)
+    parser.add_argument("--state", help="estado inicial (.npz); padrão: LEO de 7000 km")
+    parser.add_argument("--output", default="plano.json", help="roteiro de impulso (.json)")
+    args = parser.parse_args()
+
+    pos, vel, masses = load_state(args.state) if args.state else initial_state()
+    value = args.radius if args.target == "circular" else args.altitude
+
+    start = time.perf_counter()
+    problem, best = optimize(pos, vel, masses, args.target, value, args.workers, args.seed,
+                             args.maxiter, args.popsize, thrust_const=args.thrust,
+                             integrator=args.integrator)
+    elapsed = time.perf_counter() - start
+    dv, miss = problem.fly(best)
+    for start_t, duration, mode in problem.burns(best):
+        print(f"  {mode:<12} em t = {start_t:9.1f} s por {duration:7.1f} s")
+    print(f"Δv total {dv:.1f} m/s, erro no alvo {miss / 1e3:.2f} km ({elapsed:.1f} s)")
+    save_schedule(args.output, problem.schedule(best))
+    print("Roteiro gravado em", args.output)
+
+
+if __name__ == "__main__":
+    main()
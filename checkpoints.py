@@ -0,0 +1,167 @@
+"""
+Checkpoints por quadros-chave com rebobinamento determinístico.
+
+A cada `interval` quadros o estado completo (posições, velocidades e
+controles: impulso, modo, integrador, fator de tempo e posição no roteiro) é
+guardado como quadro-chave. Entre quadros-chave fica só o registro das
+chamadas a nbody.advance() de cada quadro (passo, modo de impulso e
+integrador) e dos controles no fim do quadro. rewind(t) restaura o último
+quadro-chave antes de t e repete as chamadas registradas até o último quadro
+que termina em t ou antes: como as chamadas são as mesmas, o resultado é
+idêntico bit a bit ao da execução original, e o custo é de no máximo
+`interval` quadros, independente da duração da missão. A memória é limitada
+a `capacity` quadros-chave (os mais antigos são descartados).
+"""
+import bisect
+import zipfile
+from collections import deque, namedtuple
+
+import numpy as np
+
+from nbody import THRUST_MODES, INTEGRATORS, advance
+
+Controls = namedtuple("Controls", "thrust_on thrust_mode integrator time_factor_index schedule_index")
+
+_INTEGRATOR_NAMES = list(INTEGRATORS)
+
+
+def _encode_controls(c):
+    return (int(c.thrust_on), THRUST_MODES.index(c.thrust_mode), _INTEGRATOR_NAMES.index(c.integrator),
+            c.time_factor_index, c.schedule_index)
+
+
+def _decode_controls(row):
+    return Controls(bool(row[0]), THRUST_MODES[row[1]], _INTEGRATOR_NAMES[row[2]], int(row[3]), int(row[4]))
+
+
+class _Segment:
+    # Quadro-chave e os quadros integrados a partir dele
+    def __init__(self, t, pos, vel, controls):
+        self.t = t
+        self.pos = pos.copy()
+        self.vel = vel.copy()
+        self.controls = controls
+        self.frames = []   # (chamadas [(dt, modo ou None, integrador)], t no fim, controles no fim)
+
+
+class KeyframeStore:
+    def __init__(self, masses, thrust_const=1.0, substeps=None, interval=60, capacity=1000):
+        self.masses = np.array(masses, dtype=float)
+        self.thrust_const = thrust_const
+        self.substeps = substeps
+        self.interval = interval
+        self._segments = deque(maxlen=capacity)
+        self._calls = None   # chamadas do quadro em andamento
+
+    def __len__(self):
+        return len(self._segments)
+
+    @property
+    def start_time(self):
+        return self._segments[0].t if self._segments else None
+
+    @property
+    def end_time(self):
+        if not self._segments:
+            return None
+        last = self._segments[-1]
+        return last.frames[-1][1] if last.frames else last.t
+
+    def begin_frame(self, t, pos, vel, controls):
+        """Início de um quadro; guarda um quadro-chave a cada `interval` quadros."""
+        if not self._segments or len(self._segments[-1].frames) >= self.interval:
+            self._segments.append(_Segment(t, pos, vel, controls))
+        self._calls = []
+
+    def advance(self, pos, vel, dt, thrust_mode, integrator, trace=None):
+        """
+        nbody.advance() de um passo de dt (s), registrado no quadro em andamento.
+        O `trace` só amostra o passo: não entra no registro.
+        """
+        advance(pos, vel, self.masses, dt, 1, self.substeps, thrust_mode, self.thrust_const, integrator=integrator,
+                trace=trace)
+        self._calls.append((dt, thrust_mode, integrator))
+
+    def end_frame(self, t, controls):
+        self._segments[-1].frames.append((self._calls, t, controls))
+        self._calls = None
+
+    def rewind(self, t):
+        """
+        Volta ao fim do último quadro registrado com tempo <= t (ou ao quadro-chave
+        mais antigo). Descarta o que vem depois e devolve (t, pos, vel, controles).
+        """
+        if not self._segments:
+            raise ValueError("nenhum quadro-chave registrado")
+        times = [segment.t for segment in self._segments]
+        k = max(bisect.bisect_right(times, t) - 1, 0)
+        while len(self._segments) > k + 1:
+            self._segments.pop()
+        segment = self._segments[-1]
+        pos, vel = segment.pos.copy(), segment.vel.copy()
+        t_now, controls = segment.t, segment.controls
+        kept = 0
+        for calls, t_end, frame_controls in segment.frames:
+            if t_end > t:
+                break
+            for dt, thrust_mode, integrator in calls:
+                advance(pos, vel, self.masses, dt, 1, self.substeps, thrust_mode, self.thrust_const,
+                        integrator=integrator)
+            t_now, controls = t_end, frame_controls
+            kept += 1
+        del segment.frames[kept:]
+        return t_now, pos, vel, controls
+
+    def save(self, path):
+        """Grava quadros-chave e registro de chamadas num .npz compacto."""
+        segments = list(self._segments)
+        frames = [(i, frame) for i, s in enumerate(segments) for frame in s.frames]
+        calls = [(j, call) for j, (_, frame) in enumerate(frames) for call in frame[0]]
+        np.savez_compressed(
+            path,
+            masses=self.masses, thrust_const=self.thrust_const,
+            substeps=-1 if self.substeps is None else self.substeps, interval=self.interval,
+            capacity=self._segments.maxlen,
+            key_t=np.array([s.t for s in segments]),
+            key_pos=np.array([s.pos for s in segments]),
+            key_vel=np.array([s.vel for s in segments]),
+            key_controls=np.array([_encode_controls(s.controls) for s in segments], dtype=np.int64).reshape(-1, 5),
+            frame_segment=np.array([i for i, _ in frames], dtype=np.int64),
+            frame_t=np.array([f[1] for _, f in frames]),
+            frame_controls=np.array([_encode_controls(f[2]) for _, f in frames], dtype=np.int64).reshape(-1, 5),
+            call_frame=np.array([j for j, _ in calls], dtype=np.int64),
+            call_dt=np.array([c[0] for _, c in calls]),
+            call_mode=np.array([-1 if c[1] is None else THRUST_MODES.index(c[1]) for _, c in calls], dtype=np.int64),
+            call_integrator=np.array([_INTEGRATOR_NAMES.index(c[2]) for _, c in calls], dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Lê um arquivo de save(); ValueError se ele não é válido ou não tem quadros-chave."""
+        try:
+            data = dict(np.load(path))
+        except (zipfile.BadZipFile, EOFError, ValueError) as exc:
+            raise ValueError(f"{path}: não é um arquivo de checkpoints") from exc
+        if "key_t" not in data:
+            raise ValueError(f"{path}: não é um arquivo de checkpoints")
+        if not len(data["key_t"]):
+            raise ValueError(f"{path}: nenhum quadro-chave gravado")
+        try:
+            substeps = int(data["substeps"])
+            store = cls(data["masses"], float(data["thrust_const"]), None if substeps < 0 else substeps,
+                        int(data["interval"]), int(data["capacity"]))
+            for t, pos, vel, row in zip(data["key_t"], data["key_pos"], data["key_vel"], data["key_controls"]):
+                store._segments.append(_Segment(float(t), pos, vel, _decode_controls(row)))
+            frames = []
+            for i, t, row in zip(data["frame_segment"], data["frame_t"], data["frame_controls"]):
+                frame = ([], float(t), _decode_controls(row))
+                store._segments[i].frames.append(frame)
+                frames.append(frame)
+            for j, dt, mode, integrator in zip(data["call_frame"], data["call_dt"], data["call_mode"],
+                                               data["call_integrator"]):
+                frames[j][0].append((float(dt), None if mode < 0 else THRUST_MODES[mode],
+                                     _INTEGRATOR_NAMES[integrator]))
+        except (KeyError, IndexError) as exc:
+            # Arrays ausentes ou índices fora do lugar: arquivo incompleto ou de outro programa
+            raise ValueError(f"{path}: não é um arquivo de checkpoints") from exc
+        return store
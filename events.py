@@ -0,0 +1,121 @@
+"""
+Detecção de eventos orbitais em trajetórias amostradas.
+
+Recebe estados completos amostrados (tempos, posições e velocidades de todos os
+corpos), como os do laço ao vivo, da trajetória prevista ou de headless.py.
+Encontra mudanças de sinal das funções de evento entre amostras de forma
+vetorizada. Cada raiz é refinada por bisseção sobre o interpolante cúbico de
+Hermite (posição e velocidade nas duas pontas do intervalo). Eventos:
+periastro e apoastro em torno da Terra, entrada e saída da esfera de
+influência da Lua, impacto na Terra ou na Lua e máxima aproximação da Lua
+(só dentro da esfera de influência).
+"""
+import numpy as np
+
+from nbody import EARTH, MOON, SHIP, R_EARTH, R_MOON, MOON_SOI
+
+BISECTIONS = 40     # iterações de refinamento (intervalo / 2**40)
+
+# Nome exibido de cada tipo de evento
+EVENT_LABELS = {
+    "periapsis": "Periastro",
+    "apoapsis": "Apoastro",
+    "soi_entry": "Entrada na SOI lunar",
+    "soi_exit": "Saída da SOI lunar",
+    "impact_earth": "Impacto na Terra",
+    "impact_moon": "Impacto na Lua",
+    "closest_moon": "Máxima aproximação da Lua",
+}
+
+# (tipo, corpo de referência, função, sentido da mudança de sinal: +1 de - para +, -1 de + para -)
+_EVENTS = (
+    ("periapsis", EARTH, "radial", +1),
+    ("apoapsis", EARTH, "radial", -1),
+    ("impact_earth", EARTH, "surface", -1),
+    ("soi_entry", MOON, "soi", -1),
+    ("soi_exit", MOON, "soi", +1),
+    ("impact_moon", MOON, "surface", -1),
+    ("closest_moon", MOON, "radial", +1),
+)
+_RADII = {EARTH: R_EARTH, MOON: R_MOON}
+
+
+def _hermite_coefs(p0, v0, p1, v1, h):
+    # Coeficientes do interpolante cúbico de Hermite em s ∈ [0, 1], calculados uma vez por intervalo
+    # (formas (k, 2), h (k,)): p(s) = c0 + c1·s + c2·s² + c3·s³
+    h = h[:, None]
+    dp = p1 - p0
+    return p0, h * v0, 3*dp - h * (2*v0 + v1), h * (v0 + v1) - 2*dp, h
+
+
+def _hermite(coefs, s):
+    # Posição e velocidade do interpolante em s (k,)
+    c0, c1, c2, c3, h = coefs
+    s = s[:, None]
+    p = c0 + s * (c1 + s * (c2 + s * c3))
+    v = (c1 + s * (2*c2 + s * 3*c3)) / h
+    return p, v
+
+
+def _g(kind, r, v, body):
+    # Função de evento sobre posições e velocidades relativas (..., 2)
+    if kind == "radial":
+        return np.einsum('...i,...i->...', r, v)
+    dist = np.sqrt(np.einsum('...i,...i->...', r, r))
+    return dist - (MOON_SOI if kind == "soi" else _RADII[body])
+
+
+def detect_events(t, pos, vel, body=SHIP):
+    """
+    Eventos de `body` ao longo das amostras, em ordem de tempo.
+
+    t (n,), pos e vel (n, N, 2). Devolve uma lista de (tipo, tempo, posição
+    (2,) do corpo no evento, distância ao corpo de referência em m).
+    """
+    t = np.asarray(t, dtype=float)
+    if len(t) < 2:
+        return []
+    found = []
+    for ref in (EARTH, MOON):
+        r = pos[:, body] - pos[:, ref]
+        v = vel[:, body] - vel[:, ref]
+        for func in dict.fromkeys(f for _, ref_kind, f, _ in _EVENTS if ref_kind == ref):
+            g = _g(func, r, v, ref)
+            # Mudanças de sinal de todos os eventos com esta função, refinadas numa bisseção só
+            kinds, idx, directions = [], [], []
+            for kind, ref_kind, f, direction in _EVENTS:
+                if ref_kind != ref or f != func:
+                    continue
+                if direction > 0:
+                    crossing = np.flatnonzero((g[:-1] < 0) & (g[1:] >= 0))
+                else:
+                    crossing = np.flatnonzero((g[:-1] > 0) & (g[1:] <= 0))
+                kinds += [kind] * crossing.size
+                idx.append(crossing)
+                directions.append(np.full(crossing.size, direction))
+            idx = np.concatenate(idx)
+            if idx.size == 0:
+                continue
+            directions = np.concatenate(directions)
+            h = t[idx + 1] - t[idx]
+            coefs = _hermite_coefs(r[idx], v[idx], r[idx + 1], v[idx + 1], h)
+            lo = np.zeros(idx.size)
+            hi = np.ones(idx.size)
+            for _ in range(BISECTIONS):
+                mid = 0.5 * (lo + hi)
+                rm, vm = _hermite(coefs, mid)
+                below = np.sign(_g(func, rm, vm, ref)) == -directions
+                lo = np.where(below, mid, lo)
+                hi = np.where(below, hi, mid)
+            s = 0.5 * (lo + hi)
+            rm, _ = _hermite(coefs, s)
+            p_abs, _ = _hermite(_hermite_coefs(pos[idx, body], vel[idx, body], pos[idx + 1, body],
+                                               vel[idx + 1, body], h), s)
+            dist = np.sqrt(np.einsum('ij,ij->i', rm, rm))
+            for k, kind in enumerate(kinds):
+                # Mínimos de distância à Lua fora da esfera de influência são só a órbita terrestre
+                if kind == "closest_moon" and dist[k] > MOON_SOI:
+                    continue
+                found.append((kind, t[idx[k]] + s[k] * h[k], p_abs[k], dist[k]))
+    found.sort(key=lambda e: e[1])
+    return found
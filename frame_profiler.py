@@ -0,0 +1,105 @@
+"""
+Cronômetros por seção do laço de quadros do pygame.
+
+O laço chama start_frame() no início de cada quadro e mark(seção) ao fim de
+cada trecho; o tempo desde a marca anterior é somado à seção (uma seção pode
+aparecer em vários trechos do mesmo quadro). Os últimos `window` quadros ficam
+num buffer circular para médias e p99, e cada quadro pode ser gravado numa
+linha de CSV. Desligado, start_frame() e mark() só testam um atributo.
+"""
+import csv
+import time
+
+import numpy as np
+
+
+class FrameProfiler:
+    def __init__(self, sections, window=240):
+        self.sections = tuple(sections)
+        self.window = window
+        self._index = {name: i for i, name in enumerate(self.sections)}
+        self._ring = np.zeros((window, len(self.sections) + 1))   # seções e total (s)
+        self._row = np.zeros(len(self.sections) + 1)
+        self.frames = 0            # quadros medidos
+        self.show = False          # sobreposição na tela
+        self._file = None
+        self._writer = None
+        self._frame_start = None   # None: desligado ou quadro ainda não iniciado
+        self._last = 0.0
+
+    @property
+    def enabled(self):
+        return self.show or self._file is not None
+
+    @property
+    def recording(self):
+        return self._file is not None
+
+    def _refresh(self):
+        # Ao ligar ou desligar, a medição recomeça no próximo start_frame()
+        self._frame_start = None
+        self._row[:] = 0.0
+
+    def toggle_overlay(self):
+        self.show = not self.show
+        self._refresh()
+
+    def start_csv(self, path):
+        """Grava uma linha por quadro em `path`: número do quadro, ms de cada seção e total."""
+        self.stop_csv()
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["frame"] + [f"{name}_ms" for name in self.sections] + ["total_ms"])
+        self._refresh()
+
+    def stop_csv(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = self._writer = None
+        self._refresh()
+
+    def start_frame(self):
+        """Fecha o quadro anterior (total = intervalo entre inícios) e começa um novo."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._row[-1] = now - self._frame_start
+            self._ring[self.frames % self.window] = self._row
+            self.frames += 1
+            if self._writer is not None:
+                self._writer.writerow([self.frames] + [f"{x * 1e3:.4f}" for x in self._row])
+            self._row[:] = 0.0
+        self._frame_start = self._last = now
+
+    def mark(self, section):
+        """Soma à `section` o tempo desde a marca anterior (ou o início do quadro)."""
+        if self._frame_start is None:
+            return
+        now = time.perf_counter()
+        self._row[self._index[section]] += now - self._last
+        self._last = now
+
+    def stats(self):
+        """(médias, p99) em ms por seção e total, sobre os últimos quadros medidos; None se não há nenhum."""
+        n = min(self.frames, self.window)
+        if n == 0:
+            return None
+        recent = self._ring[:n] * 1e3
+        return recent.mean(axis=0), np.percentile(recent, 99, axis=0)
+
+    def summary_lines(self):
+        """Linhas de texto com média e p99 de cada seção, para a sobreposição na tela."""
+        stats = self.stats()
+        if stats is None:
+            return ["Perfil: medindo..."]
+        mean, p99 = stats
+        lines = [f"{'seção':<12} {'média':>7} {'p99':>7}"]
+        for name, m, p in zip(self.sections + ("total",), mean, p99):
+            lines.append(f"{name:<12} {m:6.2f}ms {p:6.2f}ms")
+        if self.recording:
+            lines.append("Gravando CSV")
+        return lines
+
+    def close(self):
+        self.stop_csv()
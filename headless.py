@@ -0,0 +1,175 @@
+"""
+Simulação sem janela (headless) do sistema Terra, Lua e Nave.
+
+Usa a mesma física do laço interativo (nbody.advance) sem pygame e sem o
+limite de 60 quadros por segundo. O impulso segue um roteiro de eventos
+(tempo, modo, ligado/desligado) e os estados amostrados são gravados em
+disco (.npz, ou .csv com as posições).
+
+Uso:
+    python headless.py --duration 864000 --dt 10 --schedule plano.json --output saida.npz
+
+Formato do roteiro (JSON): lista de eventos, como objetos ou listas
+    [{"t": 3600, "mode": "Progressiva", "on": true}, [3900, "Progressiva", false]]
+ou CSV com linhas "t,modo,on" (on = 1/0).
+"""
+import argparse
+import csv
+import json
+import math
+import time
+
+import numpy as np
+
+from nbody import THRUST_MODES, INTEGRATORS, initial_state, advance
+
+
+def load_schedule(path):
+    """Lê um roteiro de impulso: lista de (t, modo, ligado) ordenada pelo tempo."""
+    events = []
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as fh:
+            for row in csv.reader(fh):
+                if not row or row[0].strip().startswith("#"):
+                    continue
+                events.append((float(row[0]), row[1].strip(), row[2].strip().lower() in ("1", "true", "on")))
+    else:
+        with open(path, encoding="utf-8") as fh:
+            for item in json.load(fh):
+                if isinstance(item, dict):
+                    events.append((float(item["t"]), item["mode"], bool(item["on"])))
+                else:
+                    events.append((float(item[0]), item[1], bool(item[2])))
+    return sorted(events, key=lambda e: e[0])
+
+
+def save_schedule(path, schedule):
+    """Grava um roteiro no formato JSON lido por load_schedule()."""
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump([{"t": t, "mode": mode, "on": on} for t, mode, on in schedule], fh,
+                  ensure_ascii=False, indent=1)
+
+
+def run_headless(pos, vel, masses, dt, duration, schedule=(), substeps=1, sample_every=1,
+                 thrust_const=1.0, integrator="euler"):
+    """
+    Integra `duration` segundos em passos de `dt`, aplicando os eventos do roteiro
+    no instante exato: o passo que contém um evento é dividido nele, como no
+    laço ao vivo (substeps=None escolhe os subpassos automaticamente, ver
+    nbody.advance). Devolve um dicionário com as amostras a cada
+    `sample_every` passos: t, pos, vel, thrust_on e thrust_mode (índice em
+    THRUST_MODES).
+    """
+    pos = np.array(pos, dtype=float)
+    vel = np.array(vel, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+    events = sorted(schedule, key=lambda e: e[0])
+
+    n_total = int(round(duration / dt))
+    n_samples = n_total // sample_every + 1
+    samples = {
+        "t": np.empty(n_samples),
+        "pos": np.empty((n_samples,) + pos.shape),
+        "vel": np.empty((n_samples,) + vel.shape),
+        "thrust_on": np.zeros(n_samples, dtype=bool),
+        "thrust_mode": np.zeros(n_samples, dtype=np.int8),
+    }
+    thrust_on = False
+    thrust_mode = THRUST_MODES[0]
+
+    def record(k, step_i):
+        samples["t"][k] = step_i * dt
+        samples["pos"][k] = pos
+        samples["vel"][k] = vel
+        samples["thrust_on"][k] = thrust_on
+        samples["thrust_mode"][k] = THRUST_MODES.index(thrust_mode) if thrust_mode in THRUST_MODES else 0
+
+    step_i = 0
+    k_event = 0
+    n_substeps = 0
+    record(0, 0)
+    while step_i < n_total:
+        # Avança em bloco até a próxima amostra, o passo do próximo evento ou o fim
+        stop = min(n_total, (step_i // sample_every + 1) * sample_every)
+        if k_event < len(events):
+            stop = min(stop, max(step_i, math.floor(events[k_event][0] / dt)))
+        if stop > step_i:
+            n_substeps += advance(pos, vel, masses, dt, stop - step_i, substeps,
+                                  thrust_mode if thrust_on else None, thrust_const, integrator=integrator)
+            step_i = stop
+        else:
+            # Passo com eventos: dividido no instante exato de cada um
+            t = step_i * dt
+            done = 0.0
+            while k_event < len(events) and events[k_event][0] < t + dt:
+                offset = events[k_event][0] - t
+                if offset > done:
+                    n_substeps += advance(pos, vel, masses, offset - done, 1, substeps,
+                                          thrust_mode if thrust_on else None, thrust_const,
+                                          integrator=integrator)
+                    done = offset
+                _, thrust_mode, thrust_on = events[k_event]
+                k_event += 1
+            n_substeps += advance(pos, vel, masses, dt - done, 1, substeps,
+                                  thrust_mode if thrust_on else None, thrust_const, integrator=integrator)
+            step_i += 1
+        if step_i % sample_every == 0:
+            record(step_i // sample_every, step_i)
+
+    samples["masses"] = masses.copy()
+    samples["n_substeps"] = n_substeps
+    return samples
+
+
+def save_samples(path, samples):
+    """Grava as amostras em .npz (tudo) ou .csv (t, impulso e posições x/y de cada corpo)."""
+    if path.endswith(".csv"):
+        n_bodies = samples["pos"].shape[1]
+        header = ["t", "thrust_on", "thrust_mode"]
+        header += [f"{axis}{i}" for i in range(n_bodies) for axis in ("x", "y")]
+        table = np.column_stack([samples["t"], samples["thrust_on"], samples["thrust_mode"],
+                                 samples["pos"].reshape(len(samples["t"]), -1)])
+        np.savetxt(path, table, delimiter=",", header=",".join(header), comments="")
+    else:
+        np.savez(path, **samples)
+
+
+def load_state(path):
+    """Lê pos, vel e masses de um .npz (de save_samples usa a última amostra)."""
+    data = np.load(path)
+    pos, vel = data["pos"], data["vel"]
+    if pos.ndim == 3:
+        pos, vel = pos[-1], vel[-1]
+    return pos, vel, data["masses"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulação Terra, Lua e Nave sem janela.")
+    parser.add_argument("--duration", type=float, default=86400.0, help="tempo simulado (s)")
+    parser.add_argument("--dt", type=float, default=10.0, help="passo (s), como dt * fator de tempo")
+    parser.add_argument("--substeps", type=lambda s: None if s == "auto" else int(s), default=1,
+                        help='subpassos por passo, ou "auto"')
+    parser.add_argument("--integrator", choices=list(INTEGRATORS), default="euler")
+    parser.add_argument("--sample-every", type=int, default=100, help="passos entre amostras")
+    parser.add_argument("--thrust", type=float, default=1.0, help="aceleração do impulso (m/s²)")
+    parser.add_argument("--schedule", help="roteiro de impulso (.json ou .csv)")
+    parser.add_argument("--state", help="estado inicial (.npz); padrão: LEO de 7000 km")
+    parser.add_argument("--output", default="headless.npz", help="arquivo de saída (.npz ou .csv)")
+    args = parser.parse_args()
+
+    pos, vel, masses = load_state(args.state) if args.state else initial_state()
+    schedule = load_schedule(args.schedule) if args.schedule else []
+
+    start = time.perf_counter()
+    samples = run_headless(pos, vel, masses, args.dt, args.duration, schedule,
+                           args.substeps, args.sample_every, args.thrust, args.integrator)
+    elapsed = time.perf_counter() - start
+    save_samples(args.output, samples)
+
+    n_sub = samples["n_substeps"]
+    print(f"{n_sub} subpassos em {elapsed:.2f} s ({n_sub / elapsed:,.0f} subpassos/s), "
+          f"{len(samples['t'])} amostras gravadas em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
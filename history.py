@@ -0,0 +1,189 @@
+"""
+Histórico de trajetória com capacidade fixa, guardado num array NumPy pré-alocado.
+
+Cada ponto é escrito duas vezes (em i e em i + capacidade), de modo que os
+últimos `len` pontos em ordem cronológica são sempre uma fatia contígua do
+buffer: points() devolve uma visão, sem cópia, e a memória não cresce com o
+tempo de sessão. ScreenTrail guarda o rastro já convertido para pixels e
+simplificado, convertendo a cada quadro apenas os pontos novos.
+AnimatedTrail é o rastro equivalente para as animações do Matplotlib, com
+custo por quadro constante.
+"""
+import numpy as np
+
+
+class TrajectoryHistory:
+    def __init__(self, capacity=20000, dim=2):
+        self.capacity = capacity
+        self._buf = np.empty((2 * capacity, dim))
+        self._next = 0    # posição de escrita no anel [0, capacity)
+        self._len = 0
+        self.total = 0    # pontos já adicionados desde o último clear()
+
+    def __len__(self):
+        return self._len
+
+    def clear(self):
+        self._next = 0
+        self._len = 0
+        self.total = 0
+
+    def append(self, point):
+        i = self._next
+        self._buf[i] = point
+        self._buf[i + self.capacity] = point
+        self._next = (i + 1) % self.capacity
+        self._len = min(self._len + 1, self.capacity)
+        self.total += 1
+
+    def points(self):
+        """Visão (len, dim) dos pontos guardados, do mais antigo ao mais recente."""
+        end = self._next if self._next >= self._len else self._next + self.capacity
+        return self._buf[end - self._len:end]
+
+
+def to_screen(points, center, scale):
+    """Converte um array (n, 2) de posições (m) em coordenadas inteiras de tela (pixels)."""
+    return (center + points * scale).astype(int)
+
+
+class ScreenTrail:
+    """
+    Rastro de um TrajectoryHistory em coordenadas de tela, com nível de detalhe.
+
+    Pontos consecutivos que caem na mesma célula de `tolerance` pixels são
+    descartados (não mudam o desenho de pygame.draw.lines). Os pixels já
+    convertidos ficam em cache; só os pontos novos são transformados a cada
+    quadro, e tudo é refeito apenas quando `scale` ou `center` mudam.
+    """
+
+    def __init__(self, history, tolerance=1):
+        self.history = history
+        self.tolerance = tolerance
+        size = 2 * history.capacity
+        self._px = np.empty((size, 2), dtype=int)
+        self._idx = np.empty(size, dtype=np.int64)   # índice absoluto do ponto de origem
+        self._start = 0
+        self._end = 0
+        self._seen = 0           # history.total já processado
+        self._last_cell = None
+        self._view = None
+
+    def _rebuild(self):
+        self._start = self._end = 0
+        self._seen = self.history.total - len(self.history)
+        self._last_cell = None
+
+    def _add(self, points):
+        first = self._seen
+        self._seen += len(points)
+        px = to_screen(points, self._view[0], self._view[1])
+        cells = px // self.tolerance
+        keep = np.empty(len(px), dtype=bool)
+        keep[1:] = np.any(cells[1:] != cells[:-1], axis=1)
+        keep[0] = self._last_cell is None or np.any(cells[0] != self._last_cell)
+        self._last_cell = cells[-1]
+
+        kept = np.flatnonzero(keep)
+        n = len(kept)
+        if self._end + n > len(self._px):
+            # Compacta o cache para o início do buffer
+            count = self._end - self._start
+            self._px[:count] = self._px[self._start:self._end]
+            self._idx[:count] = self._idx[self._start:self._end]
+            self._start, self._end = 0, count
+        self._px[self._end:self._end + n] = px[kept]
+        self._idx[self._end:self._end + n] = first + kept
+        self._end += n
+
+    def points(self, center, scale):
+        """Lista de pixels (x, y) pronta para pygame.draw.lines."""
+        view = (tuple(center), scale)
+        if view != self._view or self.history.total < self._seen:
+            # Zoom/centro mudaram ou o histórico foi limpo
+            self._view = view
+            self._rebuild()
+
+        new = min(self.history.total - self._seen, len(self.history))
+        if new > 0:
+            self._seen = self.history.total - new
+            self._add(self.history.points()[-new:])
+
+        # Descarta os pontos que já saíram do anel do histórico
+        oldest = self.history.total - len(self.history)
+        self._start += np.searchsorted(self._idx[self._start:self._end], oldest)
+        return self._px[self._start:self._end].tolist()
+
+
+class AnimatedTrail:
+    """
+    Rastro de uma animação do Matplotlib (FuncAnimation com blit) em duas linhas.
+
+    Os últimos `tail` a 2·`tail` pontos formam a cauda viva, redesenhada a
+    cada quadro. Quando a cauda enche, seus `tail` pontos mais antigos são
+    congelados: vão para a linha do histórico, que só recebe set_data()
+    nesse momento. O histórico guarda um ponto a cada `stride`, e quando passa
+    de `max_frozen` pontos fica só com metade deles (stride dobra). Os dois
+    buffers são pré-alocados e os pontos desenhados por quadro são limitados,
+    então o custo do quadro não cresce com a duração da animação.
+    args e kwargs vão para ax.plot() (a legenda usa só a cauda).
+    """
+
+    def __init__(self, ax, *args, tail=500, max_frozen=2000, **kwargs):
+        self.tail = tail
+        self.max_frozen = max_frozen
+        self.frozen_line, = ax.plot([], [], *args, **dict(kwargs, label="_nolegend_"))
+        self.tail_line, = ax.plot([], [], *args, **kwargs)
+        self._tail = np.empty((2 * tail + 1, 2))
+        self._frozen = np.empty((max_frozen + tail + 1, 2))   # + um bloco congelado + o ponto de junção
+        self.clear()
+
+    @property
+    def artists(self):
+        """Linhas a devolver pela função de atualização da FuncAnimation."""
+        return self.frozen_line, self.tail_line
+
+    def __len__(self):
+        return self.total
+
+    def clear(self):
+        self._n_tail = 0
+        self._n_frozen = 0
+        self._stride = 1
+        self._start = 0        # índice absoluto de _tail[0]
+        self._next_frozen = 0  # próximo índice absoluto ainda não considerado para o histórico
+        self.total = 0
+        self.frozen_line.set_data([], [])
+        self.tail_line.set_data([], [])
+
+    def _freeze(self):
+        # Pontos de índice absoluto múltiplo de stride no bloco [_start, _start + tail)
+        first = max(self._start, self._next_frozen)
+        first += -first % self._stride
+        block = self._tail[first - self._start:self.tail:self._stride]
+        m = self._n_frozen
+        self._frozen[m:m + len(block)] = block
+        self._n_frozen = m + len(block)
+        while self._n_frozen > self.max_frozen:
+            # frozen[k] é o ponto k·stride: os de k par são os múltiplos de 2·stride
+            kept = self._frozen[:self._n_frozen:2].copy()
+            self._n_frozen = len(kept)
+            self._frozen[:self._n_frozen] = kept
+            self._stride *= 2
+        self._next_frozen = self._start + self.tail
+        # O último ponto do bloco fica na cauda e fecha o histórico (as linhas se encontram nele)
+        keep = self._n_tail - self.tail + 1
+        self._tail[:keep] = self._tail[self.tail - 1:self._n_tail]
+        self._n_tail = keep
+        self._start += self.tail - 1
+        self._frozen[self._n_frozen] = self._tail[0]
+        self.frozen_line.set_data(self._frozen[:self._n_frozen + 1, 0], self._frozen[:self._n_frozen + 1, 1])
+
+    def append(self, x, y):
+        """Acrescenta um ponto e atualiza a cauda (O(tail) por quadro, independente do total)."""
+        self._tail[self._n_tail] = x, y
+        self._n_tail += 1
+        self.total += 1
+        if self._n_tail == len(self._tail):
+            self._freeze()
+        self.tail_line.set_data(self._tail[:self._n_tail, 0], self._tail[:self._n_tail, 1])
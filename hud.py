@@ -0,0 +1,68 @@
+"""
+Camada de HUD com cache para o laço do pygame.
+
+TextLines guarda a superfície renderizada de cada linha e só chama
+font.render() de novo quando o texto daquela linha muda. ButtonPanel
+desenha todos os botões (contorno e rótulo) numa superfície própria, refeita
+só quando algum rótulo ou destaque muda, e a cola na tela com um único blit.
+"""
+import pygame
+
+
+class TextLines:
+    """Linhas de texto empilhadas a partir de `origin`, `spacing` pixels entre elas."""
+
+    def __init__(self, font, color, origin, spacing):
+        self.font = font
+        self.color = color
+        self.origin = origin
+        self.spacing = spacing
+        self._texts = []
+        self._surfaces = []
+        self.renders = 0   # chamadas a font.render() (para conferir o cache)
+
+    def draw(self, screen, lines):
+        del self._texts[len(lines):], self._surfaces[len(lines):]
+        x, y = self.origin
+        for i, line in enumerate(lines):
+            if i == len(self._texts):
+                self._texts.append(None)
+                self._surfaces.append(None)
+            if self._texts[i] != line:
+                self._texts[i] = line
+                self._surfaces[i] = self.font.render(line, True, self.color)
+                self.renders += 1
+            screen.blit(self._surfaces[i], (x, y + i * self.spacing))
+
+
+class ButtonPanel:
+    """
+    Botões com retângulos fixos `rects`; draw() recebe (rótulo, destacado) de
+    cada botão, na mesma ordem. Fundo `background` transparente (colorkey).
+    """
+
+    def __init__(self, rects, font, color, highlight, background, border=2):
+        self.font = font
+        self.color = color
+        self.highlight = highlight
+        self.border = border
+        bounds = rects[0].unionall(rects[1:])
+        self.origin = bounds.topleft
+        self.rects = [rect.move(-bounds.x, -bounds.y) for rect in rects]
+        self.surface = pygame.Surface(bounds.size)
+        self.surface.set_colorkey(background)
+        self.background = background
+        self._items = None
+        self.rebuilds = 0
+
+    def draw(self, screen, items):
+        items = tuple(items)
+        if items != self._items:
+            self._items = items
+            self.rebuilds += 1
+            self.surface.fill(self.background)
+            for rect, (label, highlighted) in zip(self.rects, items):
+                pygame.draw.rect(self.surface, self.highlight if highlighted else self.color, rect, self.border)
+                txt = self.font.render(label, True, self.color)
+                self.surface.blit(txt, txt.get_rect(center=rect.center))
+        screen.blit(self.surface, self.origin)
@@ -0,0 +1,149 @@
+"""
+Propagador kepleriano analítico (variáveis universais) para trechos de costa
+em torno de um único corpo.
+
+propagate() leva um estado (r0, v0) a qualquer instante futuro em O(1),
+vetorizado sobre muitos estados e/ou muitos tempos, e vale para órbitas
+elípticas, parabólicas e hiperbólicas. time_to_apoapsis() e time_to_radius()
+dão o instante exato dos eventos usados nas queimas da transferência.
+"""
+import numpy as np
+
+MAX_ITER = 50
+TOL = 1e-12
+
+
+def stumpff(z):
+    """Funções de Stumpff C(z) e S(z), vetorizadas (série perto de z = 0)."""
+    z = np.asarray(z, dtype=float)
+    c = np.empty_like(z)
+    s = np.empty_like(z)
+    pos = z > 1e-3
+    neg = z < -1e-3
+    small = ~(pos | neg)
+    sq = np.sqrt(z[pos])
+    c[pos] = (1 - np.cos(sq)) / z[pos]
+    s[pos] = (sq - np.sin(sq)) / sq**3
+    sq = np.sqrt(-z[neg])
+    c[neg] = (np.cosh(sq) - 1) / -z[neg]
+    s[neg] = (np.sinh(sq) - sq) / sq**3
+    zs = z[small]
+    c[small] = 1/2 - zs/24 + zs**2/720 - zs**3/40320
+    s[small] = 1/6 - zs/120 + zs**2/5040 - zs**3/362880
+    return c, s
+
+
+def propagate(r0, v0, dt, mu):
+    """
+    Estado (r, v) após `dt` segundos de costa kepleriana a partir de (r0, v0).
+
+    r0 e v0 têm forma (..., d) (d = 2 ou 3); dt é escalar ou array que faz
+    broadcast com r0.shape[:-1]. O resultado tem forma broadcast + (d,).
+    """
+    r0 = np.asarray(r0, dtype=float)
+    v0 = np.asarray(v0, dtype=float)
+    sqrt_mu = np.sqrt(mu)
+
+    shape = np.broadcast_shapes(r0.shape[:-1], np.shape(dt))
+    r0 = np.broadcast_to(r0, shape + r0.shape[-1:])
+    v0 = np.broadcast_to(v0, shape + v0.shape[-1:])
+    # Trabalha com arrays 1-D e restaura a forma no final
+    r0f = r0.reshape(-1, r0.shape[-1])
+    v0f = v0.reshape(-1, v0.shape[-1])
+    dt = np.broadcast_to(np.asarray(dt, dtype=float), shape).ravel()
+
+    r0n = np.sqrt(np.sum(r0f**2, axis=-1))
+    rv = np.sum(r0f * v0f, axis=-1) / sqrt_mu
+    alpha = 2 / r0n - np.sum(v0f**2, axis=-1) / mu     # 1/a
+    beta = 1 - alpha * r0n
+
+    # Órbitas fechadas: reduz dt a menos de um período (convergência em qualquer horizonte)
+    ellip = alpha > 1e-12
+    period = np.full(dt.shape, np.inf)
+    period[ellip] = 2 * np.pi / np.sqrt(mu * alpha[ellip]**3)
+    dt_red = np.where(ellip, np.fmod(dt, period), dt)
+
+    # Chute inicial de χ (Vallado): elíptico, hiperbólico e quase parabólico
+    chi = sqrt_mu * dt_red * np.where(ellip, alpha, 1 / r0n)
+    hyper = alpha < -1e-12
+    if np.any(hyper):
+        a = 1 / alpha[hyper]
+        sgn = np.sign(dt_red[hyper])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # dt = 0 no periastro dá 0/0: o chute fica inválido e cai no quase parabólico (χ = 0)
+            arg = (-2 * mu * alpha[hyper] * dt_red[hyper]) / (
+                rv[hyper] * sqrt_mu + sgn * np.sqrt(-mu * a) * beta[hyper])
+            guess = sgn * np.sqrt(-a) * np.log(arg)
+        chi[hyper] = np.where(np.isfinite(guess), guess, chi[hyper])
+
+    # Laguerre-Conway na equação universal de Kepler (converge mesmo com chute ruim)
+    n = 5
+    for _ in range(MAX_ITER):
+        z = alpha * chi**2
+        c, s = stumpff(z)
+        f = rv * chi**2 * c + beta * chi**3 * s + r0n * chi - sqrt_mu * dt_red
+        df = rv * chi * (1 - z * s) + beta * chi**2 * c + r0n
+        ddf = rv * (1 - z * c) + beta * chi * (1 - z * s)
+        root = np.sqrt(np.abs((n - 1)**2 * df**2 - n * (n - 1) * f * ddf))
+        delta = n * f / (df + np.copysign(root, df))
+        chi -= delta
+        if np.all(np.abs(delta) <= TOL * (1.0 + np.abs(chi))):
+            break
+
+    z = alpha * chi**2
+    c, s = stumpff(z)
+    f = 1 - chi**2 / r0n * c
+    g = dt_red - chi**3 * s / sqrt_mu
+    r = f[:, None] * r0f + g[:, None] * v0f
+    rn = np.sqrt(np.sum(r**2, axis=-1))
+    fdot = sqrt_mu / (rn * r0n) * (z * s - 1) * chi
+    gdot = 1 - chi**2 / rn * c
+    v = fdot[:, None] * r0f + gdot[:, None] * v0f
+    return r.reshape(r0.shape), v.reshape(v0.shape)
+
+
+def _elements(r0, v0, mu):
+    # Semi-eixo maior, excentricidade e anomalia média inicial (elíptica ou hiperbólica)
+    r0 = np.asarray(r0, dtype=float)
+    v0 = np.asarray(v0, dtype=float)
+    r0n = np.sqrt(np.sum(r0**2, axis=-1))
+    rv = np.sum(r0 * v0, axis=-1)
+    alpha = 2 / r0n - np.sum(v0**2, axis=-1) / mu
+    a = 1 / alpha
+    e_cos = 1 - r0n * alpha          # e·cos E  (ou e·cosh H)
+    e_sin = rv / np.sqrt(mu * np.abs(a))   # e·sin E  (ou e·sinh H)
+    with np.errstate(invalid="ignore"):
+        e = np.where(alpha > 0, np.hypot(e_cos, e_sin), np.sqrt(np.maximum(e_cos**2 - e_sin**2, 0)))
+        anomaly = np.where(alpha > 0, np.arctan2(e_sin, e_cos), np.arcsinh(e_sin / e))
+    mean = np.where(alpha > 0, anomaly - e_sin, e_sin - anomaly)
+    n = np.sqrt(mu / np.abs(a)**3)
+    return a, e, mean, n
+
+
+def apsides(r0, v0, mu):
+    """Raios do periastro e do apoastro (m) da órbita osculante; apoastro infinito para órbitas abertas."""
+    a, e, _, _ = _elements(r0, v0, mu)
+    return a * (1 - e), np.where(a > 0, a * (1 + e), np.inf)
+
+
+def time_to_apoapsis(r0, v0, mu):
+    """Tempo (s) até o próximo apogeu; infinito para órbitas abertas."""
+    a, e, mean, n = _elements(r0, v0, mu)
+    t = np.mod(np.pi - mean, 2 * np.pi) / n
+    return np.where(a > 0, t, np.inf)
+
+
+def time_to_radius(r0, v0, radius, mu):
+    """
+    Tempo (s) até a próxima passagem, de dentro para fora, pelo raio `radius`;
+    infinito se a órbita nunca chega a esse raio.
+    """
+    a, e, mean, n = _elements(r0, v0, mu)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x = (1 - radius / a) / e
+        ellip = a > 0
+        anomaly = np.where(ellip, np.arccos(np.clip(x, -1, 1)), np.arccosh(np.maximum(x, 1)))
+        target = np.where(ellip, anomaly - e * np.sin(anomaly), e * np.sinh(anomaly) - anomaly)
+        t = np.where(ellip, np.mod(target - mean, 2 * np.pi) / n, (target - mean) / n)
+        reachable = np.where(ellip, np.abs(x) <= 1, (x >= 1) & (t >= 0))
+    return np.where(reachable, t, np.inf)
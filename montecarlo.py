@@ -0,0 +1,163 @@
+"""
+Análise de dispersão Monte Carlo da transferência de Hohmann de tli.py.
+
+Cada caso sorteia erros de órbita inicial (raio, velocidade e ângulo de
+trajetória), de módulo e apontamento das duas queimas e de instante das
+queimas, e voa a transferência como tli.py: primeira queima tangencial, costa
+kepleriana até o apogeu (ou o cruzamento de r2) e segunda queima. Os casos
+são propagados de forma vetorizada com kepler.py, em blocos distribuídos
+num pool de processos. Cada bloco tem sua própria semente (SeedSequence), então o
+resultado só depende de --seed e --chunk, não do número de processos.
+
+Uso: python montecarlo.py --cases 1000000 --workers 8 --output dispersao.npz
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from kepler import propagate, time_to_apoapsis, time_to_radius
+
+# Mesmos parâmetros de tli.py
+G = 6.67430e-11         # m^3/(kg*s^2)
+mTerra = 5.9723e24      # kg
+mu = G * mTerra
+r1 = 7000e3             # órbita inicial (m)
+r2 = 384400e3           # órbita alvo (m)
+v_circ1 = np.sqrt(mu / r1)
+v_circ2 = np.sqrt(mu / r2)
+delta_v1 = v_circ1 * (np.sqrt(2 * r2 / (r1 + r2)) - 1)
+delta_v2 = v_circ2 * (1 - np.sqrt(2 * r1 / (r1 + r2)))
+
+# Desvios-padrão dos erros (1 sigma)
+SIGMAS = {
+    "r0": 1e3,              # raio da órbita inicial (m)
+    "v0": 1.0,              # velocidade na órbita inicial (m/s)
+    "gamma0": 1e-4,         # ângulo de trajetória inicial (rad)
+    "dv_scale": 1e-3,       # erro relativo do módulo das queimas
+    "pointing": 1e-3,       # erro de apontamento das queimas (rad)
+    "timing": 1.0,          # atraso/adiantamento das queimas (s)
+}
+
+METRICS = ("arrival_radius", "miss_distance", "total_dv", "arrival_time")
+# Chegada nominal: apogeu da transferência, do lado oposto ao ponto de partida
+NOMINAL_ARRIVAL = np.array([-r2, 0.0])
+
+
+def burn(r, v, delta_v, pointing):
+    """Aplica queimas de módulo delta_v (n,) na direção tangencial (-y, x)/r girada de `pointing` (rad)."""
+    rn = np.sqrt(np.sum(r**2, axis=-1))
+    tx, ty = -r[:, 1] / rn, r[:, 0] / rn
+    c, s = np.cos(pointing), np.sin(pointing)
+    dv = np.column_stack([c * tx - s * ty, s * tx + c * ty]) * delta_v[:, None]
+    return v + dv
+
+
+def fly(n, rng, sigmas=SIGMAS):
+    """Voa `n` casos sorteados com `rng`; devolve um dicionário METRICS -> arrays (n,)."""
+    normal = lambda key: rng.normal(0.0, sigmas[key], n)
+
+    # Órbita inicial perturbada, partindo do eixo x
+    radius = r1 + normal("r0")
+    speed = v_circ1 + normal("v0")
+    gamma = normal("gamma0")
+    r = np.column_stack([radius, np.zeros(n)])
+    v = np.column_stack([speed * np.sin(gamma), speed * np.cos(gamma)])
+
+    # Primeira queima, com erro de instante, módulo e apontamento
+    t1 = normal("timing")
+    r, v = propagate(r, v, t1, mu)
+    dv1 = delta_v1 * (1 + normal("dv_scale"))
+    v = burn(r, v, dv1, normal("pointing"))
+
+    # Costa até o evento da segunda queima (como em tli.start_arc), mais o erro de instante
+    t_coast = np.minimum(time_to_apoapsis(r, v, mu), time_to_radius(r, v, r2, mu))
+    t_coast = t_coast + normal("timing")
+    r, v = propagate(r, v, t_coast, mu)
+    dv2 = delta_v2 * (1 + normal("dv_scale"))
+    v = burn(r, v, dv2, normal("pointing"))
+
+    return {
+        "arrival_radius": np.sqrt(np.sum(r**2, axis=-1)),
+        "miss_distance": np.sqrt(np.sum((r - NOMINAL_ARRIVAL)**2, axis=-1)),
+        "total_dv": np.abs(dv1) + np.abs(dv2),
+        "arrival_time": t1 + t_coast,
+    }
+
+
+def _run_chunk(args):
+    seed_seq, n, sigmas = args
+    return fly(n, np.random.default_rng(seed_seq), sigmas)
+
+
+def run(cases, seed=0, chunk=100000, workers=None, sigmas=SIGMAS):
+    """
+    Roda `cases` casos em blocos de `chunk` casos, em `workers` processos
+    (None: todos os núcleos; 1: no processo atual). Devolve os METRICS
+    concatenados na ordem dos blocos.
+    """
+    sizes = [min(chunk, cases - start) for start in range(0, cases, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(s, n, sigmas) for s, n in zip(seeds, sizes)]
+    if workers == 1:
+        parts = [_run_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, jobs))
+    return {key: np.concatenate([p[key] for p in parts]) for key in METRICS}
+
+
+def summarize(results):
+    """Linhas de texto com média, desvio-padrão e percentis de cada métrica."""
+    units = {"arrival_radius": ("km", 1e3), "miss_distance": ("km", 1e3),
+             "total_dv": ("m/s", 1.0), "arrival_time": ("h", 3600.0)}
+    lines = [f"{'métrica':<16} {'unid.':>5} {'média':>12} {'desvio':>10} {'p5':>12} {'p50':>12} {'p95':>12}"]
+    for key in METRICS:
+        unit, div = units[key]
+        x = results[key] / div
+        p5, p50, p95 = np.percentile(x, [5, 50, 95])
+        lines.append(f"{key:<16} {unit:>5} {x.mean():12.3f} {x.std():10.3f} {p5:12.3f} {p50:12.3f} {p95:12.3f}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=100000, help="casos por bloco vetorizado")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("--scaling", action="store_true", help="mede a vazão com 1, 2, 4, ... processos")
+    parser.add_argument("--output", help="grava os casos em .npz")
+    for key, value in SIGMAS.items():
+        parser.add_argument(f"--sigma-{key.replace('_', '-')}", dest=f"sigma_{key}", type=float, default=value)
+    args = parser.parse_args()
+    sigmas = {key: getattr(args, f"sigma_{key}") for key in SIGMAS}
+
+    if args.scaling:
+        counts = [1]
+        while counts[-1] * 2 <= os.cpu_count():
+            counts.append(counts[-1] * 2)
+        base = None
+        for workers in counts:
+            start = time.perf_counter()
+            run(args.cases, args.seed, args.chunk, workers, sigmas)
+            rate = args.cases / (time.perf_counter() - start)
+            base = base or rate
+            print(f"{workers:3d} processos: {rate:12,.0f} casos/s ({rate / base:.2f}x)")
+        return
+
+    start = time.perf_counter()
+    results = run(args.cases, args.seed, args.chunk, args.workers, sigmas)
+    elapsed = time.perf_counter() - start
+    print(f"{args.cases} casos em {elapsed:.2f} s ({args.cases / elapsed:,.0f} casos/s)")
+    print(f"Nominal: Δv1 = {delta_v1:.2f} m/s, Δv2 = {delta_v2:.2f} m/s")
+    for line in summarize(results):
+        print(line)
+    if args.output:
+        np.savez(args.output, seed=args.seed, **results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,579 @@
+"""
+Núcleo de física do sistema Terra, Lua e Nave.
+
+O estado é guardado em arrays: posições e velocidades com forma (N, 2) e
+massas com forma (N,). Uma única função de acelerações (por broadcast, todos
+os pares de uma vez) é usada pelo laço ao vivo e pela trajetória futura.
+
+advance() avança muitos passos de uma vez, com subpassos fixos ou automáticos
+e um dos integradores de INTEGRATORS; se o Numba estiver instalado, o laço é
+compilado, senão usa step() com NumPy. Um Trace opcional guarda estados
+intermediários do passo (para a detecção de eventos em passos longos).
+"""
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba é opcional
+    njit = None
+
+# --- CONSTANTES FÍSICAS ---
+G = 6.67430e-11    # m³/(kg·s²)
+mEarth = 5.9723e24
+mMoon  = 7.349e22
+mShip  = 8000
+R_EARTH = 6371e3    # m
+R_MOON  = 1737e3    # m
+MOON_SOI = 66.1e6   # raio da esfera de influência da Lua (m)
+
+# Índices dos corpos nos arrays de estado
+EARTH, MOON, SHIP = 0, 1, 2
+
+# Subpasso automático: fração da menor escala de tempo dinâmica por subpasso
+AUTO_ETA = 0.02
+AUTO_TOL = 1e-4         # erro local admitido por passo automático, em frações da menor distância por escala de tempo
+MAX_SUBSTEPS = 100000   # limite de subpassos automáticos por passo
+SAMPLE_ETA = 0.2        # espaçamento das amostras de um Trace, em frações da menor escala de tempo
+
+# Modos de impulso; o código numérico usado por advance() é o índice + 1 (0: sem impulso)
+THRUST_MODES = ("Progressiva", "Retrógrado", "Radial", "Anti Radial")
+
+# --- INTEGRADORES ---
+# Os simpléticos são composições de "kicks" (v += a·c·h) e "drifts" (x += v·c·h).
+KICK, DRIFT = 1, 0
+_W1 = 1 / (2 - 2**(1/3))
+_W0 = -2**(1/3) / (2 - 2**(1/3))
+_COMPOSITIONS = {
+    # Euler semi-implícito (o esquema original do laço)
+    "euler": ((KICK, 1.0), (DRIFT, 1.0)),
+    # Verlet de velocidade / leapfrog (kick-drift-kick), 2ª ordem; o último kick de um subpasso
+    # reaproveita a força no primeiro do seguinte: 1 avaliação de força por subpasso
+    "verlet": ((KICK, 0.5), (DRIFT, 1.0), (KICK, 0.5)),
+    # Yoshida de 4ª ordem (drift-kick), 3 avaliações de força por subpasso
+    "yoshida4": ((DRIFT, _W1/2), (KICK, _W1), (DRIFT, (_W0 + _W1)/2), (KICK, _W0),
+                 (DRIFT, (_W0 + _W1)/2), (KICK, _W1), (DRIFT, _W1/2)),
+}
+# Nome exibido de cada integrador; "rk4" é o Runge-Kutta clássico (não simplético)
+INTEGRATORS = {
+    "euler": "Euler",
+    "verlet": "Verlet",
+    "yoshida4": "Yoshida 4",
+    "rk4": "RK4",
+}
+# Ordem de cada integrador, usada na estimativa do erro local dos subpassos automáticos
+INTEGRATOR_ORDERS = {"euler": 1, "verlet": 2, "yoshida4": 4, "rk4": 4}
+
+
+def initial_state():
+    """Estado inicial: Terra no centro, Lua a ~384400 km e Nave em LEO (7000 km)."""
+    rOrbit = 7000e3
+    vOrbit = np.sqrt(G * mEarth / rOrbit)
+    pos = np.array([[0.0, 0.0],
+                    [384400e3, 0.0],
+                    [rOrbit, 0.0]])
+    vel = np.array([[0.0, 0.0],
+                    [0.0, 1022.0],
+                    [0.0, vOrbit]])
+    masses = np.array([mEarth, mMoon, mShip])
+    return pos, vel, masses
+
+
+def accelerations(pos, masses):
+    """
+    Acelerações gravitacionais de todos os corpos, forma (N, 2).
+
+    diff[i, j] = pos[j] - pos[i]; a diagonal (i == j) recebe distância
+    infinita para não contribuir.
+    """
+    diff = pos[np.newaxis, :, :] - pos[:, np.newaxis, :]
+    dist2 = diff[..., 0]**2 + diff[..., 1]**2
+    np.fill_diagonal(dist2, np.inf)
+    weights = masses / (dist2 * np.sqrt(dist2))
+    return G * np.einsum('ij,ijk->ik', weights, diff)
+
+
+def thrust_direction(thrust_mode, pos, vel, body=SHIP, ref=EARTH):
+    """Vetor unitário do impulso conforme o modo selecionado."""
+    v = vel[body]
+    if thrust_mode == "Retrógrado":
+        angle = math.atan2(v[1], v[0]) + math.pi
+    elif thrust_mode == "Radial":
+        angle = math.atan2(pos[body, 1] - pos[ref, 1], pos[body, 0] - pos[ref, 0])
+    elif thrust_mode == "Anti Radial":
+        angle = math.atan2(pos[ref, 1] - pos[body, 1], pos[ref, 0] - pos[body, 0])
+    else:
+        # "Progressiva" e qualquer modo desconhecido
+        angle = math.atan2(v[1], v[0])
+    return np.array([math.cos(angle), math.sin(angle)])
+
+
+def _rk4_substep(pos, vel, masses, h, thrust):
+    x0 = pos.copy()
+    v0 = vel.copy()
+    kx1 = v0
+    kv1 = accelerations(x0, masses) + thrust
+    kx2 = v0 + 0.5*h*kv1
+    kv2 = accelerations(x0 + 0.5*h*kx1, masses) + thrust
+    kx3 = v0 + 0.5*h*kv2
+    kv3 = accelerations(x0 + 0.5*h*kx2, masses) + thrust
+    kx4 = v0 + h*kv3
+    kv4 = accelerations(x0 + h*kx3, masses) + thrust
+    pos += h/6 * (kx1 + 2*kx2 + 2*kx3 + kx4)
+    vel += h/6 * (kv1 + 2*kv2 + 2*kv3 + kv4)
+
+
+def step(pos, vel, masses, dt, substeps=1, thrust=None, integrator="euler"):
+    """
+    Avança o sistema in-place por dt (s) em `substeps` subpassos com o
+    integrador escolhido (ver INTEGRATORS). `thrust` é uma aceleração extra
+    (N, 2), ou None.
+    """
+    dt_sub = dt / substeps
+    if integrator == "rk4":
+        for _ in range(substeps):
+            _rk4_substep(pos, vel, masses, dt_sub, 0.0 if thrust is None else thrust)
+        return
+    ops = _COMPOSITIONS[integrator]
+    acc = None   # válida enquanto as posições não mudam (reaproveitada entre subpassos)
+    for _ in range(substeps):
+        for kind, coef in ops:
+            if kind == KICK:
+                if acc is None:
+                    acc = accelerations(pos, masses)
+                    if thrust is not None:
+                        acc += thrust
+                vel += acc * (coef * dt_sub)
+            else:
+                pos += vel * (coef * dt_sub)
+                acc = None
+
+
+def min_timescale(pos, vel, masses):
+    """
+    Menor escala de tempo dinâmica entre pares de corpos (s): o mínimo entre
+    o tempo de queda livre sqrt(d³ / G(mi + mj)) e o tempo de aproximação
+    d / |v_rel|. Fica pequena em órbitas baixas e sobrevoos próximos.
+    """
+    dpos = pos[np.newaxis, :, :] - pos[:, np.newaxis, :]
+    dvel = vel[np.newaxis, :, :] - vel[:, np.newaxis, :]
+    d2 = dpos[..., 0]**2 + dpos[..., 1]**2
+    v2 = dvel[..., 0]**2 + dvel[..., 1]**2
+    np.fill_diagonal(d2, np.inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau2 = np.minimum(d2 * np.sqrt(d2) / (G * (masses[:, np.newaxis] + masses)),
+                          np.where(v2 > 0, d2 / v2, np.inf))
+    return math.sqrt(tau2.min())
+
+
+def _gravity(pos, vel, masses, acc, with_tau):
+    # Acelerações em `acc`; devolve o quadrado da menor escala de tempo se with_tau
+    n = pos.shape[0]
+    tau2 = math.inf
+    for i in range(n):
+        ax = 0.0
+        ay = 0.0
+        for j in range(n):
+            if i != j:
+                dx = pos[j, 0] - pos[i, 0]
+                dy = pos[j, 1] - pos[i, 1]
+                d2 = dx*dx + dy*dy
+                w = masses[j] / (d2 * math.sqrt(d2))
+                ax += w * dx
+                ay += w * dy
+                if with_tau:
+                    tau2 = min(tau2, d2 * math.sqrt(d2) / (G * (masses[i] + masses[j])))
+                    dvx = vel[j, 0] - vel[i, 0]
+                    dvy = vel[j, 1] - vel[i, 1]
+                    v2 = dvx*dvx + dvy*dvy
+                    if v2 > 0.0:
+                        tau2 = min(tau2, d2 / v2)
+        acc[i, 0] = G * ax
+        acc[i, 1] = G * ay
+    return tau2
+
+
+def _rk4_loops(pos, vel, masses, acc, h, tx, ty, body, x0, v0, sx, sv, kx, kv):
+    # Um subpasso de RK4; `acc` já contém a gravidade em pos
+    n = pos.shape[0]
+    x0[:, :] = pos
+    v0[:, :] = vel
+    sx[:, :] = 0.0
+    sv[:, :] = 0.0
+    for stage in range(4):
+        if stage > 0:
+            _gravity(pos, vel, masses, acc, False)
+        acc[body, 0] += tx
+        acc[body, 1] += ty
+        weight = 1.0 if stage == 0 or stage == 3 else 2.0
+        frac = 0.5 if stage < 2 else 1.0
+        for i in range(n):
+            for c in range(2):
+                kx[i, c] = vel[i, c]
+                kv[i, c] = acc[i, c]
+                sx[i, c] += weight * kx[i, c]
+                sv[i, c] += weight * kv[i, c]
+        if stage < 3:
+            for i in range(n):
+                for c in range(2):
+                    pos[i, c] = x0[i, c] + frac * h * kx[i, c]
+                    vel[i, c] = v0[i, c] + frac * h * kv[i, c]
+    for i in range(n):
+        for c in range(2):
+            pos[i, c] = x0[i, c] + h/6 * sx[i, c]
+            vel[i, c] = v0[i, c] + h/6 * sv[i, c]
+
+
+def _trace_push(trace_t, trace_pos, trace_vel, trace_n, trace_f, t, pos, vel):
+    # Acrescenta uma amostra na posição trace_n[1] do Trace (confirmada depois com trace_n[0] = trace_n[1]);
+    # com o buffer cheio, descarta as amostras ímpares e dobra o espaçamento
+    k = trace_n[1]
+    if k == trace_t.shape[0]:
+        k = (k + 1) // 2
+        for j in range(1, k):
+            trace_t[j] = trace_t[2 * j]
+            trace_pos[j] = trace_pos[2 * j]
+            trace_vel[j] = trace_vel[2 * j]
+        trace_n[0] = (trace_n[0] + 1) // 2
+        trace_f[1] *= 2.0
+    trace_t[k] = t
+    trace_pos[k] = pos
+    trace_vel[k] = vel
+    trace_n[1] = k + 1
+    trace_f[2] = 0.0
+
+
+def _min_dist2(pos):
+    # Quadrado da menor distância entre pares de corpos
+    n = pos.shape[0]
+    d2 = math.inf
+    for i in range(n):
+        for j in range(i + 1, n):
+            dx = pos[j, 0] - pos[i, 0]
+            dy = pos[j, 1] - pos[i, 1]
+            d2 = min(d2, dx*dx + dy*dy)
+    return d2
+
+
+def _substeps(pos, vel, masses, acc, valid, h, count, mode, thrust_const, body, ref, kinds, coefs, rk4,
+              x0, v0, sx, sv, kx, kv, trace_t, trace_pos, trace_vel, trace_n, trace_f, t0, tau, final):
+    # `count` subpassos de h a partir do tempo t0, com a direção do impulso recalculada a cada subpasso.
+    # `valid`: `acc` já contém a gravidade em pos; devolve o mesmo para o estado final.
+    # Amostras no Trace a cada trace_f[1] de tau (tau = 0: a cada subpasso), exceto o último subpasso
+    # se `final` (o fim da chamada é amostrado por _advance_loops)
+    n = pos.shape[0]
+    for j in range(count):
+        tx = 0.0
+        ty = 0.0
+        if mode > 0:
+            if mode == 2:
+                angle = math.atan2(vel[body, 1], vel[body, 0]) + math.pi
+            elif mode == 3:
+                angle = math.atan2(pos[body, 1] - pos[ref, 1], pos[body, 0] - pos[ref, 0])
+            elif mode == 4:
+                angle = math.atan2(pos[ref, 1] - pos[body, 1], pos[ref, 0] - pos[body, 0])
+            else:
+                angle = math.atan2(vel[body, 1], vel[body, 0])
+            tx = thrust_const * math.cos(angle)
+            ty = thrust_const * math.sin(angle)
+        if rk4:
+            if not valid:
+                _gravity(pos, vel, masses, acc, False)
+            _rk4_loops(pos, vel, masses, acc, h, tx, ty, body, x0, v0, sx, sv, kx, kv)
+            valid = False
+        else:
+            for op in range(kinds.shape[0]):
+                hc = coefs[op] * h
+                if kinds[op] == 1:
+                    if not valid:
+                        _gravity(pos, vel, masses, acc, False)
+                        valid = True
+                    for i in range(n):
+                        ax = acc[i, 0]
+                        ay = acc[i, 1]
+                        if i == body:
+                            ax += tx
+                            ay += ty
+                        vel[i, 0] += ax * hc
+                        vel[i, 1] += ay * hc
+                else:
+                    for i in range(n):
+                        pos[i, 0] += vel[i, 0] * hc
+                        pos[i, 1] += vel[i, 1] * hc
+                    valid = False
+        if trace_t is not None:
+            trace_f[2] += h / tau if tau > 0.0 else 1.0
+            if trace_f[2] >= trace_f[1] and not (final and j == count - 1):
+                _trace_push(trace_t, trace_pos, trace_vel, trace_n, trace_f, t0 + (j + 1) * h, pos, vel)
+    return valid
+
+
+def _advance_loops(pos, vel, masses, dt, n_steps, substeps, eta, tol, order, mode, thrust_const, body, ref,
+                   kinds, coefs, rk4, trace_t, trace_pos, trace_vel, trace_n, trace_f):
+    # Mesmo esquema de advance() com NumPy, com laços explícitos para ser compilado pelo Numba.
+    # trace_*: buffers de um Trace, ou None (os testes `is not None` são resolvidos na compilação)
+    acc = np.empty_like(pos)
+    x0 = np.empty_like(pos)
+    v0 = np.empty_like(pos)
+    sx = np.empty_like(pos)
+    sv = np.empty_like(pos)
+    kx = np.empty_like(pos)
+    kv = np.empty_like(pos)
+    x_start = np.empty_like(pos)
+    v_start = np.empty_like(pos)
+    x_coarse = np.empty_like(pos)
+    count = 0
+    valid = False   # `acc` corresponde às posições atuais (reaproveitada entre subpassos e passos)
+    if trace_t is not None and trace_n[0] == 0:
+        _trace_push(trace_t, trace_pos, trace_vel, trace_n, trace_f, trace_f[0], pos, vel)
+        trace_n[0] = trace_n[1]
+    if eta <= 0.0 and n_steps > 0:
+        # Subpassos fixos: todos os passos da chamada de uma vez
+        count = n_steps * substeps
+        _substeps(pos, vel, masses, acc, False, dt / substeps, count, mode, thrust_const, body, ref,
+                  kinds, coefs, rk4, x0, v0, sx, sv, kx, kv,
+                  trace_t, trace_pos, trace_vel, trace_n, trace_f, trace_f[0] if trace_t is not None else 0.0,
+                  0.0, True)
+        if trace_t is not None:
+            trace_n[0] = trace_n[1]
+        n_steps_auto = 0
+    else:
+        n_steps_auto = n_steps
+    for s in range(n_steps_auto):
+        t0 = 0.0
+        if trace_t is not None:
+            t0 = trace_f[0] + s * dt
+        final = s == n_steps - 1
+        # Passo automático: m subpassos iguais pela escala de tempo, e o passo é refeito com 2m
+        # (extrapolação de Richardson: erro da solução fina ~ |fina - grossa| / (2**ordem - 1));
+        # enquanto o erro passa da tolerância, m dobra
+        tau = math.sqrt(_gravity(pos, vel, masses, acc, True))
+        limit = tol * math.sqrt(_min_dist2(pos)) * dt / tau
+        m = _adaptive_count(dt, eta * tau, dt)
+        x_start[:, :] = pos
+        v_start[:, :] = vel
+        _substeps(pos, vel, masses, acc, True, dt / m, m, mode, thrust_const, body, ref, kinds, coefs, rk4,
+                  x0, v0, sx, sv, kx, kv, None, None, None, None, None, t0, tau, final)
+        count += m
+        while True:
+            x_coarse[:, :] = pos
+            pos[:, :] = x_start
+            vel[:, :] = v_start
+            fine = min(2 * m, MAX_SUBSTEPS)
+            phase = 0.0
+            if trace_t is not None:
+                phase = trace_f[2]
+            valid = _substeps(pos, vel, masses, acc, False, dt / fine, fine, mode, thrust_const, body, ref,
+                              kinds, coefs, rk4, x0, v0, sx, sv, kx, kv,
+                              trace_t, trace_pos, trace_vel, trace_n, trace_f, t0, tau, final)
+            count += fine
+            err = 0.0
+            for i in range(pos.shape[0]):
+                err = max(err, abs(pos[i, 0] - x_coarse[i, 0]), abs(pos[i, 1] - x_coarse[i, 1]))
+            if err / (2.0**order - 1.0) <= limit or fine >= MAX_SUBSTEPS:
+                break
+            # Passo rejeitado: as amostras da tentativa são descartadas
+            if trace_t is not None:
+                trace_n[1] = trace_n[0]
+                trace_f[2] = phase
+            m = fine
+        if trace_t is not None:
+            trace_n[0] = trace_n[1]
+    if trace_t is not None and n_steps > 0 and dt > 0.0:
+        # O estado final sempre é amostrado, no instante exato do fim da chamada
+        trace_f[0] += n_steps * dt
+        _trace_push(trace_t, trace_pos, trace_vel, trace_n, trace_f, trace_f[0], pos, vel)
+        trace_n[0] = trace_n[1]
+    return count
+
+
+def _advance_untraced(pos, vel, masses, dt, n_steps, substeps, eta, tol, order, mode, thrust_const, body, ref,
+                      kinds, coefs, rk4):
+    # _advance_loops sem Trace: a chamada compilada não paga a conversão de mais cinco argumentos
+    return _advance_loops(pos, vel, masses, dt, n_steps, substeps, eta, tol, order, mode, thrust_const, body, ref,
+                          kinds, coefs, rk4, None, None, None, None, None)
+
+
+def _adaptive_count(remaining, h_max, dt):
+    # Subpassos iguais que cobrem o resto do passo com h <= h_max (limitado a MAX_SUBSTEPS por passo)
+    return max(1, min(math.ceil(remaining / max(h_max, 1e-300)), math.ceil(remaining * MAX_SUBSTEPS / dt)))
+
+
+if njit is not None:
+    _adaptive_count = njit(cache=True)(_adaptive_count)
+    _gravity = njit(cache=True)(_gravity)
+    _rk4_loops = njit(cache=True)(_rk4_loops)
+    _trace_push = njit(cache=True)(_trace_push)
+    _min_dist2 = njit(cache=True)(_min_dist2)
+    _substeps = njit(cache=True)(_substeps)
+    _advance_loops = njit(cache=True, nogil=True)(_advance_loops)
+    _advance_jit = njit(cache=True, nogil=True)(_advance_untraced)
+else:
+    _advance_jit = None
+
+# Tabelas das composições no formato do laço compilado
+_COMPOSITION_ARRAYS = {
+    name: (np.array([kind for kind, _ in ops], dtype=np.int64), np.array([coef for _, coef in ops]))
+    for name, ops in _COMPOSITIONS.items()
+}
+_COMPOSITION_ARRAYS["rk4"] = (np.zeros(0, dtype=np.int64), np.zeros(0))
+
+
+def _mode_code(thrust_mode):
+    if thrust_mode is None:
+        return 0
+    if thrust_mode in THRUST_MODES:
+        return THRUST_MODES.index(thrust_mode) + 1
+    return 1  # modo desconhecido: Progressiva, como em thrust_direction()
+
+
+class Trace:
+    """
+    Estados intermediários (t, pos, vel) gravados por advance(trace=...): o
+    inicial, um a cada SAMPLE_ETA da menor escala de tempo (com subpassos
+    fixos, um por subpasso) e o final de cada chamada. Chamadas seguidas
+    continuam a mesma sequência de amostras. Com o buffer cheio, metade das
+    amostras é descartada e o espaçamento dobra.
+    """
+
+    def __init__(self, n_bodies, capacity=4096, dim=2):
+        self.capacity = capacity
+        self.t = np.empty(capacity)
+        self.pos = np.empty((capacity, n_bodies, dim))
+        self.vel = np.empty((capacity, n_bodies, dim))
+        self._n = np.zeros(2, dtype=np.int64)   # amostras confirmadas, posição da próxima amostra
+        self._f = np.zeros(3)   # tempo no fim da última chamada, espaçamento, fração desde a última amostra
+        self.clear()
+
+    def __len__(self):
+        return int(self._n[0])
+
+    def clear(self, t0=0.0):
+        """Descarta as amostras; a próxima chamada a advance() começa no tempo t0."""
+        self._n[:] = 0
+        self._f[:] = (t0, SAMPLE_ETA, 0.0)
+
+    def keep_last(self):
+        """Descarta as amostras, exceto a última, que passa a ser a primeira."""
+        n = len(self)
+        if n > 1:
+            self.t[0], self.pos[0], self.vel[0] = self.t[n - 1], self.pos[n - 1], self.vel[n - 1]
+            self._n[:] = 1
+
+    def samples(self):
+        """(t (k,), pos (k, N, dim), vel (k, N, dim)), vistas dos buffers."""
+        n = len(self)
+        return self.t[:n], self.pos[:n], self.vel[:n]
+
+    def buffers(self):
+        """Buffers passados ao laço de advance() (t, pos, vel, contagem, estado da amostragem)."""
+        return self.t, self.pos, self.vel, self._n, self._f
+
+
+def _step_substeps(pos, vel, masses, h, count, thrust_mode, thrust_const, body, ref, integrator,
+                   trace, t0, tau, final):
+    # Versão NumPy de _substeps: `count` subpassos de h com step(), recalculando a direção do impulso
+    if trace is None and thrust_mode is None:
+        step(pos, vel, masses, h * count, count, None, integrator)
+        return
+    thrust = None
+    for j in range(count):
+        if thrust_mode is not None:
+            thrust = np.zeros_like(pos)
+            thrust[body] = thrust_const * thrust_direction(thrust_mode, pos, vel, body, ref)
+        step(pos, vel, masses, h, 1, thrust, integrator)
+        if trace is not None:
+            trace_f = trace._f
+            trace_f[2] += h / tau if tau > 0 else 1.0
+            if trace_f[2] >= trace_f[1] and not (final and j == count - 1):
+                _trace_push(*trace.buffers(), t0 + (j + 1) * h, pos, vel)
+
+
+def advance(pos, vel, masses, dt, n_steps=1, substeps=1, thrust_mode=None, thrust_const=1.0,
+            body=SHIP, ref=EARTH, eta=AUTO_ETA, tol=AUTO_TOL, integrator="euler", trace=None):
+    """
+    Avança n_steps passos de dt (s) in-place, como o laço ao vivo: cada
+    passo é dividido em `substeps` subpassos iguais do `integrator` escolhido
+    (ver INTEGRATORS) e a direção do impulso (`thrust_mode`, ou None sem
+    impulso) é recalculada a cada subpasso.
+
+    Com substeps=None o subpasso é automático, mas constante dentro de cada
+    passo (o que preserva o caráter simplético dos integradores): começa com
+    `eta` vezes min_timescale() no início do passo e o passo é refeito com a
+    metade do subpasso; a diferença entre as duas soluções estima o erro
+    local (extrapolação de Richardson), e o subpasso é dividido por dois até
+    o erro ficar abaixo de `tol` vezes a menor distância entre os corpos por
+    escala de tempo percorrida. Fica a solução mais fina. Devolve o número de
+    subpassos integrados, contando as tentativas.
+
+    Com um `trace` (Trace), os estados intermediários são amostrados sem
+    alterar a integração.
+    """
+    adaptive = substeps is None
+    if _advance_jit is not None:
+        kinds, coefs = _COMPOSITION_ARRAYS[integrator]
+        args = (pos, vel, masses, float(dt), int(n_steps), 1 if adaptive else int(substeps),
+                float(eta) if adaptive else 0.0, float(tol), INTEGRATOR_ORDERS[integrator],
+                _mode_code(thrust_mode), float(thrust_const), body, ref, kinds, coefs, integrator == "rk4")
+        if trace is None:
+            return _advance_jit(*args)
+        return _advance_loops(*args, *trace.buffers())
+    trace_n = trace_f = None
+    if trace is not None:
+        trace_n, trace_f = trace._n, trace._f
+        if trace_n[0] == 0:
+            _trace_push(*trace.buffers(), trace_f[0], pos, vel)
+            trace_n[0] = trace_n[1]
+    count = 0
+    for s in range(n_steps):
+        t0 = trace_f[0] + s * dt if trace is not None else 0.0
+        final = s == n_steps - 1
+        if not adaptive:
+            _step_substeps(pos, vel, masses, dt / substeps, substeps, thrust_mode, thrust_const, body, ref,
+                           integrator, trace, t0, 0.0, final)
+            count += substeps
+        else:
+            tau = min_timescale(pos, vel, masses)
+            limit = tol * math.sqrt(_min_dist2(pos)) * dt / tau
+            m = _adaptive_count(dt, eta * tau, dt)
+            x_start, v_start = pos.copy(), vel.copy()
+            _step_substeps(pos, vel, masses, dt / m, m, thrust_mode, thrust_const, body, ref,
+                           integrator, None, t0, tau, final)
+            count += m
+            while True:
+                x_coarse = pos.copy()
+                pos[:] = x_start
+                vel[:] = v_start
+                fine = min(2 * m, MAX_SUBSTEPS)
+                phase = trace_f[2] if trace is not None else 0.0
+                _step_substeps(pos, vel, masses, dt / fine, fine, thrust_mode, thrust_const, body, ref,
+                               integrator, trace, t0, tau, final)
+                count += fine
+                err = np.abs(pos - x_coarse).max() / (2.0**INTEGRATOR_ORDERS[integrator] - 1)
+                if err <= limit or fine >= MAX_SUBSTEPS:
+                    break
+                if trace is not None:
+                    trace_n[1] = trace_n[0]
+                    trace_f[2] = phase
+                m = fine
+        if trace is not None:
+            trace_n[0] = trace_n[1]
+    if trace is not None and n_steps > 0 and dt > 0:
+        trace_f[0] += n_steps * dt
+        _trace_push(*trace.buffers(), trace_f[0], pos, vel)
+        trace_n[0] = trace_n[1]
+    return count
+
+
+def compute_future_trajectory(pos, vel, masses, dt_eff, steps=500, skip=1, substeps=1, body=SHIP,
+                              integrator="euler"):
+    """Posições futuras de `body` (array (k, 2)) sem impulso, a partir de cópias do estado."""
+    local_pos = pos.copy()
+    local_vel = vel.copy()
+    future_positions = []
+    for i in range(steps):
+        advance(local_pos, local_vel, masses, dt_eff, 1, substeps, integrator=integrator)
+        if i % skip == 0:
+            future_positions.append(local_pos[body].copy())
+    return np.array(future_positions).reshape(-1, 2)
@@ -0,0 +1,180 @@
+"""
+Previsão rápida por cônicas ligadas (patched conics) para horizontes longos.
+
+Fora da esfera de influência da Lua a nave segue uma cônica kepleriana em
+torno da Terra; dentro dela, em torno da Lua. A Lua segue a órbita kepleriana
+do problema de dois corpos Terra–Lua e o baricentro dos dois anda em linha
+reta. Cada trecho é propagado de forma analítica (kepler.py) em todos os
+instantes restantes da grade de uma vez. O instante de cruzamento da
+fronteira da esfera de influência é refinado por buscas vetorizadas em
+grades cada vez mais finas, e o estado passa para o referencial do outro
+corpo (com uma pequena histerese, que evita trocas repetidas quando a
+trajetória tangencia a fronteira). Opcionalmente, uma janela em torno de
+cada cruzamento é integrada com o modelo completo de N corpos
+(nbody.advance), onde o erro das cônicas é maior.
+
+Uso: python patched_conic.py --days 10 --refine 21600 --state tli.npz --compare
+"""
+import argparse
+import time
+
+import numpy as np
+
+from nbody import G, EARTH, MOON, SHIP, R_EARTH, R_MOON, MOON_SOI, advance, initial_state
+from kepler import propagate
+from headless import load_state
+
+REFINE_ROUNDS = 4         # rodadas de busca do instante de cruzamento
+REFINE_POINTS = 64        # instantes avaliados de uma vez por rodada (intervalo / 64**4 no fim)
+HYSTERESIS = 0.02         # a nave sai da SOI lunar só além de (1 + HYSTERESIS) · MOON_SOI
+CENTRAL = (EARTH, MOON)   # corpo central de cada referencial
+
+
+class Ephemeris:
+    """Terra e Lua em qualquer instante: órbita relativa kepleriana e baricentro em movimento uniforme."""
+
+    def __init__(self, pos, vel, masses):
+        m_earth, m_moon = masses[EARTH], masses[MOON]
+        self.mu = G * (m_earth + m_moon)
+        self.frac = m_moon / (m_earth + m_moon)
+        self.rel_pos = pos[MOON] - pos[EARTH]
+        self.rel_vel = vel[MOON] - vel[EARTH]
+        self.bary_pos = (m_earth * pos[EARTH] + m_moon * pos[MOON]) / (m_earth + m_moon)
+        self.bary_vel = (m_earth * vel[EARTH] + m_moon * vel[MOON]) / (m_earth + m_moon)
+
+    def __call__(self, t):
+        """(posições, velocidades), cada uma (2, ..., 2) na ordem EARTH, MOON, nos instantes t."""
+        t = np.asarray(t, dtype=float)
+        rel_pos, rel_vel = propagate(self.rel_pos, self.rel_vel, t, self.mu)
+        earth_pos = self.bary_pos + self.bary_vel * t[..., None] - self.frac * rel_pos
+        earth_vel = self.bary_vel - self.frac * rel_vel
+        return np.stack([earth_pos, earth_pos + rel_pos]), np.stack([earth_vel, earth_vel + rel_vel])
+
+
+def predict(pos, vel, masses, duration, dt_sample=600.0, refine=0.0, body=SHIP, integrator="yoshida4"):
+    """
+    Trajetória de `body` por cônicas ligadas nos instantes 0, dt_sample, ..., duration.
+
+    refine > 0 integra com N corpos a janela de ±refine s em torno de cada
+    cruzamento da esfera de influência. Devolve (tempos (k,), posições (k, 2)
+    de `body`, cruzamentos: lista de (tempo, "entrada" ou "saída")). A
+    previsão termina antes de `duration` se a nave atinge a Terra ou a Lua.
+    """
+    eph = Ephemeris(pos, vel, masses)
+    mus = (G * masses[EARTH], G * masses[MOON])
+    radii = (R_EARTH, R_MOON)
+    times = np.arange(0.0, duration + 0.5 * dt_sample, dt_sample)
+    bodies_pos, bodies_vel = eph(times)
+    out = np.empty((len(times), 2))
+    out[0] = pos[body]
+    crossings = []
+
+    # Trecho atual: referencial (0 Terra, 1 Lua), instante inicial e estado relativo
+    frame = int(np.hypot(*(pos[body] - pos[MOON])) < MOON_SOI)
+    t0 = 0.0
+    r0 = pos[body] - pos[CENTRAL[frame]]
+    v0 = vel[body] - vel[CENTRAL[frame]]
+    j = 1   # próximo instante da grade a preencher
+    while j < len(times):
+        soi = MOON_SOI * (1 + HYSTERESIS) if frame else MOON_SOI
+        r, _ = propagate(r0, v0, times[j:] - t0, mus[frame])
+        ship = bodies_pos[frame, j:] + r
+        inside = np.hypot(*(ship - bodies_pos[1, j:]).T) < soi
+        switch = inside != bool(frame)
+        hit = np.hypot(*r.T) < radii[frame]
+        stop = switch | hit
+        k = int(np.argmax(stop)) if stop.any() else len(r)
+        out[j:j + k] = ship[:k]
+        if k == len(r):
+            break
+        if hit[k] and not switch[k]:
+            out[j + k] = ship[k]
+            times, out = times[:j + k + 1], out[:j + k + 1]
+            break
+
+        # Instante do cruzamento entre a última amostra do trecho e a seguinte
+        lo, hi = (t0 if k == 0 else times[j + k - 1]), times[j + k]
+        for _ in range(REFINE_ROUNDS):
+            ts = np.linspace(lo, hi, REFINE_POINTS + 1)
+            r_s, _ = propagate(r0, v0, ts - t0, mus[frame])
+            b_s, _ = eph(ts)
+            flip = (np.hypot(*(b_s[frame] + r_s - b_s[1]).T) < soi) != bool(frame)
+            i = max(int(np.argmax(flip)), 1)
+            lo, hi = ts[i - 1], ts[i]
+        crossings.append((hi, "saída" if frame else "entrada"))
+
+        if refine > 0:
+            # Janela de N corpos: do estado cônico em t_a até o instante da grade após t_c + refine
+            t_a = max(t0, hi - refine)
+            end = min(int(np.searchsorted(times, hi + refine)), len(times) - 1)
+            r_a, v_a = propagate(r0, v0, t_a - t0, mus[frame])
+            b_pos, b_vel = eph(t_a)
+            full_pos, full_vel = pos.copy(), vel.copy()
+            full_pos[[EARTH, MOON]], full_vel[[EARTH, MOON]] = b_pos, b_vel
+            full_pos[body], full_vel[body] = b_pos[frame] + r_a, b_vel[frame] + v_a
+            t = t_a
+            for i in range(int(np.searchsorted(times, t_a, side="right")), end + 1):
+                advance(full_pos, full_vel, masses, times[i] - t, 1, None, integrator=integrator)
+                out[i] = full_pos[body]
+                t = times[i]
+            t0, j = t, end + 1
+            ship_pos, ship_vel = full_pos[body], full_vel[body]
+        else:
+            r_c, v_c = propagate(r0, v0, hi - t0, mus[frame])
+            b_pos, b_vel = eph(hi)
+            t0, j = hi, j + k
+            ship_pos, ship_vel = b_pos[frame] + r_c, b_vel[frame] + v_c
+
+        # Novo trecho no referencial do outro corpo (após a janela de N corpos, o da posição atual)
+        b_pos, b_vel = eph(t0)
+        if refine > 0:
+            d = np.hypot(*(ship_pos - b_pos[1]))
+            frame = int(d < MOON_SOI * (1 + HYSTERESIS) if frame else d < MOON_SOI)
+        else:
+            frame = 1 - frame
+        r0, v0 = ship_pos - b_pos[frame], ship_vel - b_vel[frame]
+    return times, out, crossings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=float, default=10.0, help="horizonte da previsão (dias)")
+    parser.add_argument("--dt", type=float, default=600.0, help="passo da grade de saída (s)")
+    parser.add_argument("--refine", type=float, default=0.0,
+                        help="meia janela de N corpos em torno de cada cruzamento da SOI (s)")
+    parser.add_argument("--state", help="estado inicial (.npz); padrão: LEO de 7000 km")
+    parser.add_argument("--compare", action="store_true", help="compara com a integração completa de N corpos")
+    args = parser.parse_args()
+
+    pos, vel, masses = load_state(args.state) if args.state else initial_state()
+    advance(pos.copy(), vel.copy(), masses, 1.0, 1, None, integrator="yoshida4")   # compila o Numba antes de medir
+    start = time.perf_counter()
+    times, positions, crossings = predict(pos, vel, masses, args.days * 86400, args.dt, args.refine)
+    elapsed = time.perf_counter() - start
+    print(f"Cônicas ligadas: {len(times)} amostras em {elapsed * 1e3:.1f} ms")
+    for t, kind in crossings:
+        print(f"  {kind} na SOI lunar em {t / 3600:.2f} h")
+    if len(times) < round(args.days * 86400 / args.dt) + 1:
+        print(f"  impacto em {times[-1] / 3600:.2f} h")
+
+    if args.compare:
+        # Como a trajetória futura ao vivo: passos fixos de 10 s com Euler semi-implícito
+        start = time.perf_counter()
+        live_pos, live_vel = pos.copy(), vel.copy()
+        advance(live_pos, live_vel, masses, 10.0, int(round(times[-1] / 10.0)), 1, integrator="euler")
+        print(f"N corpos, passos de 10 s (Euler): {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+        start = time.perf_counter()
+        reference = np.empty_like(positions)
+        reference[0] = pos[SHIP]
+        for i in range(1, len(times)):
+            advance(pos, vel, masses, times[i] - times[i - 1], 1, None, integrator="yoshida4")
+            reference[i] = pos[SHIP]
+        elapsed = time.perf_counter() - start
+        error = np.hypot(*(positions - reference).T)
+        print(f"N corpos, Yoshida 4 com subpassos automáticos (referência): {elapsed * 1e3:.1f} ms")
+        print(f"Erro de posição das cônicas: máximo {error.max() / 1e3:.0f} km, final {error[-1] / 1e3:.0f} km")
+
+
+if __name__ == "__main__":
+    main()
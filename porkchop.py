@@ -0,0 +1,183 @@
+"""
+Planejador de janela para a injeção translunar: mapa "porkchop".
+
+Varre uma grade de ângulo de fase na partida (ângulo da Lua menos o ângulo
+da nave, vistos da Terra) e de Δv da queima tangencial a partir de uma
+órbita circular com o raio atual da nave. Cada candidato é uma sonda sem
+massa de um enxame (swarm.py) voando contra a Terra e a Lua em movimento.
+Para cada um, guarda a menor distância à Lua e o instante em que ela ocorre.
+Candidatos que já passaram do apogeu e se afastam da Lua fora da esfera de
+influência são encerrados antes do fim. A grade é dividida em lotes avaliados
+num pool de processos.
+
+Uso: python porkchop.py --phases 120 --dvs 60 --days 8 --plot porkchop.png
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from nbody import G, EARTH, MOON, SHIP, R_MOON, MOON_SOI, initial_state
+from swarm import Swarm
+from headless import load_state
+
+STATUS = ("costa", "impacto", "escape")   # situação final de cada candidato
+
+
+def candidates(pos, vel, masses, phases, dvs, body=SHIP):
+    """
+    Estados (n_fases * n_dv, 2) logo após a queima, na ordem da grade
+    [fase, dv]; `phases` em radianos e `dvs` em m/s.
+    """
+    r_rel = pos[body] - pos[EARTH]
+    v_rel = vel[body] - vel[EARTH]
+    radius = np.hypot(*r_rel)
+    sense = np.sign(r_rel[0] * v_rel[1] - r_rel[1] * v_rel[0]) or 1.0   # sentido da órbita
+    moon = pos[MOON] - pos[EARTH]
+    angle = np.arctan2(moon[1], moon[0]) - sense * np.asarray(phases)
+
+    phase_grid, dv_grid = np.meshgrid(angle, dvs, indexing="ij")
+    angle, dv = phase_grid.ravel(), dv_grid.ravel()
+    speed = np.sqrt(G * masses[EARTH] / radius) + dv
+    probe_pos = pos[EARTH] + radius * np.column_stack([np.cos(angle), np.sin(angle)])
+    probe_vel = vel[EARTH] + sense * speed[:, None] * np.column_stack([-np.sin(angle), np.cos(angle)])
+    return probe_pos, probe_vel
+
+
+def evaluate(pos, vel, masses, phases, dvs, duration, dt=600.0, integrator="verlet"):
+    """
+    Voa todos os candidatos de uma vez; devolve (menor distância à Lua (m),
+    instante dela (s), situação: índice em STATUS), cada um com forma
+    (n_fases * n_dv,).
+    """
+    probe_pos, probe_vel = candidates(pos, vel, masses, phases, dvs)
+    n = len(probe_pos)
+    bodies = [EARTH, MOON]
+    swarm = Swarm(pos[bodies], vel[bodies], masses[bodies], probe_pos, probe_vel, np.zeros(n, dtype=bool))
+    closest = np.full(n, np.inf)
+    t_closest = np.full(n, np.nan)
+
+    for k in range(1, int(np.ceil(duration / dt)) + 1):
+        active = swarm.alive
+        swarm.advance(dt, 1, None, integrator=integrator)
+        rel = swarm.pos - swarm.bodies_pos[1]
+        w = swarm.vel - swarm.bodies_vel[1]
+        # Mínimo entre amostras: movimento relativo retilíneo ao longo do último passo
+        w2 = np.maximum(np.einsum('ij,ij->i', w, w), 1e-300)
+        s = np.clip(-np.einsum('ij,ij->i', rel, w) / w2, -dt, 0.0)
+        d = np.hypot(rel[:, 0] + w[:, 0] * s, rel[:, 1] + w[:, 1] * s)
+        better = active & (d < closest)
+        closest[better] = d[better]
+        t_closest[better] = k * dt + s[better]
+
+        # Encerramento antecipado: já caindo para a Terra e se afastando da Lua, fora da SOI
+        r_earth = swarm.pos - swarm.bodies_pos[0]
+        v_earth = swarm.vel - swarm.bodies_vel[0]
+        falling = np.einsum('ij,ij->i', r_earth, v_earth) < 0
+        receding = np.einsum('ij,ij->i', rel, w) > 0
+        swarm.stopped |= swarm.alive & falling & receding & (d > MOON_SOI)
+        if not swarm.alive.any():
+            break
+
+    status = np.zeros(n, dtype=np.int8)
+    status[swarm.collided | (closest < R_MOON)] = STATUS.index("impacto")
+    status[swarm.escaped] = STATUS.index("escape")
+    return closest, t_closest, status
+
+
+def _run_batch(args):
+    return evaluate(*args)
+
+
+def plan(pos, vel, masses, phases, dvs, duration, dt=600.0, workers=None, batch=16, integrator="verlet"):
+    """
+    Avalia a grade em lotes de `batch` fases, em `workers` processos (1: no
+    processo atual). Devolve um dicionário com as grades (n_fases, n_dv)
+    closest, t_closest e status, além de phases e dvs.
+    """
+    jobs = [(pos, vel, masses, phases[i:i + batch], dvs, duration, dt, integrator)
+            for i in range(0, len(phases), batch)]
+    if workers == 1:
+        parts = [_run_batch(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_batch, jobs))
+    shape = (len(phases), len(dvs))
+    closest, t_closest, status = (np.concatenate(arrays).reshape(shape) for arrays in zip(*parts))
+    return {"phases": phases, "dvs": dvs, "closest": closest, "t_closest": t_closest, "status": status}
+
+
+def best_candidate(result, altitude=100e3):
+    """Índice (fase, dv) cuja menor distância à Lua mais se aproxima de R_MOON + altitude, sem impacto."""
+    error = np.abs(result["closest"] - (R_MOON + altitude))
+    error[result["status"] != STATUS.index("costa")] = np.inf
+    return np.unravel_index(np.argmin(error), error.shape)
+
+
+def plot_porkchop(path, result, altitude=100e3):
+    """Grava o mapa: log da menor distância à Lua (cores) e instante da chegada na SOI (curvas, em horas)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    phase_deg = np.degrees(result["phases"])
+    closest_km = np.maximum(result["closest"], 1.0) / 1e3
+    fig, ax = plt.subplots(figsize=(10, 7))
+    filled = ax.contourf(phase_deg, result["dvs"], np.log10(closest_km).T, levels=30, cmap="viridis_r")
+    fig.colorbar(filled, ax=ax, label="log10(menor distância à Lua / km)")
+    # Instante de chegada só onde a nave entra na esfera de influência da Lua
+    arrival_h = np.where(result["closest"] < MOON_SOI, result["t_closest"] / 3600, np.nan)
+    lines = ax.contour(phase_deg, result["dvs"], arrival_h.T, levels=10, colors="white", linewidths=0.7)
+    ax.clabel(lines, fmt="%.0f h", fontsize=8)
+    i, j = best_candidate(result, altitude)
+    ax.plot(phase_deg[i], result["dvs"][j], "r*", markersize=14, label="melhor candidato")
+    ax.set_xlabel("ângulo de fase na partida (graus)")
+    ax.set_ylabel("Δv da injeção (m/s)")
+    ax.set_title("Janela de injeção translunar")
+    ax.legend(loc="upper right")
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--phases", type=int, default=120, help="pontos de fase em [0, 360) graus")
+    parser.add_argument("--dvs", type=int, default=60, help="pontos de Δv")
+    parser.add_argument("--dv-min", type=float, default=3000.0, help="m/s")
+    parser.add_argument("--dv-max", type=float, default=3200.0, help="m/s")
+    parser.add_argument("--days", type=float, default=8.0, help="tempo máximo de voo (dias)")
+    parser.add_argument("--dt", type=float, default=600.0, help="passo de amostragem (s)")
+    parser.add_argument("--altitude", type=float, default=100e3, help="altitude desejada sobre a Lua (m)")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("--batch", type=int, default=16, help="fases por lote")
+    parser.add_argument("--state", help="estado inicial (.npz); padrão: LEO de 7000 km")
+    parser.add_argument("--output", help="grava as grades em .npz")
+    parser.add_argument("--plot", help="grava o mapa em imagem (.png)")
+    args = parser.parse_args()
+
+    pos, vel, masses = load_state(args.state) if args.state else initial_state()
+    phases = np.linspace(0, 2 * np.pi, args.phases, endpoint=False)
+    dvs = np.linspace(args.dv_min, args.dv_max, args.dvs)
+
+    start = time.perf_counter()
+    result = plan(pos, vel, masses, phases, dvs, args.days * 86400, args.dt, args.workers, args.batch)
+    elapsed = time.perf_counter() - start
+    n = phases.size * dvs.size
+    print(f"{n} candidatos em {elapsed:.1f} s ({n / elapsed:,.0f} candidatos/s)")
+    counts = np.bincount(result["status"].ravel(), minlength=len(STATUS))
+    print(", ".join(f"{name}: {c}" for name, c in zip(STATUS, counts)))
+
+    i, j = best_candidate(result, args.altitude)
+    print(f"Melhor candidato: fase {np.degrees(phases[i]):.1f}°, Δv {dvs[j]:.1f} m/s, "
+          f"menor distância à Lua {result['closest'][i, j] / 1e3:.0f} km "
+          f"após {result['t_closest'][i, j] / 3600:.1f} h")
+    if args.output:
+        np.savez(args.output, **result)
+    if args.plot:
+        plot_porkchop(args.plot, result, args.altitude)
+        print("Mapa gravado em", args.plot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Trajetória futura da nave com cache incremental.
+
+Enquanto o impulso está desligado e o passo não muda, o laço ao vivo avança
+exatamente um passo da previsão por quadro. O cache guarda o arco previsto,
+descarta os passos já consumidos (um ou mais, se o cálculo anterior levou
+vários quadros) e integra só os passos novos no fim do arco.
+Os eventos do arco (events.py) são detectados só nos passos novos, sobre os
+estados intermediários de cada passo (nbody.Trace, para que passos longos
+não pulem periastros), e descartados quando ficam no passado.
+AsyncPredictor roda esse cache numa thread de fundo, fora do laço de desenho.
+"""
+import threading
+from collections import deque
+from itertools import islice
+
+import numpy as np
+
+from nbody import SHIP, Trace, advance
+from events import detect_events
+
+
+class FutureTrajectoryCache:
+    def __init__(self, steps=500, body=SHIP, with_events=True):
+        self.steps = steps
+        self.body = body
+        self.with_events = with_events   # False: sem detecção de eventos (nem amostras intermediárias)
+        self._trace = None       # amostras dos passos novos para a detecção de eventos (nbody.Trace)
+        self.invalidate()
+
+    def invalidate(self):
+        """Descarta o arco previsto (impulso, modo, fator de tempo ou reset mudaram)."""
+        self._states = deque()   # estados completos (pos, vel) após 1..steps passos
+        self._origin = 0         # passos consumidos desde o início do arco (o estado atual)
+        self._events = deque()   # (tipo, tempo desde o início do arco, posição, distância), em ordem de tempo
+        self._key = None
+        self.substeps_integrated = 0   # subpassos gastos na última atualização
+
+    def _extend(self, pos, vel, masses, dt_eff, substeps, integrator, count):
+        local_pos = pos.copy()
+        local_vel = vel.copy()
+        if not self.with_events:
+            for _ in range(count):
+                self.substeps_integrated += advance(local_pos, local_vel, masses, dt_eff, 1, substeps,
+                                                    integrator=integrator)
+                self._states.append((local_pos.copy(), local_vel.copy()))
+            return
+        if self._trace is None or self._trace.pos.shape[1] != len(pos):
+            self._trace = Trace(len(pos))
+        trace = self._trace
+        trace.clear((self._origin + len(self._states)) * dt_eff)
+        for _ in range(count):
+            self.substeps_integrated += advance(local_pos, local_vel, masses, dt_eff, 1, substeps,
+                                                integrator=integrator, trace=trace)
+            self._states.append((local_pos.copy(), local_vel.copy()))
+            # Buffer pela metade: detecta e continua a partir da última amostra
+            if len(trace) > trace.capacity // 2:
+                self._events.extend(detect_events(*trace.samples(), self.body))
+                trace.keep_last()
+        self._events.extend(detect_events(*trace.samples(), self.body))
+
+    def _find(self, pos, vel):
+        # Índice do estado previsto idêntico a (pos, vel), ou None
+        for k, (p, v) in enumerate(self._states):
+            if np.array_equal(p, pos) and np.array_equal(v, vel):
+                return k
+        return None
+
+    def is_warm(self, pos, vel, dt_eff, substeps=1, integrator="euler"):
+        """True se update() com este estado só precisar integrar o fim do arco."""
+        if self._key != (dt_eff, substeps, integrator):
+            return False
+        return self._find(pos, vel) is not None
+
+    def update(self, pos, vel, masses, dt_eff, substeps=1, skip=1, integrator="euler"):
+        """
+        Posições futuras de `body` (array (k, 2)), como compute_future_trajectory,
+        reaproveitando o arco do quadro anterior quando possível.
+        """
+        self.substeps_integrated = 0
+        key = (dt_eff, substeps, integrator)
+        if self._key != key:
+            self.invalidate()
+            self._key = key
+
+        # O estado atual deve ser exatamente um dos estados do arco previsto
+        k = self._find(pos, vel)
+        if k is not None:
+            for _ in range(k + 1):
+                self._states.popleft()
+            self._origin += k + 1
+            now = self._origin * dt_eff
+            while self._events and self._events[0][1] <= now:
+                self._events.popleft()
+        else:
+            self._states.clear()
+            self._origin = 0
+            self._events.clear()
+
+        if self._states:
+            tail_pos, tail_vel = self._states[-1]
+            self._extend(tail_pos, tail_vel, masses, dt_eff, substeps, integrator,
+                         self.steps - len(self._states))
+        else:
+            self._extend(pos, vel, masses, dt_eff, substeps, integrator, self.steps)
+
+        return np.array([p[self.body] for p, _ in self._states][::skip]).reshape(-1, 2)
+
+    def events(self, limit=None):
+        """
+        Eventos do arco previsto (os `limit` primeiros, ou todos): lista de
+        (tipo, segundos a partir de agora, posição, distância).
+        """
+        if self._key is None:
+            return []
+        now = self._origin * self._key[0]
+        return [(kind, t - now, p, value) for kind, t, p, value in islice(self._events, limit)]
+
+
+class AsyncPredictor:
+    """
+    Calcula a trajetória futura numa thread de fundo.
+
+    O laço de renderização envia cópias do estado com submit() e desenha o
+    arco mais recente com latest(), sem nunca esperar pelo cálculo. Se chegam
+    vários estados antes de o trabalhador terminar, só o último é calculado.
+    Só os `max_events` primeiros eventos do arco são publicados (None: todos;
+    0: os eventos nem são detectados).
+    O tempo `t0` enviado com cada estado volta com o arco em latest_start().
+    """
+
+    def __init__(self, steps=500, body=SHIP, max_events=None):
+        self._cache = FutureTrajectoryCache(steps, body, with_events=max_events != 0)
+        self._max_events = max_events
+        self._cond = threading.Condition()
+        self._job = None
+        self._closed = False
+        self._generation = 0          # incrementada a cada invalidate()
+        self._cache_generation = 0
+        self._result = None
+        self._result_events = []
+        self._result_t0 = 0.0
+        self._result_generation = 0
+        self._rebuilding = False
+        self._thread = threading.Thread(target=self._run, name="AsyncPredictor", daemon=True)
+        self._thread.start()
+
+    def invalidate(self):
+        """A dinâmica mudou: o arco atual fica marcado como desatualizado até o próximo cálculo."""
+        with self._cond:
+            self._generation += 1
+
+    def submit(self, pos, vel, masses, dt_eff, substeps=1, skip=1, integrator="euler", t0=0.0):
+        """Envia um novo estado para previsão (substitui qualquer pedido ainda pendente)."""
+        job = (pos.copy(), vel.copy(), masses.copy(), dt_eff, substeps, skip, integrator, t0)
+        with self._cond:
+            self._job = job + (self._generation,)
+            self._cond.notify()
+
+    def latest(self):
+        """(posições, desatualizado): o arco mais recente publicado, ou None se ainda não há nenhum."""
+        with self._cond:
+            stale = self._rebuilding or self._result_generation != self._generation
+            return self._result, stale
+
+    def latest_events(self):
+        """Eventos do arco publicado por latest(), como FutureTrajectoryCache.events()."""
+        with self._cond:
+            return self._result_events
+
+    def latest_start(self):
+        """Tempo `t0` do estado que originou o arco publicado por latest()."""
+        with self._cond:
+            return self._result_t0
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._job is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job, self._job = self._job, None
+                pos, vel, masses, dt_eff, substeps, skip, integrator, t0, generation = job
+                if generation != self._cache_generation:
+                    self._cache.invalidate()
+                    self._cache_generation = generation
+
+            # A busca no arco fica fora da trava, para não atrasar submit()/latest()
+            warm = self._cache.is_warm(pos, vel, dt_eff, substeps, integrator)
+            with self._cond:
+                self._rebuilding = not warm
+
+            positions = self._cache.update(pos, vel, masses, dt_eff, substeps, skip, integrator)
+            events = self._cache.events(self._max_events)
+
+            with self._cond:
+                self._result = positions
+                self._result_events = events
+                self._result_t0 = t0
+                self._result_generation = generation
+                self._rebuilding = False
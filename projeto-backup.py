@@ -1,9 +1,15 @@
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.animation as animation
 from scipy.integrate import solve_ivp
 from matplotlib.widgets import Button  # Importação do botão
 
+from rhs3d import ThreeBodyRHS
+from history import AnimatedTrail
+from recording import Recorder, unique_path
+
 # Constante gravitacional
 G = 6.67430e-11  # m^3/(kg*s^2)
 
@@ -22,50 +28,14 @@ vLua = 1022  # m/s
 # 0 -> Sem thrust, 1 -> Thrust positivo, -1 -> Thrust negativo
 thrust_sign = 0
 
-def f(t, r):
-    """
-    r: array de 18 elementos:
-        r[0:3]   -> posição (x, y, z) da Nave
-        r[3:6]   -> posição (x, y, z) da Terra
-        r[6:9]   -> posição (x, y, z) da Lua
-        r[9:12]  -> velocidade (vx, vy, vz) da Nave
-        r[12:15] -> velocidade (vx, vy, vz) da Terra
-        r[15:18] -> velocidade (vx, vy, vz) da Lua
-    """
-    global thrust_sign
-
-    # Extração das posições e velocidades
-    r_nave   = r[0:3]
-    r_terra  = r[3:6]
-    r_lua    = r[6:9]
-    v_nave   = r[9:12]
-    v_terra  = r[12:15]
-    v_lua    = r[15:18]
-
-    # Cálculo das distâncias
-    d_terra_nave = np.linalg.norm(r_nave - r_terra)
-    d_lua_nave   = np.linalg.norm(r_nave - r_lua)
-    d_terra_lua  = np.linalg.norm(r_terra - r_lua)
-
-    # Acelerações gravitacionais
-    acel_nave = G * ((mTerra * (r_terra - r_nave) / d_terra_nave**3) +
-                     (mLua   * (r_lua   - r_nave) / d_lua_nave**3))
-    acel_terra = G * ((mNave  * (r_nave  - r_terra) / d_terra_nave**3) +
-                      (mLua   * (r_lua   - r_terra) / d_terra_lua**3))
-    acel_lua = G * ((mNave  * (r_nave  - r_lua)   / d_lua_nave**3) +
-                    (mTerra * (r_terra - r_lua)   / d_terra_lua**3))
-
-    # Aplicação do thrust, se ativado (para a nave)
-    if thrust_sign != 0:
-        thrust_const = 1e-3 * thrust_sign  # valor do thrust ajustado
-        norm_v_nave = np.linalg.norm(v_nave)
-        if norm_v_nave > 1e-10:
-            direcao = v_nave / norm_v_nave
-            acel_nave += thrust_const * direcao
+# Lado direito das EDOs (estado de 18 elementos, ver rhs3d.py): escreve as
+# derivadas sem temporários e é compilado com Numba, se disponível.
+# f.thrust é a aceleração do thrust (m/s²), atualizada pelos botões.
+f = ThreeBodyRHS(mNave, mTerra, mLua)
 
-    # Retorna as derivadas: velocidades e acelerações
-    derivadas = np.concatenate([v_nave, v_terra, v_lua, acel_nave, acel_terra, acel_lua])
-    return derivadas
+# Método do solve_ivp; os implícitos ('Radau', 'BDF', 'LSODA') usam o jacobiano analítico
+metodo = 'RK45'
+opcoes_metodo = {'jac': f.jac} if metodo in ('Radau', 'BDF', 'LSODA') else {}
 
 # ----------------------------------------------------------------------------
 # CONDIÇÕES INICIAIS
@@ -88,9 +58,14 @@ r0 = np.concatenate([r_nave0, r_terra0, r_lua0, v_nave0, v_terra0, v_lua0])
 ti = 0
 dt = 1000  # s
 
-# Listas para armazenar a trajetória histórica da nave
-trajetoria_x = []
-trajetoria_y = []
+# Gravação opcional da execução (python projeto-backup.py --record arquivo.rec),
+# reproduzível com python recording.py arquivo.rec
+arquivo_gravacao = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None
+gravador = (Recorder(unique_path(arquivo_gravacao), ("Nave", "Terra", "Lua"), (mNave, mTerra, mLua), dim=3)
+            if arquivo_gravacao else None)
+if gravador is not None:
+    print("Gravando em", gravador.path)
+modos_thrust = {1: "Progressiva", -1: "Retrógrado"}
 
 # ----------------------------------------------------------------------------
 # CONFIGURAÇÃO DA FIGURA E INTERFACE
@@ -110,8 +85,8 @@ scat_nave  = ax.scatter([], [], color='blue', s=10, label="Nave")
 scat_terra = ax.scatter([], [], color='green', s=100, label="Terra")
 scat_lua   = ax.scatter([], [], color='black', s=50, label="Lua")
 
-# Linha para a trajetória histórica (azul)
-linha_trajetoria, = ax.plot([], [], 'b', alpha=0.5, lw=1, label="Histórico")
+# Linha para a trajetória histórica (azul): cauda viva e histórico congelado e decimado
+trajetoria = AnimatedTrail(ax, 'b', alpha=0.5, lw=1, label="Histórico")
 
 # Linha para a trajetória futura (vermelha)
 linha_trajetoria_fut, = ax.plot([], [], 'r', alpha=0.7, lw=1, label="Projeção Futura")
@@ -130,14 +105,57 @@ r_atual = r0.copy()
 # Parâmetros para a projeção futura
 num_steps_fut = 100       # Número de pontos da projeção
 horizonte = 50 * dt       # Horizonte de tempo para a projeção
+extensao = 10 * dt        # Quanto o fim da projeção avança a cada extensão
+
+# ----------------------------------------------------------------------------
+# PROJEÇÃO COM SAÍDA DENSA
+# A projeção é mantida como trechos de solução densa (OdeSolution) cobrindo
+# [t_atual, t_atual + horizonte]. A cada quadro só o fim é estendido, quando
+# necessário; tudo é refeito apenas quando o thrust muda pelos botões. O passo
+# da simulação lê o estado diretamente dessa solução.
+# ----------------------------------------------------------------------------
+segmentos = []            # trechos de solução densa, em ordem de tempo
+t_fim_proj = t_atual      # fim da região coberta pela projeção
+y_fim_proj = r_atual      # estado em t_fim_proj
+
+def estender_projecao(t_fim):
+    global t_fim_proj, y_fim_proj
+    sol = solve_ivp(f, [t_fim_proj, t_fim], y_fim_proj, method=metodo,
+                    rtol=1e-9, atol=1e-12, dense_output=True, **opcoes_metodo)
+    segmentos.append(sol.sol)
+    t_fim_proj, y_fim_proj = sol.t[-1], sol.y[:, -1]
+
+def resolver_projecao():
+    # Descarta a projeção e integra de novo a partir do estado atual
+    global t_fim_proj, y_fim_proj
+    segmentos.clear()
+    t_fim_proj, y_fim_proj = t_atual, r_atual.copy()
+    estender_projecao(t_atual + horizonte + extensao)
+
+def estados_projecao(ts):
+    # Estados (18, len(ts)) nos tempos ts, que devem estar dentro da projeção
+    ys = np.empty((18, len(ts)))
+    for seg in segmentos:
+        m = (ts >= seg.t_min) & (ts <= seg.t_max)
+        if m.any():
+            ys[:, m] = seg(ts[m])
+    return ys
+
+resolver_projecao()
 
 def update(frame):
     global r_atual, t_atual, thrust_sign
 
-    # Integração para o próximo passo da simulação
-    sol = solve_ivp(f, [t_atual, t_atual + dt], r_atual, method='RK45', rtol=1e-9, atol=1e-12)
-    r_atual = sol.y[:, -1]
+    # Próximo passo da simulação, lido da projeção (estendida só no fim)
     t_atual += dt
+    if t_atual + horizonte > t_fim_proj:
+        estender_projecao(t_atual + horizonte + extensao)
+    while segmentos[0].t_max < t_atual:
+        segmentos.pop(0)
+    r_atual = estados_projecao(np.array([t_atual]))[:, 0]
+    if gravador is not None:
+        gravador.append(t_atual, r_atual[:9].reshape(3, 3), r_atual[9:].reshape(3, 3),
+                        thrust_sign != 0, modos_thrust.get(thrust_sign))
 
     # Extração das posições (apenas x e y)
     x_nave, y_nave = r_atual[0], r_atual[1]
@@ -150,17 +168,12 @@ def update(frame):
     scat_lua.set_offsets([x_lua, y_lua])
 
     # Atualiza a trajetória histórica da nave
-    trajetoria_x.append(x_nave)
-    trajetoria_y.append(y_nave)
-    linha_trajetoria.set_data(trajetoria_x, trajetoria_y)
+    trajetoria.append(x_nave, y_nave)
 
-    # Atualiza a projeção futura: simula a partir do estado atual
+    # Atualiza a projeção futura: interpola a solução densa
     t_fut = np.linspace(t_atual, t_atual + horizonte, num_steps_fut)
-    sol_fut = solve_ivp(f, [t_atual, t_atual + horizonte], r_atual,
-                        t_eval=t_fut, method='RK45', rtol=1e-9, atol=1e-12)
-    x_fut = sol_fut.y[0]
-    y_fut = sol_fut.y[1]
-    linha_trajetoria_fut.set_data(x_fut, y_fut)
+    y_proj = estados_projecao(t_fut)
+    linha_trajetoria_fut.set_data(y_proj[0], y_proj[1])
 
     # Atualiza o texto de status do thrust
     if thrust_sign == 1:
@@ -170,7 +183,7 @@ def update(frame):
     else:
         thrust_text.set_text('Thrust: OFF')
 
-    return scat_nave, scat_terra, scat_lua, linha_trajetoria, linha_trajetoria_fut, thrust_text
+    return (scat_nave, scat_terra, scat_lua, *trajetoria.artists, linha_trajetoria_fut, thrust_text)
 
 # Cria a animação
 ani = animation.FuncAnimation(
@@ -190,17 +203,26 @@ button_off = Button(ax_button_off, 'Thrust OFF')
 
 def thrust_plus(event):
     global thrust_sign
-    thrust_sign = 1
+    if thrust_sign != 1:
+        thrust_sign = 1
+        f.thrust = 1e-3 * thrust_sign  # valor do thrust ajustado
+        resolver_projecao()
     print("Thrust positivo ativado!")
 
 def thrust_minus(event):
     global thrust_sign
-    thrust_sign = -1
+    if thrust_sign != -1:
+        thrust_sign = -1
+        f.thrust = 1e-3 * thrust_sign  # valor do thrust ajustado
+        resolver_projecao()
     print("Thrust negativo ativado!")
 
 def thrust_off(event):
     global thrust_sign
-    thrust_sign = 0
+    if thrust_sign != 0:
+        thrust_sign = 0
+        f.thrust = 1e-3 * thrust_sign  # valor do thrust ajustado
+        resolver_projecao()
     print("Thrust desligado!")
 
 button_plus.on_clicked(thrust_plus)
@@ -208,4 +230,6 @@ button_minus.on_clicked(thrust_minus)
 button_off.on_clicked(thrust_off)
 
 plt.legend()
-plt.show()
\ No newline at end of file
+plt.show()
+if gravador is not None:
+    gravador.close()
\ No newline at end of file
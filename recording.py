@@ -0,0 +1,200 @@
+"""
+Gravação binária compacta de trajetórias e reprodução por mapeamento de memória.
+
+Formato .rec: cabeçalho com MAGIC, versão, número de corpos, dimensão, massas
+e nomes dos corpos, seguido de registros de tamanho fixo (RECORD_DTYPE):
+tempo, posições e velocidades de todos os corpos, flag de impulso e modo de
+impulso (índice em nbody.THRUST_MODES, NO_MODE se não houver). Recorder
+acumula registros num bloco em memória e grava o bloco inteiro quando ele
+enche. Recording abre o arquivo com np.memmap, então qualquer instante é
+acessado por busca binária sem carregar o arquivo (mesmo de vários GB) na
+RAM. Um registro final incompleto (execução interrompida) é ignorado. O
+tempo dos registros nunca diminui (a busca binária depende disso) e um
+arquivo existente nunca é sobrescrito: unique_path() escolhe um nome livre.
+
+Uso: python recording.py gravacao.rec   (visualizador matplotlib com barra de tempo)
+"""
+import os
+import struct
+
+import numpy as np
+
+from nbody import THRUST_MODES
+
+MAGIC = b"TFCREC\x00\x01"
+VERSION = 1
+_HEAD = struct.Struct("<8sIII4x")   # magic, versão, corpos, dimensão
+NAME_BYTES = 16
+NO_MODE = 255
+
+
+def record_dtype(n_bodies, dim=2):
+    """Registro de tamanho fixo de um instante (sem alinhamento: 8 + 16·n·dim + 2 bytes)."""
+    return np.dtype([("t", "<f8"), ("pos", "<f8", (n_bodies, dim)), ("vel", "<f8", (n_bodies, dim)),
+                     ("thrust", "u1"), ("mode", "u1")])
+
+
+def _header_size(n_bodies):
+    return _HEAD.size + n_bodies * (8 + NAME_BYTES)
+
+
+def unique_path(path):
+    """`path` se ainda não existe; senão base-1.rec, base-2.rec, ... (o primeiro livre)."""
+    base, ext = os.path.splitext(path)
+    candidate, n = path, 0
+    while os.path.exists(candidate):
+        n += 1
+        candidate = f"{base}-{n}{ext}"
+    return candidate
+
+
+class Recorder:
+    """
+    Grava estados em `path`, `chunk` registros por escrita.
+
+    names são os nomes dos corpos (na ordem de pos/vel) e masses as massas
+    (kg), guardados no cabeçalho. Use como gerenciador de contexto ou chame
+    close() no fim: o bloco pendente só vai para o disco em flush()/close().
+    `path` não pode existir (FileExistsError; use unique_path()) e os tempos
+    passados a append() não podem diminuir (ValueError).
+    """
+
+    def __init__(self, path, names, masses, dim=2, chunk=4096):
+        self.path = path
+        self.n_bodies = len(names)
+        self.dtype = record_dtype(self.n_bodies, dim)
+        self._buf = np.zeros(chunk, dtype=self.dtype)
+        self._fill = 0
+        self.count = 0   # registros recebidos
+        self._last_t = -np.inf
+        self._file = open(path, "xb")
+        self._file.write(_HEAD.pack(MAGIC, VERSION, self.n_bodies, dim))
+        self._file.write(np.asarray(masses, dtype="<f8").tobytes())
+        for name in names:
+            self._file.write(name.encode("utf-8")[:NAME_BYTES].ljust(NAME_BYTES, b"\0"))
+
+    def append(self, t, pos, vel, thrust=False, mode=None):
+        """Um instante: pos e vel (n_corpos, dim); mode é um nome de nbody.THRUST_MODES ou None."""
+        if t < self._last_t:
+            raise ValueError(f"{self.path}: tempo {t} anterior ao último registro ({self._last_t})")
+        self._last_t = t
+        rec = self._buf[self._fill]
+        rec["t"] = t
+        rec["pos"] = pos
+        rec["vel"] = vel
+        rec["thrust"] = thrust
+        rec["mode"] = NO_MODE if mode is None else THRUST_MODES.index(mode)
+        self._fill += 1
+        self.count += 1
+        if self._fill == len(self._buf):
+            self.flush()
+
+    def flush(self):
+        if self._fill:
+            self._buf[:self._fill].tofile(self._file)
+            self._fill = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """Gravação .rec aberta só para leitura, com os registros mapeados em memória (`records`)."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, n_bodies, dim = _HEAD.unpack(f.read(_HEAD.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path}: não é uma gravação .rec")
+            if version != VERSION:
+                raise ValueError(f"{path}: versão {version} não suportada")
+            self.masses = np.frombuffer(f.read(8 * n_bodies), dtype="<f8").copy()
+            self.names = [f.read(NAME_BYTES).rstrip(b"\0").decode("utf-8") for _ in range(n_bodies)]
+        self.n_bodies, self.dim = n_bodies, dim
+        self.dtype = record_dtype(n_bodies, dim)
+        offset = _header_size(n_bodies)
+        count = (os.path.getsize(path) - offset) // self.dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def duration(self):
+        return (self.records[-1]["t"] - self.records[0]["t"]) if len(self) else 0.0
+
+    def index_at(self, t):
+        """Índice do último registro com tempo <= t (busca binária: só lê ~log2(n) registros)."""
+        lo, hi = 0, len(self.records)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.records[mid]["t"] <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return max(lo - 1, 0)
+
+    def state(self, i):
+        """(t, pos, vel, impulso ligado, modo ou None) do registro i; pos e vel são cópias."""
+        rec = self.records[i]
+        mode = int(rec["mode"])
+        return (float(rec["t"]), np.array(rec["pos"]), np.array(rec["vel"]), bool(rec["thrust"]),
+                None if mode == NO_MODE else THRUST_MODES[mode])
+
+    def path(self, body, start=0, stop=None, max_points=5000):
+        """Posições (k, dim) de `body` entre os registros start e stop, com passo para no máximo max_points."""
+        stop = len(self.records) if stop is None else stop
+        step = max(1, -(-(stop - start) // max_points))
+        return np.array(self.records["pos"][start:stop:step, body])
+
+
+def view(path):
+    """Visualizador matplotlib: trajetórias completas e uma barra para percorrer a gravação."""
+    import matplotlib.pyplot as plt
+    from matplotlib.widgets import Slider
+
+    rec = Recording(path)
+    if not len(rec):
+        print(path, "está vazio")
+        return
+    fig, ax = plt.subplots(figsize=(9, 9))
+    plt.subplots_adjust(bottom=0.15)
+    for b, name in enumerate(rec.names):
+        xy = rec.path(b)
+        ax.plot(xy[:, 0], xy[:, 1], lw=0.8, label=name)
+    ax.set_aspect("equal")
+    ax.legend(loc="upper right")
+    t0, pos0, _, _, _ = rec.state(0)
+    current = ax.scatter(pos0[:, 0], pos0[:, 1], color="black", s=20, zorder=3)
+    info = ax.text(0.02, 0.95, "", transform=ax.transAxes)
+
+    ax_slider = plt.axes([0.15, 0.05, 0.7, 0.03])
+    slider = Slider(ax_slider, "t (h)", t0 / 3600, (t0 + rec.duration) / 3600, valinit=t0 / 3600)
+
+    def seek(value):
+        t, pos, vel, thrust, mode = rec.state(rec.index_at(value * 3600))
+        current.set_offsets(pos[:, :2])
+        info.set_text(f"t = {t / 3600:.2f} h   impulso: {(mode or 'ligado') if thrust else 'desligado'}")
+        fig.canvas.draw_idle()
+
+    slider.on_changed(seek)
+    seek(t0 / 3600)
+    print(f"{path}: {len(rec)} registros, {rec.duration / 3600:.1f} h, corpos {', '.join(rec.names)}")
+    plt.show()
+
+
+if __name__ == "__main__":
+    import sys
+    view(sys.argv[1])
@@ -0,0 +1,250 @@
+"""
+Exportação de vídeo sem janela, com os quadros desenhados em paralelo.
+
+A trajetória é calculada uma vez só: lida de uma gravação .rec (de
+trab_fis_comp.py, tli.py ou projeto-backup.py com --record) ou integrada com
+headless.run_headless a partir de um roteiro de impulso. As posições são
+interpoladas nos instantes de cada quadro do vídeo e enviadas aos processos
+do pool, que desenham blocos de quadros consecutivos com o Matplotlib (Agg,
+sem janela) e devolvem os pixels RGB. O processo principal recebe os blocos
+em ordem (no máximo 2 por processo em andamento, para limitar a memória) e
+os entrega ao gravador: ffmpeg por um pipe (.mp4, .mkv, .webm, ...), Pillow
+(.gif) ou um PNG por quadro (saída sem extensão: diretório).
+
+Uso:
+    python render_video.py --recording voo.rec --seconds 600 --output voo.mp4
+    python render_video.py --schedule plano.json --duration 864000 --output plano.mp4
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from nbody import INTEGRATORS, initial_state
+from headless import run_headless, load_schedule, load_state
+from recording import Recording
+
+BODY_NAMES = ("Terra", "Lua", "Nave")     # ordem dos corpos de nbody (EARTH, MOON, SHIP)
+BODY_STYLES = {"Terra": ("tab:blue", 80), "Lua": ("tab:gray", 30), "Nave": ("tab:green", 12)}
+TRAIL_POINTS = 2000                       # pontos desenhados de cada rastro (os mais antigos são decimados)
+
+
+def mission_frames(t, pos, thrust, n_frames):
+    """
+    Interpola as amostras (t (k,), pos (k, corpos, dim), thrust (k,)) em
+    n_frames instantes igualmente espaçados. Devolve (tempos, posições x/y
+    (n_frames, corpos, 2), impulso ligado (n_frames,)).
+    """
+    times = np.linspace(t[0], t[-1], n_frames)
+    i = np.clip(np.searchsorted(t, times, side="right") - 1, 0, len(t) - 2) if len(t) > 1 else np.zeros(n_frames, int)
+    t_lo = np.asarray(t[i])
+    t_hi = np.asarray(t[np.minimum(i + 1, len(t) - 1)])
+    w = np.divide(times - t_lo, t_hi - t_lo, out=np.zeros(n_frames), where=t_hi > t_lo)[:, None, None]
+    lo = np.asarray(pos[i])[..., :2]
+    hi = np.asarray(pos[np.minimum(i + 1, len(t) - 1)])[..., :2]
+    return times, lo + w * (hi - lo), np.asarray(thrust[i], dtype=bool)
+
+
+def from_recording(path, n_frames):
+    """Quadros de uma gravação .rec: (nomes dos corpos, tempos, posições, impulso)."""
+    rec = Recording(path)
+    if len(rec) < 2:
+        raise ValueError(f"{path}: gravação vazia ou com um só registro")
+    records = rec.records
+    return (rec.names,) + mission_frames(records["t"], records["pos"], records["thrust"], n_frames)
+
+
+def from_schedule(schedule, duration, n_frames, dt=10.0, state=None, integrator="yoshida4"):
+    """Quadros de uma simulação headless (subpassos automáticos), amostrada ao menos uma vez por quadro."""
+    pos, vel, masses = load_state(state) if state else initial_state()
+    sample_every = max(1, int(duration / dt / n_frames))
+    samples = run_headless(pos, vel, masses, dt, duration, schedule, None, sample_every, integrator=integrator)
+    return (BODY_NAMES,) + mission_frames(samples["t"], samples["pos"], samples["thrust_on"], n_frames)
+
+
+# ----------------------------------------------------------------------------
+# Desenho nos processos do pool: a figura é montada uma vez por processo
+# ----------------------------------------------------------------------------
+_scene = None
+
+
+def _init_worker(names, times, positions, thrust, size, dpi):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    global _scene
+
+    fig = plt.figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi)
+    ax = fig.add_axes([0.14, 0.08, 0.82, 0.88])
+    # Limites fixos que contêm toda a missão, com a mesma escala nos dois eixos
+    lo, hi = positions.reshape(-1, 2).min(axis=0), positions.reshape(-1, 2).max(axis=0)
+    center, half = (lo + hi) / 2, 0.55 * max(hi - lo) or 1.0
+    ax.set_xlim(center[0] - half, center[0] + half)
+    ax.set_ylim(center[1] - half, center[1] + half)
+    ax.set_aspect("equal")
+    ax.set_xlabel("x (m)")
+    ax.set_ylabel("y (m)")
+    trails, dots = [], []
+    for name in names:
+        color, s = BODY_STYLES.get(name, ("black", 12))
+        trails.append(ax.plot([], [], color=color, lw=0.8, alpha=0.6)[0])
+        dots.append(ax.scatter([], [], color=color, s=s, label=name, zorder=3))
+    ax.legend(loc="upper right")
+    info = ax.text(0.02, 0.96, "", transform=ax.transAxes)
+    _scene = (fig, trails, dots, info, times, positions, thrust)
+
+
+def _render_chunk(bounds):
+    """Quadros start..stop-1 como bytes RGB concatenados."""
+    fig, trails, dots, info, times, positions, thrust = _scene
+    start, stop = bounds
+    out = []
+    for i in range(start, stop):
+        step = max(1, -(-(i + 1) // TRAIL_POINTS))
+        # O rastro termina sempre no quadro atual, mesmo quando decimado
+        trail = positions[i % step:i + 1:step]
+        for b, (line, dot) in enumerate(zip(trails, dots)):
+            line.set_data(trail[:, b, 0], trail[:, b, 1])
+            dot.set_offsets(positions[i, b])
+        info.set_text(f"t = {times[i] / 86400:.2f} dias   impulso: {'ligado' if thrust[i] else 'desligado'}")
+        fig.canvas.draw()
+        out.append(np.asarray(fig.canvas.buffer_rgba())[..., :3].tobytes())
+    return b"".join(out)
+
+
+# ----------------------------------------------------------------------------
+# Gravadores: recebem os quadros RGB em ordem
+# ----------------------------------------------------------------------------
+class _FFmpegWriter:
+    def __init__(self, path, size, fps):
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg não encontrado no PATH; use uma saída .gif ou um diretório de PNGs")
+        self._proc = subprocess.Popen(
+            [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+             "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-", "-pix_fmt", "yuv420p", path],
+            stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self._proc.stdin.write(frame)
+
+    def close(self):
+        self._proc.stdin.close()
+        if self._proc.wait() != 0:
+            raise RuntimeError("ffmpeg terminou com erro")
+
+
+class _GifWriter:
+    # O formato GIF do Pillow só grava com todos os quadros em memória: para vídeos curtos
+    def __init__(self, path, size, fps):
+        self.path, self.size, self.fps = path, size, fps
+        self._frames = []
+
+    def write(self, frame):
+        from PIL import Image
+        self._frames.append(Image.frombytes("RGB", self.size, frame).quantize(colors=64))
+
+    def close(self):
+        self._frames[0].save(self.path, save_all=True, append_images=self._frames[1:],
+                             duration=round(1000 / self.fps), loop=0)
+
+
+class _PngWriter:
+    def __init__(self, path, size, fps):
+        os.makedirs(path, exist_ok=True)
+        self.path, self.size = path, size
+        self.count = 0
+
+    def write(self, frame):
+        from PIL import Image
+        Image.frombytes("RGB", self.size, frame).save(os.path.join(self.path, f"{self.count:06d}.png"))
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+def open_writer(path, size, fps):
+    ext = os.path.splitext(path)[1].lower()
+    if not ext:
+        return _PngWriter(path, size, fps)
+    if ext == ".gif":
+        return _GifWriter(path, size, fps)
+    return _FFmpegWriter(path, size, fps)
+
+
+def render(frames, output, fps=30, size=(960, 960), dpi=100, chunk=30, workers=None):
+    """
+    Desenha os quadros (nomes, tempos, posições, impulso) e grava em `output`,
+    em blocos de `chunk` quadros em `workers` processos (None: todos os
+    núcleos; 1: no processo atual). Devolve o número de quadros gravados.
+    """
+    names, times, positions, thrust = frames
+    n = len(times)
+    jobs = [(start, min(start + chunk, n)) for start in range(0, n, chunk)]
+    init = (tuple(names), times, positions, thrust, size, dpi)
+    writer = open_writer(output, size, fps)
+    frame_bytes = size[0] * size[1] * 3
+    try:
+        def consume(data):
+            for k in range(0, len(data), frame_bytes):
+                writer.write(data[k:k + frame_bytes])
+
+        if workers == 1:
+            _init_worker(*init)
+            for job in jobs:
+                consume(_render_chunk(job))
+        else:
+            workers = workers or os.cpu_count()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init) as pool:
+                pending = deque()
+                for job in jobs:
+                    pending.append(pool.submit(_render_chunk, job))
+                    if len(pending) >= 2 * workers:
+                        consume(pending.popleft().result())
+                while pending:
+                    consume(pending.popleft().result())
+    finally:
+        writer.close()
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--recording", help="gravação .rec (--record de qualquer um dos simuladores)")
+    source.add_argument("--schedule", help="roteiro de impulso (.json ou .csv) simulado sem janela")
+    parser.add_argument("--duration", type=float, default=864000.0, help="tempo simulado com --schedule (s)")
+    parser.add_argument("--dt", type=float, default=10.0, help="passo da simulação com --schedule (s)")
+    parser.add_argument("--integrator", choices=list(INTEGRATORS), default="yoshida4")
+    parser.add_argument("--state", help="estado inicial (.npz) com --schedule; padrão: LEO de 7000 km")
+    parser.add_argument("--seconds", type=float, default=60.0, help="duração do vídeo (s)")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--size", type=int, nargs=2, default=(960, 960), metavar=("LARGURA", "ALTURA"),
+                        help="resolução (pares, para o ffmpeg)")
+    parser.add_argument("--chunk", type=int, default=30, help="quadros por bloco enviado a um processo")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("--output", default="missao.mp4", help=".mp4/.mkv/... (ffmpeg), .gif ou diretório de PNGs")
+    args = parser.parse_args()
+
+    n_frames = max(2, round(args.seconds * args.fps))
+    start = time.perf_counter()
+    if args.recording:
+        frames = from_recording(args.recording, n_frames)
+    else:
+        frames = from_schedule(load_schedule(args.schedule), args.duration, n_frames, args.dt, args.state,
+                               args.integrator)
+    prepared = time.perf_counter()
+    render(frames, args.output, args.fps, tuple(args.size), chunk=args.chunk, workers=args.workers)
+    elapsed = time.perf_counter() - prepared
+    print(f"Trajetória pronta em {prepared - start:.2f} s; {n_frames} quadros desenhados em {elapsed:.1f} s "
+          f"({n_frames / elapsed:.0f} quadros/s) e gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
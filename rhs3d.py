@@ -0,0 +1,158 @@
+"""
+Lado direito das EDOs do modelo 3D de projeto-backup.py (Nave, Terra e Lua).
+
+O estado tem 18 elementos: posições (x, y, z) da Nave, Terra e Lua em
+r[0:9] e as velocidades na mesma ordem em r[9:18]. into() escreve as
+derivadas num buffer já alocado, sem arrays temporários; se o Numba estiver
+instalado o laço é compilado, senão usa NumPy com buffers de trabalho fixos.
+jac() dá o jacobiano analítico, para métodos implícitos (Radau, BDF, LSODA).
+"""
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba é opcional
+    njit = None
+
+G = 6.67430e-11  # m^3/(kg*s^2)
+
+N_STATE = 18
+BACKENDS = ("numba", "numpy")
+
+
+def _rhs_loops(r, out, gm, thrust):
+    # Derivadas com laços explícitos: velocidades e gravidade par a par
+    for k in range(9):
+        out[k] = r[9 + k]
+        out[9 + k] = 0.0
+    for i in range(3):
+        for j in range(i + 1, 3):
+            dx = r[3*j] - r[3*i]
+            dy = r[3*j + 1] - r[3*i + 1]
+            dz = r[3*j + 2] - r[3*i + 2]
+            d2 = dx*dx + dy*dy + dz*dz
+            inv3 = 1.0 / (d2 * math.sqrt(d2))
+            wi = gm[j] * inv3
+            wj = gm[i] * inv3
+            out[9 + 3*i] += wi * dx
+            out[10 + 3*i] += wi * dy
+            out[11 + 3*i] += wi * dz
+            out[9 + 3*j] -= wj * dx
+            out[10 + 3*j] -= wj * dy
+            out[11 + 3*j] -= wj * dz
+    # Thrust na direção da velocidade da Nave
+    if thrust != 0.0:
+        nv = math.sqrt(r[9]*r[9] + r[10]*r[10] + r[11]*r[11])
+        if nv > 1e-10:
+            c = thrust / nv
+            out[9] += c * r[9]
+            out[10] += c * r[10]
+            out[11] += c * r[11]
+
+
+def _jac_loops(r, out, gm, thrust):
+    # Jacobiano 18x18: blocos identidade (d posição / d velocidade) e gradiente da gravidade
+    for a in range(N_STATE):
+        for b in range(N_STATE):
+            out[a, b] = 0.0
+    for k in range(9):
+        out[k, 9 + k] = 1.0
+    for i in range(3):
+        for j in range(i + 1, 3):
+            dx = r[3*j] - r[3*i]
+            dy = r[3*j + 1] - r[3*i + 1]
+            dz = r[3*j + 2] - r[3*i + 2]
+            d2 = dx*dx + dy*dy + dz*dz
+            inv3 = 1.0 / (d2 * math.sqrt(d2))
+            inv5 = 3.0 * inv3 / d2
+            for p in range(3):
+                dp = dx if p == 0 else (dy if p == 1 else dz)
+                for q in range(3):
+                    dq = dx if q == 0 else (dy if q == 1 else dz)
+                    # T = d/d(r_j) de (r_j - r_i)/|r_j - r_i|^3
+                    t = (inv3 if p == q else 0.0) - inv5 * dp * dq
+                    out[9 + 3*i + p, 3*j + q] += gm[j] * t
+                    out[9 + 3*i + p, 3*i + q] -= gm[j] * t
+                    out[9 + 3*j + p, 3*i + q] += gm[i] * t
+                    out[9 + 3*j + p, 3*j + q] -= gm[i] * t
+    if thrust != 0.0:
+        nv = math.sqrt(r[9]*r[9] + r[10]*r[10] + r[11]*r[11])
+        if nv > 1e-10:
+            c = thrust / nv
+            for p in range(3):
+                for q in range(3):
+                    out[9 + p, 9 + q] += c * ((1.0 if p == q else 0.0) - r[9 + p] * r[9 + q] / (nv * nv))
+
+
+if njit is not None:
+    _rhs_jit = njit(cache=True)(_rhs_loops)
+    _jac_jit = njit(cache=True)(_jac_loops)
+else:
+    _rhs_jit = _jac_jit = None
+
+
+class ThreeBodyRHS:
+    """
+    f(t, r) e jacobiano do problema Nave-Terra-Lua com thrust progressivo.
+
+    `thrust` é a aceleração (m/s², com sinal) aplicada na direção da
+    velocidade da Nave; pode ser alterado entre integrações. A instância é
+    chamável como `fun` do solve_ivp e `jac` serve como `jac` dos métodos
+    implícitos.
+    """
+
+    def __init__(self, m_ship, m_earth, m_moon, thrust=0.0, backend=None):
+        if backend is None:
+            backend = "numba" if njit is not None else "numpy"
+        if backend not in BACKENDS:
+            raise ValueError(f"backend desconhecido: {backend!r} (use {BACKENDS})")
+        if backend == "numba" and njit is None:
+            raise ValueError("backend 'numba' pedido, mas o Numba não está instalado")
+        self.backend = backend
+        self.thrust = thrust
+        self.gm = G * np.array([m_ship, m_earth, m_moon], dtype=float)
+        # Buffers de trabalho do caminho NumPy
+        self._diff = np.empty((3, 3, 3))
+        self._dist2 = np.empty((3, 3))
+        self._weights = np.empty((3, 3))
+
+    def into(self, r, out):
+        """Escreve dr/dt em `out` (18 elementos) sem alocar arrays; devolve `out`."""
+        if self.backend == "numba":
+            _rhs_jit(r, out, self.gm, float(self.thrust))
+            return out
+        x = r[:9].reshape(3, 3)
+        diff, dist2, weights = self._diff, self._dist2, self._weights
+        out[:9] = r[9:]
+        # diff[i, j] = x[j] - x[i]; diagonal com distância infinita (não contribui)
+        np.subtract(x[np.newaxis, :, :], x[:, np.newaxis, :], out=diff)
+        np.einsum('ijk,ijk->ij', diff, diff, out=dist2)
+        np.fill_diagonal(dist2, np.inf)
+        np.power(dist2, -1.5, out=weights)
+        weights *= self.gm
+        np.einsum('ij,ijk->ik', weights, diff, out=out[9:].reshape(3, 3))
+        if self.thrust != 0:
+            v = r[9:12]
+            nv = math.sqrt(v @ v)
+            if nv > 1e-10:
+                c = self.thrust / nv
+                out[9] += c * v[0]
+                out[10] += c * v[1]
+                out[11] += c * v[2]
+        return out
+
+    def __call__(self, t, r):
+        # O solve_ivp guarda referências às derivadas devolvidas (ex.: f0 ao
+        # escolher o primeiro passo), então cada chamada devolve um array novo.
+        return self.into(r, np.empty(N_STATE))
+
+    def jac_into(self, r, out):
+        """Escreve o jacobiano analítico d(dr/dt)/dr (18x18) em `out`; devolve `out`."""
+        kernel = _jac_jit if self.backend == "numba" else _jac_loops
+        kernel(np.asarray(r, dtype=float), out, self.gm, float(self.thrust))
+        return out
+
+    def jac(self, t, r):
+        return self.jac_into(r, np.empty((N_STATE, N_STATE)))
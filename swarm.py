@@ -0,0 +1,229 @@
+"""
+Enxame de sondas sem massa (N corpos restrito).
+
+Terra e Lua são integradas como corpos massivos e milhares de sondas sem
+massa são avançadas de uma vez contra elas, com arrays (M, 2): operações
+vetorizadas do NumPy ou, se o Numba estiver instalado, um laço compilado
+por sonda. Cada sonda tem sua flag de impulso e máscaras de colisão (com a
+Terra ou a Lua) e de escape; sondas que colidem ou escapam param de ser
+integradas.
+"""
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba é opcional
+    njit = None
+
+from nbody import G, EARTH, MOON, SHIP, R_EARTH, R_MOON, KICK, AUTO_ETA, MAX_SUBSTEPS, _COMPOSITIONS, \
+    accelerations, min_timescale
+
+ESCAPE_RADIUS = 2e9     # m da Terra (além da esfera de Hill, ~1,5e9 m)
+
+
+def _probe_kick(pos, vel, bodies_pos, gm, radii, thrust, alive, collided, hc):
+    # Kick das sondas ativas: gravidade dos corpos massivos mais impulso, v += a·hc
+    for i in range(pos.shape[0]):
+        if not alive[i]:
+            continue
+        ax = thrust[i, 0]
+        ay = thrust[i, 1]
+        for b in range(gm.shape[0]):
+            dx = bodies_pos[b, 0] - pos[i, 0]
+            dy = bodies_pos[b, 1] - pos[i, 1]
+            d2 = dx*dx + dy*dy
+            r2 = radii[b] * radii[b]
+            if d2 < r2:
+                collided[i] = True
+                d2 = r2
+            w = gm[b] / (d2 * math.sqrt(d2))
+            ax += w * dx
+            ay += w * dy
+        vel[i, 0] += ax * hc
+        vel[i, 1] += ay * hc
+
+
+def _probe_drift(pos, vel, hc):
+    for i in range(pos.shape[0]):
+        pos[i, 0] += vel[i, 0] * hc
+        pos[i, 1] += vel[i, 1] * hc
+
+
+def _probe_min_dist2(pos, bodies_pos, alive, out):
+    # Menor distância ao quadrado de uma sonda ativa a cada corpo massivo, em `out`
+    for b in range(bodies_pos.shape[0]):
+        out[b] = math.inf
+    for i in range(pos.shape[0]):
+        if alive[i]:
+            for b in range(bodies_pos.shape[0]):
+                dx = bodies_pos[b, 0] - pos[i, 0]
+                dy = bodies_pos[b, 1] - pos[i, 1]
+                out[b] = min(out[b], dx*dx + dy*dy)
+
+
+if njit is not None:
+    _probe_kick_jit = njit(cache=True, nogil=True)(_probe_kick)
+    _probe_drift_jit = njit(cache=True, nogil=True)(_probe_drift)
+    _probe_min_dist2_jit = njit(cache=True, nogil=True)(_probe_min_dist2)
+else:
+    _probe_kick_jit = _probe_drift_jit = _probe_min_dist2_jit = None
+
+
+class Swarm:
+    """
+    Corpos massivos (Terra e Lua) e sondas sem massa.
+
+    bodies_pos/bodies_vel (2, 2) e bodies_masses (2,) seguem a ordem
+    EARTH, MOON; pos/vel (M, 2) são das sondas. thrust (M,) diz quais sondas
+    obedecem ao impulso; collided e escaped (M,) são as máscaras de perda e
+    stopped (M,) marca sondas encerradas por quem usa o enxame.
+    """
+
+    def __init__(self, bodies_pos, bodies_vel, bodies_masses, pos, vel, thrust=None):
+        self.bodies_pos = np.array(bodies_pos, dtype=float)
+        self.bodies_vel = np.array(bodies_vel, dtype=float)
+        self.bodies_masses = np.array(bodies_masses, dtype=float)
+        self.pos = np.array(pos, dtype=float)
+        self.vel = np.array(vel, dtype=float)
+        n = len(self.pos)
+        self.thrust = np.ones(n, dtype=bool) if thrust is None else np.array(thrust, dtype=bool)
+        self.collided = np.zeros(n, dtype=bool)
+        self.escaped = np.zeros(n, dtype=bool)
+        self.stopped = np.zeros(n, dtype=bool)
+        self.radii = np.array([R_EARTH, R_MOON])
+        # Buffers de trabalho, reaproveitados a cada subpasso
+        self._acc = np.empty_like(self.pos)
+        self._diff = np.empty_like(self.pos)
+        self._dist2 = np.empty(n)
+        self._tmp = np.empty(n)
+
+    def __len__(self):
+        return len(self.pos)
+
+    @property
+    def alive(self):
+        return ~(self.collided | self.escaped | self.stopped)
+
+    def _probe_accelerations(self, thrust, alive):
+        # Gravidade da Terra e da Lua sobre as sondas (mais o impulso), em self._acc
+        acc, diff, dist2, tmp = self._acc, self._diff, self._dist2, self._tmp
+        acc.fill(0.0)
+        for b in range(len(self.bodies_masses)):
+            np.subtract(self.bodies_pos[b], self.pos, out=diff)
+            np.einsum('ij,ij->i', diff, diff, out=dist2)
+            self.collided |= alive & (dist2 < self.radii[b]**2)
+            # Limita a distância ao raio do corpo: sondas perdidas não geram infinitos
+            np.maximum(dist2, self.radii[b]**2, out=dist2)
+            np.sqrt(dist2, out=tmp)
+            tmp *= dist2
+            np.divide(G * self.bodies_masses[b], tmp, out=tmp)
+            diff *= tmp[:, np.newaxis]
+            acc += diff
+        if thrust is not None:
+            acc += thrust
+        acc *= alive[:, np.newaxis]
+        return acc
+
+    def _timescale(self, alive):
+        # Menor escala de tempo: corpos massivos entre si e queda livre das sondas
+        tau = min_timescale(self.bodies_pos, self.bodies_vel, self.bodies_masses)
+        if not alive.any():
+            return tau
+        d2 = np.empty(len(self.bodies_masses))
+        if _probe_min_dist2_jit is not None:
+            _probe_min_dist2_jit(self.pos, self.bodies_pos, alive, d2)
+        else:
+            for b in range(len(d2)):
+                diff = self.pos[alive] - self.bodies_pos[b]
+                d2[b] = np.einsum('ij,ij->i', diff, diff).min()
+        return min(tau, math.sqrt((d2 * np.sqrt(d2) / (G * self.bodies_masses)).min()))
+
+    def thrust_directions(self, thrust_mode):
+        """Vetores unitários (M, 2) do impulso de cada sonda, como nbody.thrust_direction()."""
+        if thrust_mode in ("Radial", "Anti Radial"):
+            d = self.pos - self.bodies_pos[0]
+            if thrust_mode == "Anti Radial":
+                d = -d
+        else:
+            d = self.vel
+            if thrust_mode == "Retrógrado":
+                d = -d
+        norm = np.sqrt(np.einsum('ij,ij->i', d, d))
+        return d / np.maximum(norm, 1e-300)[:, np.newaxis]
+
+    def step(self, h, ops, thrust, alive):
+        """
+        Um subpasso de h (s) com a composição de kicks e drifts `ops`; `thrust`
+        é a aceleração extra (M, 2) das sondas, ou None.
+        """
+        if _probe_kick_jit is not None:
+            if thrust is None:
+                thrust = np.zeros_like(self.pos)
+            gm = G * self.bodies_masses
+            for kind, coef in ops:
+                if kind == KICK:
+                    self.bodies_vel += accelerations(self.bodies_pos, self.bodies_masses) * (coef * h)
+                    _probe_kick_jit(self.pos, self.vel, self.bodies_pos, gm, self.radii, thrust, alive,
+                                    self.collided, coef * h)
+                else:
+                    self.bodies_pos += self.bodies_vel * (coef * h)
+                    _probe_drift_jit(self.pos, self.vel, coef * h)
+            return
+        acc_bodies = None
+        acc_probes = None
+        for kind, coef in ops:
+            if kind == KICK:
+                if acc_bodies is None:
+                    acc_bodies = accelerations(self.bodies_pos, self.bodies_masses)
+                    acc_probes = self._probe_accelerations(thrust, alive)
+                self.bodies_vel += acc_bodies * (coef * h)
+                self.vel += acc_probes * (coef * h)
+            else:
+                self.bodies_pos += self.bodies_vel * (coef * h)
+                self.pos += self.vel * (coef * h)
+                acc_bodies = None
+
+    def advance(self, dt, n_steps=1, substeps=1, thrust_mode=None, thrust_const=1.0, eta=AUTO_ETA,
+                integrator="euler"):
+        """
+        Avança n_steps passos de dt (s), como nbody.advance(): a direção do
+        impulso de cada sonda (`thrust_mode`, ou None) é recalculada a cada
+        subpasso e substeps=None escolhe, no início de cada passo, subpassos
+        iguais pela menor escala de tempo (sem a estimativa de erro de
+        nbody.advance(), cara demais para o enxame inteiro).
+        Só integradores simpléticos: "rk4" usa o Yoshida de 4ª ordem.
+        Devolve o número de subpassos integrados.
+        """
+        ops = _COMPOSITIONS["yoshida4" if integrator == "rk4" else integrator]
+        count = 0
+        for _ in range(n_steps):
+            alive = self.alive
+            self.vel[~alive] = 0.0   # sondas perdidas ou encerradas ficam paradas
+            m = substeps
+            if m is None:
+                # Subpasso constante dentro do passo, para não quebrar o caráter simplético
+                m = max(1, min(math.ceil(dt / max(eta * self._timescale(alive), 1e-300)), MAX_SUBSTEPS))
+            thrust = None
+            for _ in range(m):
+                if thrust_mode is not None:
+                    thrust = thrust_const * self.thrust_directions(thrust_mode) * self.thrust[:, np.newaxis]
+                self.step(dt / m, ops, thrust, alive)
+            count += m
+            diff = self.pos - self.bodies_pos[0]
+            self.escaped |= alive & (np.einsum('ij,ij->i', diff, diff) > ESCAPE_RADIUS**2)
+        return count
+
+
+def launch_campaign(pos, vel, masses, n_probes, sigma_pos=1e3, sigma_vel=1.0, seed=0, body=SHIP):
+    """
+    Enxame com n_probes sondas espalhadas em torno do estado de `body`
+    (desvios gaussianos sigma_pos em m e sigma_vel em m/s), com a Terra e a
+    Lua do estado (pos, vel, masses) de nbody como corpos massivos.
+    """
+    rng = np.random.default_rng(seed)
+    probes_pos = pos[body] + rng.normal(0.0, sigma_pos, (n_probes, 2))
+    probes_vel = vel[body] + rng.normal(0.0, sigma_vel, (n_probes, 2))
+    bodies = [EARTH, MOON]
+    return Swarm(pos[bodies], vel[bodies], masses[bodies], probes_pos, probes_vel)
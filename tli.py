@@ -1,9 +1,14 @@
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.animation as animation
-from scipy.integrate import solve_ivp
 from matplotlib.widgets import Button
 
+from kepler import propagate, time_to_apoapsis, time_to_radius
+from history import AnimatedTrail
+from recording import Recorder, unique_path
+
 # Constantes e parâmetros
 G = 6.67430e-11         # m^3/(kg*s^2)
 mTerra = 5.9723e24      # kg
@@ -26,9 +31,13 @@ state = np.array([r1, 0, 0, v_circ1])  # Estado inicial: [x, y, vx, vy]
 t_current = 0
 dt_base = 10  # passo de tempo (s)
 
-# Listas para armazenar a trajetória da nave
-traj_x = []
-traj_y = []
+# Gravação opcional da execução (python tli.py --record arquivo.rec), reproduzível com
+# python recording.py arquivo.rec; o impulso fica marcado no quadro de cada queima
+RECORD_FILE = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None
+recorder = Recorder(unique_path(RECORD_FILE), ("Terra", "Nave"), (mTerra, 0.0)) if RECORD_FILE else None
+if recorder is not None:
+    print("Gravando em", recorder.path)
+recorded_stage = 0
 
 # ----------------------------------------------------------------------------
 # Configuração da figura e elementos gráficos
@@ -57,56 +66,93 @@ ax.plot(orbit_lunar_x, orbit_lunar_y, 'r--', label='Órbita Lunar')
 
 # Elementos gráficos para a nave e sua trajetória
 scat_ship = ax.scatter([], [], color='green', s=20, label='Nave')
-line_traj, = ax.plot([], [], 'k-', lw=1, label='Trajetória')
+# Trajetória: cauda viva curta e histórico congelado e decimado (custo por quadro constante)
+traj = AnimatedTrail(ax, 'k-', lw=1, label='Trajetória')
+line_preview, = ax.plot([], [], 'g:', lw=1, label='Prévia da transferência')
 
 # Texto para indicar o estágio da transferência
 burn_text = ax.text(0.02, 0.95, 'Burn Stage: 0', transform=ax.transAxes,
                     fontsize=12, color='black')
 
 # ----------------------------------------------------------------------------
-# Equações do movimento: corpo pontual sob a gravidade da Terra
+# Movimento: corpo pontual sob a gravidade da Terra (problema de dois corpos).
+# Cada trecho de costa é resolvido analiticamente (kepler.propagate) a partir
+# do estado logo após a última queima; as queimas ocorrem no instante exato
+# do apogeu ou do cruzamento de r2, calculado em forma fechada.
 # ----------------------------------------------------------------------------
-def dynamics(t, y):
-    x, y_pos, vx, vy = y
-    r = np.sqrt(x**2 + y_pos**2)
-    # Acelerações (direcionadas para o centro da Terra)
-    ax_acc = -mu * x / r**3
-    ay_acc = -mu * y_pos / r**3
-    return [vx, vy, ax_acc, ay_acc]
+arc_t0 = t_current       # início do arco de costa atual
+arc_y0 = state.copy()    # estado no início do arco
+arc_t_end = np.inf       # fim do arco (segunda queima), infinito se não houver
+
+def start_arc(t0, y0):
+    global arc_t0, arc_y0, arc_t_end
+    arc_t0 = t0
+    arc_y0 = np.array(y0, dtype=float)
+    arc_t_end = np.inf
+    if burn_stage == 1:
+        # Na transferência, o arco termina no apogeu ou ao cruzar r2 (o que vier antes)
+        t_event = min(time_to_apoapsis(arc_y0[:2], arc_y0[2:], mu),
+                      time_to_radius(arc_y0[:2], arc_y0[2:], r2, mu))
+        arc_t_end = t0 + float(t_event)
+
+def arc_state(t):
+    r, v = propagate(arc_y0[:2], arc_y0[2:], t - arc_t0, mu)
+    return np.concatenate([r, v])
+
+def tangential_burn(y, delta_v):
+    # Impulso na direção tangencial: vetor tangente = (-y, x)/r
+    y = y.copy()
+    r = np.sqrt(y[0]**2 + y[1]**2)
+    tangent = np.array([-y[1], y[0]]) / r
+    y[2] += delta_v * tangent[0]
+    y[3] += delta_v * tangent[1]
+    return y
+
+# Prévia da transferência: o arco que resultaria da primeira queima agora
+t_transfer = np.pi * np.sqrt(((r1 + r2) / 2)**3 / mu)
+preview_times = np.linspace(0, t_transfer, 2000)
+
+def transfer_preview(y):
+    y_burn = tangential_burn(y, delta_v1)
+    r, _ = propagate(y_burn[:2], y_burn[2:], preview_times, mu)
+    # Verificação da distância lunar: raio previsto no apogeu
+    r_apo, _ = propagate(y_burn[:2], y_burn[2:], time_to_apoapsis(y_burn[:2], y_burn[2:], mu), mu)
+    return r, np.linalg.norm(r_apo)
 
 # ----------------------------------------------------------------------------
 # Função de atualização da animação
 # ----------------------------------------------------------------------------
 def update(frame):
-    global state, t_current, burn_stage
-
-    dt_eff = dt_base  # passo de integração
-    sol = solve_ivp(dynamics, [t_current, t_current + dt_eff], state,
-                    rtol=1e-9, atol=1e-12)
-    state = sol.y[:, -1]
-    t_current += dt_eff
-
-    # Armazena a posição para traçar a trajetória
-    traj_x.append(state[0])
-    traj_y.append(state[1])
-
-    # Calcula a distância atual da nave em relação à Terra
-    r = np.sqrt(state[0]**2 + state[1]**2)
-    # Se já foi aplicada a primeira queima e a nave se aproxima do apogeu (próximo a r2)
-    if burn_stage == 1 and abs(r - r2) < 50e3:  # tolerância de 50 km
-        # Aplica a segunda queima para circularizar (ou melhor, para ajustar a velocidade)
-        # O impulso é aplicado na direção tangencial: vetor tangente = (-y, x)/r
-        tangent = np.array([-state[1], state[0]]) / r
-        state[2] += delta_v2 * tangent[0]
-        state[3] += delta_v2 * tangent[1]
+    global state, t_current, burn_stage, recorded_stage
+
+    t_current += dt_base
+
+    # Segunda queima no instante exato do evento, se ele caiu dentro deste quadro
+    if t_current > arc_t_end:
+        t_burn = arc_t_end
+        y_burn = tangential_burn(arc_state(t_burn), delta_v2)
         burn_stage = 2
-        print("Segunda queima realizada: inserção na órbita lunar (simulada).")
+        start_arc(t_burn, y_burn)
+        print(f"Segunda queima realizada em t = {t_burn:.1f} s, r = {np.hypot(y_burn[0], y_burn[1])/1e3:.1f} km: "
+              "inserção na órbita lunar (simulada).")
+    state = arc_state(t_current)
+    if recorder is not None:
+        recorder.append(t_current, [[0.0, 0.0], state[:2]], [[0.0, 0.0], state[2:]],
+                        burn_stage != recorded_stage, "Progressiva" if burn_stage != recorded_stage else None)
+        recorded_stage = burn_stage
 
     # Atualiza os elementos gráficos
     scat_ship.set_offsets([state[0], state[1]])
-    line_traj.set_data(traj_x, traj_y)
-    burn_text.set_text(f'Burn Stage: {burn_stage}')
-    return scat_ship, line_traj, burn_text
+    traj.append(state[0], state[1])
+    if burn_stage == 0:
+        # Prévia da transferência se a queima fosse feita agora
+        r_preview, r_apo = transfer_preview(state)
+        line_preview.set_data(r_preview[:, 0], r_preview[:, 1])
+        burn_text.set_text(f'Burn Stage: 0 (apogeu previsto: {r_apo/1e3:.0f} km)')
+    else:
+        line_preview.set_data([], [])
+        burn_text.set_text(f'Burn Stage: {burn_stage}')
+    return (scat_ship, *traj.artists, line_preview, burn_text)
 
 ani = animation.FuncAnimation(fig, update, frames=range(1000), interval=30, blit=True)
 
@@ -121,14 +167,14 @@ def initiate_transfer(event):
     if burn_stage == 0:
         # Aplica a primeira queima (delta_v1) na direção tangencial.
         # Em órbita circular, a direção tangencial pode ser obtida por (-y, x)/r.
-        r = np.sqrt(state[0]**2 + state[1]**2)
-        tangent = np.array([-state[1], state[0]]) / r
-        state[2] += delta_v1 * tangent[0]
-        state[3] += delta_v1 * tangent[1]
+        state = tangential_burn(state, delta_v1)
         burn_stage = 1
+        start_arc(t_current, state)
         print("Primeira queima realizada: transferência iniciada.")
 
 button_transfer.on_clicked(initiate_transfer)
 
 ax.legend()
 plt.show()
+if recorder is not None:
+    recorder.close()
@@ -1,6 +1,20 @@
+import argparse
+import time
+from collections import deque
+
 import pygame
 import numpy as np
-import math
+
+from nbody import EARTH, MOON, SHIP, MOON_SOI, INTEGRATORS, Trace, initial_state
+from prediction import AsyncPredictor
+from history import TrajectoryHistory, ScreenTrail, to_screen
+from recording import Recorder, Recording, unique_path
+from checkpoints import Controls, KeyframeStore
+from swarm import launch_campaign
+from headless import load_schedule
+from events import EVENT_LABELS, detect_events
+from frame_profiler import FrameProfiler
+from hud import ButtonPanel, TextLines
 
 # Inicializa o Pygame
 pygame.init()
@@ -16,15 +30,13 @@ RED    = (255, 0, 0)       # Nave
 BLACK  = (0, 0, 0)
 GREEN  = (0, 255, 0)       # Botões selecionados
 PURPLE = (128, 0, 128)     # Trajetória futura
+LIGHT_PURPLE = (200, 160, 200)  # Trajetória futura desatualizada (recalculando)
+ORANGE = (255, 140, 0)     # Enxame de sondas
+TEAL   = (0, 150, 150)     # Prévia longa e esfera de influência da Lua
 
 # Fonte para textos
 font = pygame.font.SysFont(None, 24)
-
-# --- CONSTANTES FÍSICAS ---
-G = 6.67430e-11    # m³/(kg·s²)
-mEarth = 5.9723e24
-mMoon  = 7.349e22
-mShip  = 8000
+small_font = pygame.font.SysFont(None, 18)
 
 # --- PARÂMETROS DO IMPULSO ---
 thrust_const = 1.0
@@ -40,9 +52,9 @@ button_options = [
     {"label": "Anti Radial",  "rect": pygame.Rect(20, 320, 150, 30)}
 ]
 
-# Botão para fator de tempo: cicla entre 1x, 10x e 50x
+# Botão para fator de tempo: cicla de 1x a 10000x (teclas +/- sobem e descem)
 time_button = {"label": "Tempo", "rect": pygame.Rect(20, 360, 150, 30)}
-time_factors = [1, 10, 50]
+time_factors = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
 time_factor_index = 0
 time_factor = time_factors[time_factor_index]
 
@@ -50,32 +62,152 @@ time_factor = time_factors[time_factor_index]
 future_button = {"label": "Traj. Futura", "rect": pygame.Rect(20, 400, 150, 30)}
 show_future_trajectory = False
 
+# Integrador numérico (opções em nbody.INTEGRATORS): o botão cicla entre eles. O padrão é o Verlet:
+# simplético de 2ª ordem, mantém a órbita estável com subpassos automáticos a 1000x
+INTEGRATOR = "verlet"
+integrator_button = {"label": "Integrador", "rect": pygame.Rect(20, 440, 150, 30)}
+integrator_names = list(INTEGRATORS)
+integrator = INTEGRATOR
+
+# Número máximo de pontos guardados no rastro de cada corpo
+HISTORY_LENGTH = 20000
+
+# Enxame de sondas sem massa (tecla S): dispersão em torno do estado da nave
+SWARM_SIZE = 10000
+SWARM_SIGMA_POS = 1e3    # m
+SWARM_SIGMA_VEL = 10.0   # m/s
+swarm = None
+# Superfície do enxame: todas as sondas são desenhadas nela e coladas com um único blit
+swarm_surface = pygame.Surface((width, height), 0, 32)
+swarm_surface.set_colorkey(WHITE)
+
+# Linha de comando: roteiro de impulso opcional (ex.: gerado por burn_optimizer.py, tempos
+# contados desde o reset), gravação da execução e reprodução de uma gravação
+parser = argparse.ArgumentParser(description="Simulação Terra, Nave e Lua")
+parser.add_argument("schedule", nargs="?", help="roteiro de impulso (.json ou .csv)")
+parser.add_argument("--record", help="grava a execução desde o início neste arquivo .rec")
+parser.add_argument("--replay", help="reproduz uma gravação .rec em vez de integrar")
+args = parser.parse_args()
+if args.record and args.replay:
+    parser.error("--record e --replay não podem ser usados juntos")
+SCHEDULE_FILE = args.schedule
+schedule = load_schedule(SCHEDULE_FILE) if SCHEDULE_FILE else []
+schedule_index = 0   # próximo evento do roteiro
+sim_time = 0.0       # tempo simulado desde o último reset (s)
+
+# Gravação (tecla G liga/desliga) e reprodução com busca instantânea (setas, Home/End).
+# Cada gravação vai para um arquivo novo (gravacao.rec, gravacao-1.rec, ...); depois de um
+# reset ou de voltar no tempo a gravação continua num arquivo novo, com o tempo crescente.
+RECORD_FILE = args.record or "gravacao.rec"
+BODY_NAMES = ("Terra", "Lua", "Nave")   # ordem EARTH, MOON, SHIP
+REPLAY_SEEK = 0.05          # fração da gravação por toque nas setas
+REPLAY_TRAIL_POINTS = 2000  # pontos do rastro reconstruído após uma busca
+recorder = None
+replay = Recording(args.replay) if args.replay else None
+replay_time = 0.0
+
+# Quadros-chave para voltar no tempo (Backspace) e checkpoints em disco (F5 salva, F9 carrega)
+REWIND_FRAMES = 300                 # quadros voltados por toque, no fator de tempo atual
+CHECKPOINT_FILE = "checkpoints.npz"
+
+# Prévia longa (tecla P): guia de vários dias sem impulso, integrado com N corpos numa thread
+# de fundo (Yoshida 4 com subpassos automáticos: num estado translunar erra ~0 km em ~10 ms,
+# contra 40000-90000 km das cônicas ligadas de patched_conic.py). Pedido de novo só quando
+# o impulso muda, a cada GUIDE_REFRESH quadros com impulso ligado ou após meio horizonte
+GUIDE_DAYS = 10
+GUIDE_DT = 600.0     # s entre pontos do guia
+GUIDE_REFRESH = 30
+GUIDE_INTEGRATOR = "yoshida4"
+show_guide = False
+guide = None         # (tempo simulado do pedido, impulso ligado no pedido)
+guide_age = 0        # quadros desde o último pedido
+
+# HUD em cache: linhas de texto só são renderizadas de novo quando mudam e os botões
+# formam um painel refeito só quando um rótulo ou destaque muda
+instruction_lines = TextLines(font, BLACK, (20, 20), 25)
+status_lines = TextLines(font, BLACK, (20, 490), 25)
+button_panel = ButtonPanel([button["rect"] for button in button_options]
+                           + [time_button["rect"], future_button["rect"], integrator_button["rect"]],
+                           font, BLACK, GREEN, WHITE)
+
+# Perfil por quadro (F3: sobreposição com médias e p99; F4: grava cada quadro em CSV)
+PROFILE_CSV = "tempos_quadro.csv"
+PROFILE_REFRESH = 30   # quadros entre atualizações do texto da sobreposição
+profiler = FrameProfiler(("eventos", "física", "previsão", "desenho", "HUD", "flip/espera"))
+profile_surface = None
+
+# Marcadores de eventos orbitais (events.py): rótulos renderizados uma única vez
+EVENT_MARKERS = 20   # eventos já ocorridos mantidos na tela
+EVENT_PRINTS = 3     # eventos impressos por quadro (os demais só são contados)
+# Estados intermediários do passo de cada quadro: em fatores de tempo altos um quadro
+# cobre várias órbitas, e os eventos são procurados entre essas amostras
+event_trace = Trace(len(BODY_NAMES))
+EVENT_TAGS = {"periapsis": "Pe", "apoapsis": "Ap", "soi_entry": "SOI+", "soi_exit": "SOI-",
+              "impact_earth": "Impacto", "impact_moon": "Impacto", "closest_moon": "Min"}
+event_labels = {color: {kind: small_font.render(tag, True, color) for kind, tag in EVENT_TAGS.items()}
+                for color in (RED, PURPLE)}
+
+def draw_event_marker(kind, position, color):
+    x, y = (center + position * scale).astype(int)
+    pygame.draw.circle(screen, color, (x, y), 6, 1)
+    screen.blit(event_labels[color][kind], (x + 8, y - 8))
+
+def format_duration(seconds):
+    if seconds < 3600:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds / 3600:.1f} h"
+
 # --- FUNÇÃO DE RESET DA SIMULAÇÃO ---
 def reset_simulation():
-    global r_earth, v_earth, r_ship, v_ship, r_moon, v_moon
+    global pos, vel, masses, r_earth, v_earth, r_ship, v_ship, r_moon, v_moon
+    global trail_ship, trail_earth, trail_moon
     global traj_ship, traj_earth, traj_moon, thrust_mode, time_factor, time_factor_index, show_future_trajectory
-    # Terra fixa no centro
-    r_earth = np.array([0.0, 0.0])
-    v_earth = np.array([0.0, 0.0])
-    # Nave em órbita baixa (LEO) com raio 7000 km
-    rOrbit = 7000e3
-    vOrbit = np.sqrt(G * mEarth / rOrbit)
-    r_ship = np.array([rOrbit, 0.0])
-    v_ship = np.array([0.0, vOrbit])
-    # Lua: posição média (~384400 km da Terra) e velocidade aproximada
-    r_moon = np.array([384400e3, 0.0])
-    v_moon = np.array([0.0, 1022.0])
-    traj_ship = []
-    traj_earth = []
-    traj_moon = []
+    global swarm, schedule_index, sim_time, past_events, show_guide, guide, checkpoints
+    # Estado em arrays (N, 2): Terra fixa no centro, Lua a ~384400 km e Nave em LEO
+    pos, vel, masses = initial_state()
+    # Visões de cada corpo (compartilham memória com pos/vel)
+    r_earth, r_moon, r_ship = pos[EARTH], pos[MOON], pos[SHIP]
+    v_earth, v_moon, v_ship = vel[EARTH], vel[MOON], vel[SHIP]
+    traj_ship = TrajectoryHistory(HISTORY_LENGTH)
+    traj_earth = TrajectoryHistory(HISTORY_LENGTH)
+    traj_moon = TrajectoryHistory(HISTORY_LENGTH)
+    # Rastros em pixels, simplificados e com cache (só pontos novos são convertidos)
+    trail_ship = ScreenTrail(traj_ship)
+    trail_earth = ScreenTrail(traj_earth)
+    trail_moon = ScreenTrail(traj_moon)
     thrust_mode = "Progressiva"
     time_factor_index = 0
     time_factor = time_factors[time_factor_index]
     show_future_trajectory = False
+    swarm = None
+    schedule_index = 0
+    sim_time = 0.0
+    past_events = deque(maxlen=EVENT_MARKERS)
+    show_guide = False
+    guide = None
+    checkpoints = KeyframeStore(masses, thrust_const)
     return traj_ship, traj_earth, traj_moon, thrust_mode, time_factor, time_factor_index, show_future_trajectory
 
 traj_ship, traj_earth, traj_moon, thrust_mode, time_factor, time_factor_index, show_future_trajectory = reset_simulation()
 
+def replay_seek(t):
+    # Vai para o instante t da gravação e refaz os rastros com os registros anteriores
+    global replay_time, traj_ship, traj_earth, traj_moon, trail_ship, trail_earth, trail_moon, guide
+    start_time = replay.records[0]["t"]
+    replay_time = min(max(t, start_time), start_time + replay.duration)
+    i = replay.index_at(replay_time)
+    _, pos[:], vel[:], _, _ = replay.state(i)
+    histories = []
+    for body in (SHIP, EARTH, MOON):
+        history = TrajectoryHistory(HISTORY_LENGTH)
+        for point in replay.path(body, max(0, i + 1 - HISTORY_LENGTH), i + 1, REPLAY_TRAIL_POINTS):
+            history.append(point)
+        histories.append(history)
+    traj_ship, traj_earth, traj_moon = histories
+    trail_ship, trail_earth, trail_moon = (ScreenTrail(history) for history in histories)
+    guide = None
+    future_predictor.invalidate()
+
 # --- CONTROLE DO TEMPO ---
 dt = 10  # passo de tempo base (s)
 
@@ -87,46 +219,65 @@ clock = pygame.time.Clock()
 running = True
 thrust_on = False
 
-# Função para computar a trajetória futura com subdivisão de passos
-def compute_future_trajectory(r_ship, v_ship, r_earth, v_earth, r_moon, v_moon, dt_eff, steps=500, skip=1, substeps=1):
-    future_positions = []
-    # Cópias locais dos estados
-    local_r_ship = r_ship.copy()
-    local_v_ship = v_ship.copy()
-    local_r_earth = r_earth.copy()
-    local_v_earth = v_earth.copy()
-    local_r_moon  = r_moon.copy()
-    local_v_moon  = v_moon.copy()
-    
-    dt_sub = dt_eff / substeps
-    for i in range(steps):
-        for _ in range(substeps):
-            diff_earth = local_r_earth - local_r_ship
-            diff_moon  = local_r_moon - local_r_ship
-            a_ship = (G * mEarth * diff_earth / np.linalg.norm(diff_earth)**3 +
-                      G * mMoon  * diff_moon  / np.linalg.norm(diff_moon)**3)
-            local_v_ship += a_ship * dt_sub
-            local_r_ship += local_v_ship * dt_sub
-
-            diff_ship_earth = local_r_ship - local_r_earth
-            diff_moon_earth = local_r_moon - local_r_earth
-            a_earth = (G * mShip * diff_ship_earth / np.linalg.norm(diff_ship_earth)**3 +
-                       G * mMoon * diff_moon_earth / np.linalg.norm(diff_moon_earth)**3)
-            local_v_earth += a_earth * dt_sub
-            local_r_earth += local_v_earth * dt_sub
-
-            diff_ship_moon = local_r_ship - local_r_moon
-            diff_earth_moon = local_r_earth - local_r_moon
-            a_moon = (G * mShip * diff_ship_moon / np.linalg.norm(diff_ship_moon)**3 +
-                      G * mEarth * diff_earth_moon / np.linalg.norm(diff_earth_moon)**3)
-            local_v_moon += a_moon * dt_sub
-            local_r_moon += local_v_moon * dt_sub
-        
-        if i % skip == 0:
-            future_positions.append(local_r_ship.copy())
-    return future_positions
+# Trajetória futura calculada numa thread de fundo (com cache incremental)
+future_predictor = AsyncPredictor(steps=500, max_events=EVENT_MARKERS)
+guide_predictor = AsyncPredictor(steps=int(GUIDE_DAYS * 86400 / GUIDE_DT), max_events=0)
+
+def start_recording():
+    global recorder
+    recorder = Recorder(unique_path(RECORD_FILE), BODY_NAMES, masses)
+    print("Gravando em", recorder.path)
+
+def stop_recording():
+    global recorder
+    recorder.close()
+    print(f"Gravação encerrada: {recorder.count} registros em {recorder.path}")
+    recorder = None
+
+def restart_recording():
+    # O tempo simulado voltou (reset ou rebobinamento): a gravação atual termina aqui
+    if recorder is not None:
+        stop_recording()
+        start_recording()
+
+if args.record:
+    start_recording()
+if replay is not None:
+    if not len(replay):
+        raise SystemExit(f"{args.replay}: gravação vazia")
+    replay_seek(replay.records[0]["t"])
+    print(f"Reproduzindo {args.replay}: {len(replay)} registros, {replay.duration / 3600:.1f} h")
+
+def current_controls():
+    return Controls(thrust_on, thrust_mode, integrator, time_factor_index, schedule_index)
+
+def restore_checkpoint(t_target):
+    # Volta ao instante registrado mais próximo de t_target (re-integrando desde o quadro-chave)
+    global sim_time, thrust_on, thrust_mode, integrator, time_factor, time_factor_index, schedule_index
+    global traj_ship, traj_earth, traj_moon, trail_ship, trail_earth, trail_moon, guide, swarm
+    start = time.perf_counter()
+    sim_time, pos[:], vel[:], controls = checkpoints.rewind(t_target)
+    thrust_on, thrust_mode, integrator, time_factor_index, schedule_index = controls
+    time_factor = time_factors[time_factor_index]
+    # Os rastros recomeçam no instante restaurado
+    traj_ship, traj_earth, traj_moon = (TrajectoryHistory(HISTORY_LENGTH) for _ in range(3))
+    trail_ship, trail_earth, trail_moon = (ScreenTrail(history) for history in (traj_ship, traj_earth, traj_moon))
+    past_events.clear()
+    guide = None
+    swarm = None   # o enxame não está nos quadros-chave: seria o de um instante posterior
+    future_predictor.invalidate()
+    print(f"Estado restaurado em t = {sim_time:.0f} s ({(time.perf_counter() - start) * 1e3:.1f} ms)")
+    restart_recording()
+
+def change_time_factor(index):
+    global time_factor, time_factor_index
+    time_factor_index = index
+    time_factor = time_factors[time_factor_index]
+    future_predictor.invalidate()
+    print("Fator de tempo alterado para:", time_factor, "x")
 
 while running:
+    profiler.start_frame()
     # Processa eventos
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -136,13 +287,72 @@ while running:
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_SPACE:
                 thrust_on = True
+                future_predictor.invalidate()
                 print("Impulso ativado")
             if event.key == pygame.K_r:
                 traj_ship, traj_earth, traj_moon, thrust_mode, time_factor, time_factor_index, show_future_trajectory = reset_simulation()
+                future_predictor.invalidate()
+                if replay is not None:
+                    replay_seek(replay.records[0]["t"])
                 print("Simulação reiniciada")
+                restart_recording()
+            if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                change_time_factor(min(time_factor_index + 1, len(time_factors) - 1))
+            if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                change_time_factor(max(time_factor_index - 1, 0))
+            if event.key == pygame.K_s:
+                if swarm is None:
+                    swarm = launch_campaign(pos, vel, masses, SWARM_SIZE, SWARM_SIGMA_POS, SWARM_SIGMA_VEL)
+                    print("Enxame lançado:", SWARM_SIZE, "sondas")
+                else:
+                    swarm = None
+                    print("Enxame removido")
+            if event.key == pygame.K_p:
+                show_guide = not show_guide
+                guide = None
+                print("Prévia longa:", show_guide)
+            if event.key == pygame.K_g:
+                if replay is not None:
+                    print("Gravação indisponível durante a reprodução")
+                elif recorder is None:
+                    start_recording()
+                else:
+                    stop_recording()
+            if replay is not None and event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_HOME, pygame.K_END):
+                jump = REPLAY_SEEK * replay.duration
+                replay_seek({pygame.K_LEFT: replay_time - jump, pygame.K_RIGHT: replay_time + jump,
+                             pygame.K_HOME: -np.inf, pygame.K_END: np.inf}[event.key])
+            if replay is None and event.key == pygame.K_BACKSPACE:
+                restore_checkpoint(sim_time - REWIND_FRAMES * dt * time_factor)
+            if replay is None and event.key == pygame.K_F5:
+                if len(checkpoints):
+                    checkpoints.save(CHECKPOINT_FILE)
+                    print(f"{len(checkpoints)} quadros-chave salvos em", CHECKPOINT_FILE)
+                else:
+                    print("Nenhum quadro-chave para salvar")
+            if replay is None and event.key == pygame.K_F9:
+                try:
+                    loaded = KeyframeStore.load(CHECKPOINT_FILE)
+                except (OSError, ValueError) as exc:
+                    print("Checkpoints não carregados:", exc)
+                else:
+                    checkpoints = loaded
+                    masses[:] = checkpoints.masses
+                    restore_checkpoint(checkpoints.end_time)
+            if event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+                profile_surface = None
+            if event.key == pygame.K_F4:
+                if profiler.recording:
+                    profiler.stop_csv()
+                    print("Tempos por quadro gravados em", PROFILE_CSV)
+                else:
+                    profiler.start_csv(PROFILE_CSV)
+                    print("Gravando tempos por quadro em", PROFILE_CSV)
         if event.type == pygame.KEYUP:
             if event.key == pygame.K_SPACE:
                 thrust_on = False
+                future_predictor.invalidate()
                 print("Impulso desativado")
         
         # Verifica cliques do mouse para os botões
@@ -152,64 +362,92 @@ while running:
             for button in button_options:
                 if button["rect"].collidepoint(mouse_pos):
                     thrust_mode = button["label"]
+                    future_predictor.invalidate()
                     print("Modo de thrust selecionado:", thrust_mode)
-            # Botão de fator de tempo: cicla entre 1x, 10x e 50x
+            # Botão de fator de tempo: cicla de 1x a 10000x
             if time_button["rect"].collidepoint(mouse_pos):
-                time_factor_index = (time_factor_index + 1) % len(time_factors)
-                time_factor = time_factors[time_factor_index]
-                print("Fator de tempo alterado para:", time_factor, "x")
+                change_time_factor((time_factor_index + 1) % len(time_factors))
             # Botão de trajetória futura
             if future_button["rect"].collidepoint(mouse_pos):
                 show_future_trajectory = not show_future_trajectory
+                future_predictor.invalidate()
                 print("Exibir trajetória futura:", show_future_trajectory)
+            # Botão do integrador
+            if integrator_button["rect"].collidepoint(mouse_pos):
+                integrator = integrator_names[(integrator_names.index(integrator) + 1) % len(integrator_names)]
+                future_predictor.invalidate()
+                print("Integrador selecionado:", INTEGRATORS[integrator])
     
-    # Calcula o ângulo do thrust conforme o modo selecionado
-    if thrust_mode == "Progressiva":
-        thrust_angle = math.atan2(v_ship[1], v_ship[0])
-    elif thrust_mode == "Retrógrado":
-        thrust_angle = math.atan2(v_ship[1], v_ship[0]) + math.pi
-    elif thrust_mode == "Radial":
-        thrust_angle = math.atan2(r_ship[1] - r_earth[1], r_ship[0] - r_earth[0])
-    elif thrust_mode == "Anti Radial":
-        thrust_angle = math.atan2(r_earth[1] - r_ship[1], r_earth[0] - r_ship[0])
-    else:
-        thrust_angle = math.atan2(v_ship[1], v_ship[0])
+    profiler.mark("eventos")
     
-    # Integração com subdivisão para evitar saltos muito grandes
+    # Integração com subpassos automáticos: escolhidos pela menor escala de
+    # tempo dinâmica (órbita baixa, sobrevoo da Lua), não pelo fator de tempo
     dt_effective = dt * time_factor
-    substeps = 10 if time_factor == 50 else 1
-    dt_sub = dt_effective / substeps
-    
-    for _ in range(substeps):
-        # Recalcula acelerações para cada subpasso
-        r_earth_to_ship = r_earth - r_ship
-        r_moon_to_ship  = r_moon - r_ship
-        a_ship = (G * mEarth * r_earth_to_ship / np.linalg.norm(r_earth_to_ship)**3 +
-                  G * mMoon  * r_moon_to_ship  / np.linalg.norm(r_moon_to_ship)**3)
-        r_ship_to_earth = r_ship - r_earth
-        r_moon_to_earth = r_moon - r_earth
-        a_earth = (G * mShip * r_ship_to_earth / np.linalg.norm(r_ship_to_earth)**3 +
-                   G * mMoon * r_moon_to_earth / np.linalg.norm(r_moon_to_earth)**3)
-        r_ship_to_moon = r_ship - r_moon
-        r_earth_to_moon = r_earth - r_moon
-        a_moon = (G * mShip * r_ship_to_moon / np.linalg.norm(r_ship_to_moon)**3 +
-                  G * mEarth * r_earth_to_moon / np.linalg.norm(r_earth_to_moon)**3)
-        
-        v_ship += a_ship * dt_sub
-        v_earth += a_earth * dt_sub
-        v_moon  += a_moon * dt_sub
-        
-        if thrust_on:
-            direction = np.array([math.cos(thrust_angle), math.sin(thrust_angle)])
-            v_ship += thrust_const * direction * dt_sub
-        
-        r_ship += v_ship * dt_sub
-        r_earth += v_earth * dt_sub
-        r_moon  += v_moon * dt_sub
+    substeps = None
+
+    if replay is not None:
+        # Reprodução: o estado vem da gravação e o fator de tempo é a velocidade de reprodução
+        first = replay.index_at(replay_time)
+        replay_time = min(replay_time + dt_effective, replay.records[0]["t"] + replay.duration)
+        last = replay.index_at(replay_time)
+        sim_time, pos[:], vel[:], thrust_on, recorded_mode = replay.state(last)
+        thrust_mode = recorded_mode or thrust_mode
+        # Os eventos são procurados nos registros percorridos neste quadro
+        frame_records = replay.records[first:last + 1]
+        frame_samples = frame_records["t"], frame_records["pos"], frame_records["vel"]
+    else:
+        # Todas as chamadas ao integrador passam pelos quadros-chave (rebobinamento exato)
+        checkpoints.begin_frame(sim_time, pos, vel, current_controls())
+        event_trace.clear(sim_time)
+        # Eventos do roteiro que caem neste quadro: o passo é dividido no instante exato
+        done = 0.0
+        while schedule_index < len(schedule) and schedule[schedule_index][0] < sim_time + dt_effective:
+            offset = schedule[schedule_index][0] - sim_time
+            if offset > done:
+                checkpoints.advance(pos, vel, offset - done, thrust_mode if thrust_on else None, integrator,
+                                    event_trace)
+                done = offset
+            _, thrust_mode, thrust_on = schedule[schedule_index]
+            schedule_index += 1
+            future_predictor.invalidate()
+            print(f"Roteiro: impulso {'ativado' if thrust_on else 'desativado'} ({thrust_mode})")
+
+        # Direção do thrust conforme o modo selecionado (fixa durante o quadro)
+        checkpoints.advance(pos, vel, dt_effective - done, thrust_mode if thrust_on else None, integrator,
+                            event_trace)
+        sim_time += dt_effective
+        checkpoints.end_frame(sim_time, current_controls())
+        frame_samples = event_trace.samples()
+    if recorder is not None:
+        recorder.append(sim_time, pos, vel, thrust_on, thrust_mode)
+    frame_events = detect_events(*frame_samples)
+    for kind, t_event, position, distance in frame_events:
+        past_events.append((kind, position))
+    for kind, t_event, position, distance in frame_events[:EVENT_PRINTS]:
+        print(f"Evento: {EVENT_LABELS[kind]} em t = {t_event:.0f} s ({distance / 1e3:.0f} km)")
+    if len(frame_events) > EVENT_PRINTS:
+        print(f"... e mais {len(frame_events) - EVENT_PRINTS} eventos neste quadro")
+    profiler.mark("física")
+    if show_guide:
+        guide_age += 1
+        if (guide is None or guide[1] != thrust_on or (thrust_on and guide_age >= GUIDE_REFRESH)
+                or sim_time - guide[0] > GUIDE_DAYS * 86400 / 2):
+            if guide is None:
+                guide_predictor.invalidate()   # o guia anterior não vale mais (reset, volta no tempo)
+            guide_predictor.submit(pos, vel, masses, GUIDE_DT, substeps=None, integrator=GUIDE_INTEGRATOR,
+                                   t0=sim_time)
+            guide = (sim_time, thrust_on)
+            guide_age = 0
+    profiler.mark("previsão")
+    # O enxame obedece ao mesmo comando de impulso (sondas com flag de impulso)
+    if swarm is not None:
+        swarm.advance(dt_effective, 1, substeps, thrust_mode if thrust_on else None, thrust_const,
+                      integrator=integrator)
     
-    traj_ship.append(r_ship.copy())
-    traj_earth.append(r_earth.copy())
-    traj_moon.append(r_moon.copy())
+    traj_ship.append(r_ship)
+    traj_earth.append(r_earth)
+    traj_moon.append(r_moon)
+    profiler.mark("física")
     
     # Renderização
     screen.fill(WHITE)
@@ -222,62 +460,108 @@ while running:
     pygame.draw.circle(screen, GRAY, (int(pos_moon[0]), int(pos_moon[1])), 10)
     pygame.draw.circle(screen, RED, (int(pos_ship[0]), int(pos_ship[1])), 5)
     
-    if len(traj_ship) > 1:
-        points = [(int(center[0] + p[0]*scale), int(center[1] + p[1]*scale)) for p in traj_ship]
-        pygame.draw.lines(screen, RED, False, points, 1)
-    if len(traj_moon) > 1:
-        points = [(int(center[0] + p[0]*scale), int(center[1] + p[1]*scale)) for p in traj_moon]
-        pygame.draw.lines(screen, GRAY, False, points, 1)
-    if len(traj_earth) > 1:
-        points = [(int(center[0] + p[0]*scale), int(center[1] + p[1]*scale)) for p in traj_earth]
-        pygame.draw.lines(screen, BLUE, False, points, 1)
+    for trail, color in ((trail_ship, RED), (trail_moon, GRAY), (trail_earth, BLUE)):
+        points = trail.points(center, scale)
+        if len(points) > 1:
+            pygame.draw.lines(screen, color, False, points, 1)
+    
+    # Enxame: pixels das sondas ativas escritos direto na superfície, um único blit
+    if swarm is not None:
+        swarm_surface.fill(WHITE)
+        px = to_screen(swarm.pos[swarm.alive], center, scale)
+        px = px[(px[:, 0] >= 0) & (px[:, 0] < width) & (px[:, 1] >= 0) & (px[:, 1] < height)]
+        pixels = pygame.surfarray.pixels2d(swarm_surface)
+        pixels[px[:, 0], px[:, 1]] = swarm_surface.map_rgb(ORANGE)
+        del pixels   # libera a trava da superfície antes do blit
+        screen.blit(swarm_surface, (0, 0))
+    
+    # Prévia longa: só o trecho do guia ainda no futuro, e a esfera de influência da Lua
+    if show_guide:
+        guide_positions, guide_stale = guide_predictor.latest()
+        if guide_positions is not None and not guide_stale:
+            guide_start = max(int((sim_time - guide_predictor.latest_start()) / GUIDE_DT), 0)
+            guide_points = to_screen(guide_positions[guide_start:], center, scale)
+            if len(guide_points) > 1:
+                pygame.draw.lines(screen, TEAL, False, guide_points.tolist(), 1)
+        pygame.draw.circle(screen, TEAL, (int(pos_moon[0]), int(pos_moon[1])), int(MOON_SOI * scale), 1)
+    
+    profiler.mark("desenho")
     
     # Desenha a trajetória futura, se ativada
     if show_future_trajectory:
-        skip_value = 5 if time_factor == 50 else 1
-        substeps_value = 10 if time_factor == 50 else 1
-        future_positions = compute_future_trajectory(r_ship, v_ship, r_earth, v_earth, r_moon, v_moon,
-                                                     dt_effective, steps=500, skip=skip_value, substeps=substeps_value)
-        if future_positions:
-            future_points = [(int(center[0] + p[0]*scale), int(center[1] + p[1]*scale)) for p in future_positions]
-            pygame.draw.lines(screen, PURPLE, False, future_points, 2)
+        skip_value = 5 if time_factor >= 50 else 1
+        future_predictor.submit(pos, vel, masses, dt_effective, substeps=substeps, skip=skip_value,
+                                integrator=integrator)
+        # Desenha o arco mais recente disponível, sem esperar pelo cálculo
+        future_positions, future_stale = future_predictor.latest()
+        if future_positions is not None and len(future_positions) > 1:
+            future_points = to_screen(future_positions, center, scale).tolist()
+            pygame.draw.lines(screen, LIGHT_PURPLE if future_stale else PURPLE, False, future_points, 2)
+        future_events = future_predictor.latest_events()
+        for kind, _, position, _ in future_events:
+            draw_event_marker(kind, position, PURPLE)
+    profiler.mark("previsão")
+    
+    # Eventos já ocorridos na trajetória integrada
+    for kind, position in past_events:
+        draw_event_marker(kind, position, RED)
+    profiler.mark("desenho")
     
     # Instruções e status
     instructions = [
         "SPACE: Manter para ativar impulso",
-        "R: Reiniciar simulação",
+        "R: Reiniciar simulação   +/-: Fator de tempo   S: Enxame   P: Prévia longa   G: Gravar",
         f"Thrust: {'Ativado' if thrust_on else 'Desativado'}",
         f"Modo de Thrust: {thrust_mode}",
         f"Velocidade: {np.linalg.norm(v_ship):.2f} m/s",
         f"Aceleração do Thrust: {thrust_const:.1f} m/s²",
         f"Fator de Tempo: {time_factor}x"
     ]
-    for i, line in enumerate(instructions):
-        txt = font.render(line, True, BLACK)
-        screen.blit(txt, (20, 20 + i * 25))
-    
-    # Desenha os botões
-    for button in button_options:
-        color = GREEN if button["label"] == thrust_mode else BLACK
-        pygame.draw.rect(screen, color, button["rect"], 2)
-        txt = font.render(button["label"], True, BLACK)
-        txt_rect = txt.get_rect(center=button["rect"].center)
-        screen.blit(txt, txt_rect)
+    # Linhas opcionais de estado, abaixo dos botões
+    status = []
+    if replay is None:
+        status.append("Backspace: Voltar no tempo   F5/F9: Salvar/Carregar checkpoints")
+    if replay is not None:
+        status.append(f"Reprodução: {sim_time / 3600:.2f} h de {replay.duration / 3600:.2f} h   "
+                      "Setas: ±5%   Home/End")
+    if recorder is not None:
+        status.append(f"Gravando: {recorder.count} registros (G: parar)")
+    if schedule:
+        status.append(f"Roteiro: {schedule_index}/{len(schedule)} eventos   t = {sim_time:.0f} s")
+    if show_future_trajectory and future_events:
+        kind, t_event, _, distance = future_events[0]
+        status.append(f"Próximo evento: {EVENT_LABELS[kind]} em {format_duration(t_event)} "
+                      f"({distance / 1e3:.0f} km)")
+    if swarm is not None:
+        status.append(f"Enxame: {swarm.alive.sum()} ativas, {swarm.collided.sum()} colisões, "
+                      f"{swarm.escaped.sum()} escapes")
+    instruction_lines.draw(screen, instructions)
+    status_lines.draw(screen, status)
     
-    time_text = f"Tempo: {time_factor}x"
-    time_color = GREEN if time_factor > 1 else BLACK
-    pygame.draw.rect(screen, time_color, time_button["rect"], 2)
-    txt = font.render(time_text, True, BLACK)
-    txt_rect = txt.get_rect(center=time_button["rect"].center)
-    screen.blit(txt, txt_rect)
+    # Desenha os botões (modos de thrust, tempo, trajetória futura e integrador)
+    button_panel.draw(screen, [(button["label"], button["label"] == thrust_mode) for button in button_options]
+                      + [(f"Tempo: {time_factor}x", time_factor > 1),
+                         (future_button["label"], show_future_trajectory),
+                         (INTEGRATORS[integrator], False)])
     
-    future_color = GREEN if show_future_trajectory else BLACK
-    pygame.draw.rect(screen, future_color, future_button["rect"], 2)
-    txt = font.render(future_button["label"], True, BLACK)
-    txt_rect = txt.get_rect(center=future_button["rect"].center)
-    screen.blit(txt, txt_rect)
+    # Sobreposição do perfil: o texto só é renderizado de novo a cada PROFILE_REFRESH quadros
+    if profiler.show:
+        if profile_surface is None or profiler.frames % PROFILE_REFRESH == 0:
+            lines = profiler.summary_lines()
+            profile_surface = pygame.Surface((260, 20 * len(lines) + 10))
+            profile_surface.fill(WHITE)
+            for i, line in enumerate(lines):
+                profile_surface.blit(small_font.render(line, True, BLACK), (5, 5 + i * 20))
+        screen.blit(profile_surface, (width - 270, 10))
+    profiler.mark("HUD")
     
     pygame.display.flip()
     clock.tick(60)
+    profiler.mark("flip/espera")
 
+future_predictor.close()
+guide_predictor.close()
+profiler.close()
+if recorder is not None:
+    stop_recording()
 pygame.quit()